@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Render many markdown reports in parallel.
+
+Jobs come from either a directory of ``*.md`` files or a JSONL manifest with
+one job per line:
+
+    {"input": "reports/aapl.md", "output": "output/aapl.pdf",
+     "font": "font/STKaiti.ttf", "metadata": {"title": "Apple Q1 FY2025"}}
+
+Only ``input`` is required; relative paths are resolved against the manifest's
+directory. Jobs are spread over a process pool whose workers register the font
+and build the styles once at startup. A failing job is reported and the rest
+of the batch carries on.
+
+Usage:
+    python batch_render.py reports/ --output-dir output --workers 4
+    python batch_render.py jobs.jsonl --report batch_results.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import generate_report_simple as generator
+
+# Per-worker state set up once by init_worker
+_worker_styles = None
+
+
+def load_jobs(source, output_dir="output", font_path=None):
+    """Return the list of job dicts described by a directory or JSONL manifest."""
+    jobs = []
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.endswith(".md"):
+                stem = os.path.splitext(name)[0]
+                jobs.append({
+                    'input': os.path.join(source, name),
+                    'output': os.path.join(output_dir, f"{stem}.pdf"),
+                })
+    else:
+        base_dir = os.path.dirname(os.path.abspath(source))
+        with open(source, 'r', encoding='utf-8') as manifest:
+            for line_number, line in enumerate(manifest, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                job = json.loads(line)
+                if 'input' not in job:
+                    raise ValueError(f"{source}:{line_number}: job has no 'input'")
+                job['input'] = os.path.join(base_dir, job['input'])
+                if job.get('output'):
+                    job['output'] = os.path.join(base_dir, job['output'])
+                else:
+                    stem = os.path.splitext(os.path.basename(job['input']))[0]
+                    job['output'] = os.path.join(output_dir, f"{stem}.pdf")
+                if job.get('font'):
+                    job['font'] = os.path.join(base_dir, job['font'])
+                jobs.append(job)
+
+    for job in jobs:
+        job.setdefault('font', font_path)
+        job.setdefault('metadata', {})
+    return jobs
+
+
+def init_worker(font_path):
+    """Register the default font and build the styles once per worker process."""
+    global _worker_styles
+    generator.register_font(font_path)
+    _worker_styles = generator.create_styles()
+
+
+def render_job(job):
+    """Render one job and return a result dict; never raises."""
+    start = time.perf_counter()
+    result = {'input': job['input'], 'output': job['output']}
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(job['output'])), exist_ok=True)
+        generator.generate_pdf(
+            job['input'], job['output'], job.get('font'),
+            metadata=job.get('metadata'), styles=_worker_styles, force=job.get('force', False),
+        )
+        result['status'] = 'ok'
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = f"{type(e).__name__}: {e}"
+        result['traceback'] = traceback.format_exc()
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def run_batch(jobs, workers=None, font_path=None):
+    """Render ``jobs`` across a process pool, yielding results as jobs finish."""
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(font_path,)) as pool:
+        futures = {pool.submit(render_job, job): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                yield future.result()
+            except BrokenProcessPool as e:
+                # A worker died (e.g. killed for memory); the job itself is lost
+                yield {'input': job['input'], 'output': job['output'], 'status': 'error',
+                       'error': f"worker crashed: {e}", 'seconds': None}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a batch of markdown reports to PDF.")
+    parser.add_argument("source", help="directory of .md files or a JSONL manifest")
+    parser.add_argument("--output-dir", default="output", help="output directory for jobs without an output path")
+    parser.add_argument("--font", default=None, help="default font file for jobs without a font")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: CPU count)")
+    parser.add_argument("--report", default=None, help="write per-job results to this JSON file")
+    parser.add_argument("--force", action="store_true", help="re-render even if a cached PDF matches the inputs")
+    args = parser.parse_args(argv)
+
+    jobs = load_jobs(args.source, args.output_dir, args.font)
+    for job in jobs:
+        job['force'] = args.force
+    if not jobs:
+        print(f"No jobs found in {args.source}")
+        return 1
+
+    print(f"Rendering {len(jobs)} reports...")
+    batch_start = time.perf_counter()
+    results = []
+    for result in run_batch(jobs, args.workers, args.font):
+        results.append(result)
+        if result['status'] == 'ok':
+            print(f"✅ {result['output']} ({result['seconds']:.2f}s)")
+        else:
+            print(f"❌ {result['input']}: {result['error']}")
+    elapsed = time.perf_counter() - batch_start
+
+    failed = [r for r in results if r['status'] != 'ok']
+    print(f"\n{len(results) - len(failed)}/{len(results)} reports rendered in {elapsed:.2f}s")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'seconds': round(elapsed, 3), 'jobs': results}, f, ensure_ascii=False, indent=2)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Benchmark CJK line breaking against ReportLab's default on the Chinese paragraphs of a report.
+
+Every paragraph and table cell of the report that contains CJK text is
+wrapped ``--copies`` times with ReportLab's Paragraph and with CJKParagraph,
+with the layout cache turned off, so each wrap really breaks lines. Besides
+the time, the line breaks are checked: lines starting with closing
+punctuation or ending with opening punctuation (kinsoku), and Latin words
+or figures cut across two lines.
+
+Most paragraphs of a report fit on one or two lines. To measure dense text
+as well, the run is repeated with every ``--join`` paragraphs of the same
+style and width joined into one.
+
+Usage:
+    python benchmarks/bench_cjk_linebreak.py [--input input.md] [--copies 1000] [--join 40] [--font FONT]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from reportlab.lib.textsplit import ALL_CANNOT_END, ALL_CANNOT_START  # noqa: E402
+from reportlab.platypus import Paragraph, Table  # noqa: E402
+
+import document_ir  # noqa: E402
+import generate_report_simple as report  # noqa: E402
+from cjk_linebreak import CJKParagraph, _CJK_RE  # noqa: E402
+from paragraph_cache import CachedParagraph  # noqa: E402
+from translation import GlossaryTranslator  # noqa: E402
+from translation_backend import BatchTranslator, GlossaryBackend  # noqa: E402
+
+WORD_CHAR = re.compile(r'[A-Za-z0-9]')
+
+
+def cjk_paragraphs(md_path, styles):
+    """Return ``(markup, style, width)`` for every paragraph and table cell of the report with CJK text."""
+    with open(md_path, 'r', encoding='utf-8') as f:
+        blocks = document_ir.parse_markdown(f.read())
+    segments = [report.clean_html(text) for text in document_ir.iter_segments(blocks)]
+    translated = BatchTranslator(GlossaryBackend(GlossaryTranslator(report.translations))).translate(segments)
+    story = report.build_story(blocks, translated, styles, report.DEFAULT_METADATA, report.make_toc(styles))
+
+    width = report.A4[0] - 2 * 72 - 12
+    found = []
+    for flowable in story:
+        if isinstance(flowable, Table):
+            for row in flowable._cellvalues:
+                for column, cell in enumerate(row):
+                    if isinstance(cell, Paragraph):
+                        found.append((cell.text, cell.style, flowable._colWidths[column] - 12))
+        elif isinstance(flowable, Paragraph):
+            found.append((flowable.text, flowable.style, width))
+    return [(text, style, w) for text, style, w in found if _CJK_RE.search(text)]
+
+
+def join_paragraphs(paragraphs, count):
+    """Join every ``count`` paragraphs of the same style and width, in order, into one."""
+    groups = {}
+    for text, style, width in paragraphs:
+        groups.setdefault((id(style), width), []).append((text, style, width))
+    joined = []
+    for group in groups.values():
+        for i in range(0, len(group), count):
+            run = group[i:i + count]
+            joined.append((''.join(text for text, _, _ in run), run[0][1], run[0][2]))
+    return joined
+
+
+def line_texts(paragraph):
+    lines = paragraph.blPara.lines
+    if paragraph.blPara.kind == 0:
+        return [' '.join(words) for _, words in lines]
+    return [''.join(word.text for word in line.words) for line in lines]
+
+
+def wrap_all(cls, paragraphs, copies):
+    """Wrap every paragraph ``copies`` times.
+
+    Returns the seconds spent wrapping and, from the last round, the plain
+    text and the lines of every paragraph.
+    """
+    elapsed = 0.0
+    lines = []
+    for _ in range(copies):
+        built = [(cls(text, style), width) for text, style, width in paragraphs]
+        start = time.perf_counter()
+        for paragraph, width in built:
+            paragraph.wrap(width, 1e6)
+        elapsed += time.perf_counter() - start
+        lines = [(paragraph.getPlainText(), line_texts(paragraph)) for paragraph, _ in built]
+    return elapsed, lines
+
+
+def quality(paragraph_lines):
+    """Count lines that break kinsoku rules or cut a Latin word or figure."""
+    total = bad_start = bad_end = cut_words = 0
+    for text, lines in paragraph_lines:
+        total += len(lines)
+        for index, line in enumerate(lines):
+            if index > 0 and line[:1] in ALL_CANNOT_START:
+                bad_start += 1
+            if index + 1 < len(lines) and line[-1:] in ALL_CANNOT_END:
+                bad_end += 1
+            if index + 1 < len(lines) and WORD_CHAR.match(line[-1:]) and WORD_CHAR.match(lines[index + 1][:1]):
+                # Breaking at a space between two words is fine
+                tail, head = line[-12:], lines[index + 1][:12]
+                if tail + head in text and tail + ' ' + head not in text:
+                    cut_words += 1
+    return total, bad_start, bad_end, cut_words
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", default=os.path.join(ROOT, "input.md"))
+    parser.add_argument("--copies", type=int, default=1000, help="times every paragraph is wrapped")
+    parser.add_argument("--join", type=int, default=40, help="paragraphs joined into one for the dense-text run")
+    parser.add_argument("--font", default=None)
+    args = parser.parse_args()
+
+    report.register_font(args.font)
+    styles = report.create_styles()
+    CachedParagraph.cache = None
+    paragraphs = cjk_paragraphs(args.input, styles)
+    characters = sum(len(text) for text, _, _ in paragraphs) * args.copies
+
+    print(f"\nInput: {args.input} x {args.copies} ({characters / 1e6:.1f}M characters of CJK paragraphs)")
+    for title, runs in ((f"{len(paragraphs)} paragraphs and cells as written", paragraphs),
+                        (f"dense text, {args.join} paragraphs joined", join_paragraphs(paragraphs, args.join))):
+        rows = []
+        for name, cls in (("ReportLab", Paragraph), ("CJKParagraph", CJKParagraph)):
+            elapsed, lines = wrap_all(cls, runs, args.copies)
+            rows.append((name, elapsed) + quality(lines))
+
+        print(f"\n{title}:")
+        print(f"{'line breaker':<14}{'seconds':>9}{'speed-up':>10}{'lines':>8}{'bad start':>11}{'bad end':>9}"
+              f"{'cut words':>11}")
+        baseline = rows[0][1]
+        for name, elapsed, total, bad_start, bad_end, cut_words in rows:
+            print(f"{name:<14}{elapsed:>9.2f}{baseline / elapsed:>9.2f}x{total:>8}{bad_start:>11}{bad_end:>9}"
+                  f"{cut_words:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark building the document IR against the old markdown -> HTML -> BeautifulSoup path.
+
+The old path serialized the markdown tree to HTML, re-parsed it with
+BeautifulSoup and then walked the elements once per language. The IR is
+built straight from the markdown element tree and walked once. The old
+path needs beautifulsoup4, which the generator no longer requires.
+
+Usage:
+    python benchmarks/bench_document_ir.py [--input input.md] [--megabytes 10] [--repeat 3]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import markdown  # noqa: E402
+from bs4 import BeautifulSoup  # noqa: E402
+
+import document_ir  # noqa: E402
+
+
+def soup_path(md_text):
+    soup = BeautifulSoup(markdown.markdown(md_text), 'html.parser')
+    elements = soup.find_all(['h1', 'h2', 'h3', 'p', 'ul'])
+    # One walk per language, as the renderer used to do
+    count = 0
+    for _ in range(2):
+        for element in elements:
+            if element.name == 'ul':
+                count += len(element.find_all('li'))
+            else:
+                count += len(element.get_text().strip()) > 0
+    return count
+
+
+def ir_path(md_text):
+    blocks = document_ir.parse_markdown(md_text)
+    return sum(1 for _ in document_ir.iter_segments(blocks))
+
+
+def measure(repeat, func, md_text):
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func(md_text)
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    func(md_text)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", default=os.path.join(ROOT, "input.md"))
+    parser.add_argument("--megabytes", type=float, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        sample = f.read()
+    copies = max(1, int(args.megabytes * 1024 * 1024 // len(sample.encode('utf-8'))))
+    md_text = "\n\n".join([sample] * copies)
+    print(f"Input: {args.input} x {copies} = {len(md_text.encode('utf-8')) / 1e6:.1f} MB")
+
+    soup_time, soup_peak = measure(args.repeat, soup_path, md_text)
+    ir_time, ir_peak = measure(args.repeat, ir_path, md_text)
+
+    print(f"{'path':<24}{'seconds':>10}{'peak MB':>10}")
+    print(f"{'HTML + BeautifulSoup':<24}{soup_time:>10.2f}{soup_peak / 1e6:>10.1f}")
+    print(f"{'document IR':<24}{ir_time:>10.2f}{ir_peak / 1e6:>10.1f}")
+    print(f"Speed-up: {soup_time / ir_time:.1f}x, peak memory: {soup_peak / ir_peak:.1f}x lower")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark the layout estimate (--dry-run) against a full render and check that the page counts agree.
+
+Usage:
+    python benchmarks/bench_dry_run.py [--input input.md] [--copies 1 20 100] [--font FONT]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pikepdf  # noqa: E402
+
+import generate_report_simple as report  # noqa: E402
+from layout_estimate import estimate_layout  # noqa: E402
+
+
+def render(md_path, output_path, font_path):
+    start = time.perf_counter()
+    report.generate_pdf(md_path, output_path, font_path, translation_memory_path=None, output_cache_dir=None)
+    elapsed = time.perf_counter() - start
+    with pikepdf.open(output_path) as pdf:
+        return elapsed, len(pdf.pages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", default=os.path.join(ROOT, "input.md"))
+    parser.add_argument("--copies", type=int, nargs="+", default=[1, 20, 100], help="times the input is repeated")
+    parser.add_argument("--font", default=None)
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        md_text = f.read()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for copies in args.copies:
+            md_path = os.path.join(tmp_dir, f"input-{copies}.md")
+            with open(md_path, 'w', encoding='utf-8') as f:
+                f.write("\n\n".join([md_text] * copies))
+
+            start = time.perf_counter()
+            summary = estimate_layout(md_path, args.font, translation_memory_path=None)
+            estimate_seconds = time.perf_counter() - start
+            render_seconds, pages = render(md_path, os.path.join(tmp_dir, "report.pdf"), args.font)
+            rows.append((copies, estimate_seconds, render_seconds, summary['pages'], pages,
+                         len(summary['warnings'])))
+
+    print(f"\nInput: {args.input}")
+    print(f"{'copies':>8}{'dry-run s':>11}{'render s':>10}{'speed-up':>10}{'pages':>8}{'actual':>8}{'warnings':>10}")
+    for copies, estimate_seconds, render_seconds, estimated, actual, warnings in rows:
+        flag = '' if estimated == actual else '  MISMATCH'
+        print(f"{copies:>8}{estimate_seconds:>11.2f}{render_seconds:>10.2f}{render_seconds / estimate_seconds:>9.2f}x"
+              f"{estimated:>8}{actual:>8}{warnings:>10}{flag}")
+
+
+if __name__ == "__main__":
+    main()
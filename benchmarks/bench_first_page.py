@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Benchmark the time to the first page of a report opened over HTTP, linearized or not.
+
+The input is rendered as usual and with ``--linearize``, and both PDFs are
+served by a local HTTP server that answers byte range requests. The server
+waits ``--latency`` seconds before answering and then sends at ``--mbps``,
+like a client's connection to the portal. Two viewers are timed:
+
+* download: the PDF is read from the start in one request. An ordinary PDF
+  can be shown when it is complete, a linearized one as soon as the first
+  ``E`` bytes (parameters, hint tables and first page) have arrived.
+* ranges: the first kilobyte is requested and, when it holds linearization
+  parameters, the rest of the first page with a second range request.
+
+The render time of each PDF and the result of the linearization check are
+printed as well.
+
+Usage:
+    python benchmarks/bench_first_page.py [--input input.md] [--copies 20] [--mbps 8] [--latency 0.05] [--font FONT]
+"""
+
+import argparse
+import http.server
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import generate_report_simple as report  # noqa: E402
+from pdf_linearize import PARAMETERS_SIZE, check_linearization, linearization_parameters  # noqa: E402
+
+CHUNK_SIZE = 16 * 1024
+
+
+class ThrottledRangeHandler(http.server.BaseHTTPRequestHandler):
+    """Serve the files of ``server.directory`` with byte ranges, at ``server.rate`` bytes per second."""
+
+    def do_GET(self):
+        path = os.path.join(self.server.directory, os.path.basename(self.path))
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        match = re.fullmatch(r'bytes=(\d*)-(\d*)', self.headers.get('Range', '').strip())
+        if match and match.group(1):
+            start = int(match.group(1))
+            end = min(int(match.group(2)), end) if match.group(2) else end
+        elif match and match.group(2):
+            start = max(0, size - int(match.group(2)))
+
+        self.send_response(206 if match else 200)
+        if match:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+
+        time.sleep(self.server.latency)
+        began = time.perf_counter()
+        sent = 0
+        with open(path, 'rb') as f:
+            f.seek(start)
+            while sent < end - start + 1:
+                chunk = f.read(min(CHUNK_SIZE, end - start + 1 - sent))
+                self.wfile.write(chunk)
+                sent += len(chunk)
+                delay = began + sent / self.server.rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+    def log_message(self, *args):
+        pass
+
+
+def download(url):
+    """Read ``url`` in one request; returns the seconds until the first page could be shown and until the end."""
+    start = time.perf_counter()
+    first_page = None
+    head = b''
+    received = 0
+    with urllib.request.urlopen(url) as response:
+        needed = int(response.headers['Content-Length'])
+        while True:
+            chunk = response.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            received += len(chunk)
+            if len(head) < PARAMETERS_SIZE:
+                head += chunk
+                parameters = linearization_parameters(head)
+                if parameters is not None:
+                    needed = parameters['E']
+            if first_page is None and received >= needed:
+                first_page = time.perf_counter() - start
+    return first_page, time.perf_counter() - start
+
+
+def fetch_range(url, start, end):
+    request = urllib.request.Request(url, headers={'Range': f'bytes={start}-{end}'})
+    with urllib.request.urlopen(request) as response:
+        return response.read()
+
+
+def first_page_by_ranges(url):
+    """Fetch the first page of a linearized PDF with range requests; returns the seconds, or None."""
+    start = time.perf_counter()
+    head = fetch_range(url, 0, PARAMETERS_SIZE - 1)
+    parameters = linearization_parameters(head)
+    if parameters is None:
+        return None
+    fetch_range(url, len(head), parameters['E'] - 1)
+    return time.perf_counter() - start
+
+
+def render(input_path, output_path, font_path, linearize):
+    start = time.perf_counter()
+    report.generate_pdf(input_path, output_path, font_path, translation_memory_path=None,
+                        output_cache_dir=None, linearize=linearize)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", default=os.path.join(ROOT, "input.md"))
+    parser.add_argument("--copies", type=int, default=20, help="times the input is repeated")
+    parser.add_argument("--mbps", type=float, default=8, help="bandwidth of the simulated connection")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds before the server answers")
+    parser.add_argument("--font", default=None)
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        md_text = "\n\n".join([f.read()] * args.copies)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_path = os.path.join(tmp_dir, "input.md")
+        with open(input_path, 'w', encoding='utf-8') as f:
+            f.write(md_text)
+
+        # Warm up fonts, imports and the paragraph cache so both renders start alike
+        render(input_path, os.path.join(tmp_dir, "warmup.pdf"), args.font, False)
+        renders = {}
+        for name, linearize in (("ordinary", False), ("linearized", True)):
+            renders[name] = render(input_path, os.path.join(tmp_dir, f"{name}.pdf"), args.font, linearize)
+        problems = check_linearization(os.path.join(tmp_dir, "linearized.pdf"))
+
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), ThrottledRangeHandler)
+        server.directory = tmp_dir
+        server.rate = args.mbps * 1e6 / 8
+        server.latency = args.latency
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            for name in ("ordinary", "linearized"):
+                url = f"http://127.0.0.1:{server.server_port}/{name}.pdf"
+                with open(os.path.join(tmp_dir, f"{name}.pdf"), 'rb') as f:
+                    parameters = linearization_parameters(f.read(PARAMETERS_SIZE))
+                size = os.path.getsize(os.path.join(tmp_dir, f"{name}.pdf"))
+                first_page, complete = download(url)
+                rows.append((name, renders[name], size, parameters['E'] if parameters else size,
+                             first_page, first_page_by_ranges(url), complete))
+        finally:
+            server.shutdown()
+
+    print(f"\nInput: {args.input} x {args.copies}, {args.mbps:g} Mbit/s, {args.latency * 1000:.0f} ms latency")
+    print(f"{'PDF':<12}{'render s':>9}{'KB':>8}{'page 1 KB':>11}{'download s':>12}{'ranges s':>10}{'complete s':>12}")
+    for name, elapsed, size, first_bytes, first_page, ranges, complete in rows:
+        ranges = f"{ranges:.2f}" if ranges is not None else "-"
+        print(f"{name:<12}{elapsed:>9.2f}{size / 1e3:>8.0f}{first_bytes / 1e3:>11.0f}{first_page:>12.2f}"
+              f"{ranges:>10}{complete:>12.2f}")
+    print(f"Linearization check: {'; '.join(problems) or 'ok'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold TrueType parsing against loading from the font metrics cache.
+
+Usage:
+    python benchmarks/bench_font_cache.py [--font font/STKaiti.ttf] [--repeat 5]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from reportlab.pdfbase.ttfonts import TTFont  # noqa: E402
+
+from font_cache import cache_path_for, load_ttfont  # noqa: E402
+
+SAMPLE_TEXT = "苹果公司在2025财年第一季度取得了卓越的财务业绩，实现了1243亿美元的创纪录收入。Revenue grew 4%."
+
+
+def best_of(repeat, func):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    default_font = os.path.join(ROOT, "font", "STKaiti.ttf")
+    if not os.path.exists(default_font):
+        default_font = "/System/Library/Fonts/STHeiti Light.ttc"
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--font", default=default_font)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.font):
+        parser.error(f"font not found: {args.font}")
+
+    cache_dir = tempfile.mkdtemp(prefix="llmquant-fontcache-")
+    try:
+        cold = best_of(args.repeat, lambda: TTFont("Bench", args.font))
+
+        start = time.perf_counter()
+        load_ttfont("Bench", args.font, cache_dir)
+        first = time.perf_counter() - start
+
+        cached = best_of(args.repeat, lambda: load_ttfont("Bench", args.font, cache_dir))
+
+        parsed = TTFont("Bench", args.font)
+        loaded = load_ttfont("Bench", args.font, cache_dir)
+        assert parsed.stringWidth(SAMPLE_TEXT, 11) == loaded.stringWidth(SAMPLE_TEXT, 11)
+
+        font_size = os.path.getsize(args.font)
+        cache_size = os.path.getsize(cache_path_for(args.font, cache_dir))
+        print(f"font: {args.font} ({font_size / 1e6:.1f} MB, {parsed.face.numGlyphs} glyphs, "
+              f"{len(parsed.face.charToGlyph)} mapped characters)")
+        print(f"cache file: {cache_size / 1e6:.2f} MB\n")
+        print(f"cold parse (TTFont)          {cold * 1000:>8.1f} ms")
+        print(f"first load (parse + write)   {first * 1000:>8.1f} ms")
+        print(f"cached load (mmap)           {cached * 1000:>8.1f} ms   {cold / cached:.1f}x faster")
+    finally:
+        shutil.rmtree(cache_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark the image asset pipeline on a report with chart and photo figures.
+
+A chart screenshot (few colors) and a photograph-like picture, as PNG and
+as JPEG, are generated and shown after each section of the input. The
+report is rendered with the original images embedded, with an empty image
+cache and with a warm one. The time and PDF size of each render are
+printed, followed by the size of each asset before and after preparation.
+
+Usage:
+    python benchmarks/bench_image_assets.py [--input input.md] [--scale 1.0] [--font FONT]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import generate_report_simple as report  # noqa: E402
+
+FIGURES = ("chart.png", "photo.png", "photo.jpg")
+
+
+def make_figures(directory, scale):
+    """Write the figure images to ``directory``."""
+    from PIL import Image, ImageDraw
+
+    width, height = int(2400 * scale), int(1500 * scale)
+    chart = Image.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(chart)
+    bar = width // 13
+    for number in range(12):
+        top = height * (0.2 + 0.05 * (number % 7))
+        draw.rectangle([bar // 2 + number * bar, top, number * bar + bar, height * 0.93], fill=(30, 90, 200))
+    draw.line([(bar // 2, height * 0.93), (width - bar // 2, height * 0.93)], fill='black', width=4)
+    chart.save(os.path.join(directory, "chart.png"))
+
+    size = (int(3000 * scale), int(2000 * scale))
+    noise = Image.effect_noise(size, 60).convert('RGB')
+    gradient = Image.linear_gradient('L').resize(size).convert('RGB')
+    photo = Image.blend(noise, gradient, 0.5)
+    photo.save(os.path.join(directory, "photo.png"))
+    photo.save(os.path.join(directory, "photo.jpg"), quality=95)
+
+
+def with_figures(md_text):
+    """Add a figure after every ``##`` section of ``md_text``."""
+    sections = md_text.split('\n## ')
+    for number in range(1, len(sections)):
+        sections[number] += f"\n\n![Figure {number}]({FIGURES[number % len(FIGURES)]})\n"
+    return '\n## '.join(sections)
+
+
+def render(input_path, output_path, font_path):
+    start = time.perf_counter()
+    report.generate_pdf(input_path, output_path, font_path, translation_memory_path=None, output_cache_dir=None)
+    return time.perf_counter() - start, os.path.getsize(output_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", default=os.path.join(ROOT, "input.md"))
+    parser.add_argument("--scale", type=float, default=1.0, help="size of the figures relative to 2400x1500")
+    parser.add_argument("--font", default=None)
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        md_text = with_figures(f.read())
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        make_figures(tmp_dir, args.scale)
+        input_path = os.path.join(tmp_dir, "report.md")
+        output_path = os.path.join(tmp_dir, "report.pdf")
+        with open(input_path, 'w', encoding='utf-8') as f:
+            f.write(md_text)
+        report.IMAGE_CACHE_DIR = os.path.join(tmp_dir, "images")
+
+        # Warm up fonts and imports so the first timed render is not penalised
+        report.IMAGE_DPI = None
+        render(input_path, output_path, args.font)
+        rows.append(("original images", render(input_path, output_path, args.font)))
+        report.IMAGE_DPI = 150
+        rows.append(("empty cache", render(input_path, output_path, args.font)))
+        stats = dict(report._image_assets.stats)
+        # A new process: only the disk cache is warm
+        report._image_assets = None
+        rows.append(("disk cache", render(input_path, output_path, args.font)))
+        rows.append(("process cache", render(input_path, output_path, args.font)))
+
+        assets = []
+        for name in FIGURES + (report.COVER_LOGO_PATH, report.HEADER_LOGO_PATH):
+            path = os.path.join(tmp_dir, name)
+            prepared = [value for key, value in report._image_assets._prepared.items() if key[0] == path]
+            if prepared:
+                assets.append((os.path.basename(path), os.path.getsize(path), os.path.getsize(prepared[0])))
+
+    print(f"\nInput: {args.input} with {md_text.count('![')} figures, {report.IMAGE_DPI} dpi")
+    print(f"{'run':<18}{'seconds':>9}{'PDF MB':>9}")
+    for name, (elapsed, size) in rows:
+        print(f"{name:<18}{elapsed:>9.2f}{size / 1e6:>9.2f}")
+    print(f"Images prepared: {stats['prepared']}, reused in this process: {stats['reused']}")
+
+    print(f"\n{'asset':<18}{'original KB':>12}{'prepared KB':>13}")
+    for name, original, prepared in assets:
+        print(f"{name:<18}{original / 1e3:>12.1f}{prepared / 1e3:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
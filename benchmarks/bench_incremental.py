@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark incremental chapter rebuilds after editing one chapter of a report.
+
+A synthetic report (see bench_suite.py) is rendered in full, then
+incrementally with an empty chapter cache, again without changes, and
+after editing one chapter in the middle and one at the end. The output
+cache and the translation memory are off, so only chapter reuse saves
+work. For each run the time and the share of chapter parts and body
+pages reused are printed.
+
+Usage:
+    python benchmarks/bench_incremental.py [--paragraphs 1000] [--font FONT]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import generate_report_simple as report  # noqa: E402
+from bench_suite import synthetic_report  # noqa: E402
+from incremental_render import split_chapters  # noqa: E402
+from pipeline_profile import PipelineProfiler  # noqa: E402
+
+EDIT = "编辑补充：大中华区的竞争态势在本季度进一步加剧。"
+
+
+def render(md_text, output_path, font_path, cache_dir, incremental=True):
+    profiler = PipelineProfiler()
+    start = time.perf_counter()
+    with open(output_path, 'wb') as output:
+        report.write_pdf(md_text, output, font_path, translation_memory_path=None, output_cache_dir=None,
+                         incremental=incremental, chapter_cache_dir=cache_dir, profiler=profiler)
+    return time.perf_counter() - start, profiler.counts
+
+
+def edit_chapter(md_text, number):
+    """Append a sentence to chapter ``number``."""
+    chapters = split_chapters(md_text)
+    chapters[number] = chapters[number].rstrip('\n') + EDIT + '\n\n'
+    return ''.join(chapters)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--paragraphs", type=int, default=1000, help="body paragraphs of the synthetic report")
+    parser.add_argument("--font", default=None)
+    args = parser.parse_args()
+
+    md_text = synthetic_report(args.paragraphs)
+    chapters = len(split_chapters(md_text))
+    edited_middle = edit_chapter(md_text, chapters // 2)
+    edited_both = edit_chapter(edited_middle, chapters - 1)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_dir = os.path.join(tmp_dir, "chapters")
+        output_path = os.path.join(tmp_dir, "report.pdf")
+
+        # Warm up fonts and imports so the first timed render is not penalised
+        render(md_text, output_path, args.font, cache_dir, incremental=False)
+        rows.append(("full render", render(md_text, output_path, args.font, cache_dir, incremental=False)))
+        rows.append(("empty cache", render(md_text, output_path, args.font, cache_dir)))
+        rows.append(("unchanged", render(md_text, output_path, args.font, cache_dir)))
+        rows.append(("middle edited", render(edited_middle, output_path, args.font, cache_dir)))
+        rows.append(("last edited", render(edited_both, output_path, args.font, cache_dir)))
+
+    print(f"\nSynthetic report: {args.paragraphs} paragraphs, {chapters} chapters")
+    print(f"{'run':<15}{'seconds':>9}{'speed-up':>10}{'parts reused':>14}{'pages reused':>14}")
+    baseline = rows[0][1][0]
+    for name, (elapsed, counts) in rows:
+        line = f"{name:<15}{elapsed:>9.2f}{baseline / elapsed:>9.2f}x"
+        if 'reused_parts' in counts:
+            line += (f"{counts['reused_parts']:>8}/{counts['parts']:<5}"
+                     f"{counts['reused_body_pages']:>8}/{counts['body_pages']:<5}")
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
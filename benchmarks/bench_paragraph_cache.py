@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark the paragraph layout cache on a report with heavy repetition.
+
+The input is repeated ``--copies`` times, so most paragraphs occur many
+times. The report is rendered without the cache, with a cold cache, and
+once more with the warm cache, as the next report of a batch would be. Hit
+rates are printed, and the page contents are checked to be identical.
+
+Usage:
+    python benchmarks/bench_paragraph_cache.py [--input input.md] [--copies 20] [--font FONT]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pikepdf  # noqa: E402
+
+import generate_report_simple as report  # noqa: E402
+from paragraph_cache import CachedParagraph, ParagraphLayoutCache  # noqa: E402
+
+
+def render(md_path, output_path, font_path, cache):
+    CachedParagraph.cache = cache
+    start = time.perf_counter()
+    report.generate_pdf(md_path, output_path, font_path, translation_memory_path=None, output_cache_dir=None)
+    return time.perf_counter() - start
+
+
+def page_contents(path):
+    with pikepdf.open(path) as pdf:
+        return [page.obj.Contents.read_bytes() for page in pdf.pages]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", default=os.path.join(ROOT, "input.md"))
+    parser.add_argument("--copies", type=int, default=20, help="times the input is repeated")
+    parser.add_argument("--font", default=None)
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        md_text = "\n\n".join([f.read()] * args.copies)
+
+    cache = ParagraphLayoutCache()
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        md_path = os.path.join(tmp_dir, "input.md")
+        with open(md_path, 'w', encoding='utf-8') as f:
+            f.write(md_text)
+        paths = [os.path.join(tmp_dir, f"report-{i}.pdf") for i in range(3)]
+
+        # Warm up fonts and imports so the first timed render is not penalised
+        render(md_path, paths[0], args.font, None)
+        rows.append(("no cache", render(md_path, paths[0], args.font, None), None))
+        rows.append(("cold cache", render(md_path, paths[1], args.font, cache), cache.stats()))
+        rows.append(("warm cache", render(md_path, paths[2], args.font, cache), cache.stats()))
+        identical = page_contents(paths[0]) == page_contents(paths[1]) == page_contents(paths[2])
+
+    print(f"\nInput: {args.input} x {args.copies}")
+    print(f"{'cache':<12}{'seconds':>9}{'speed-up':>10}{'wrap hits':>11}{'parse hits':>12}{'entries':>9}")
+    baseline = rows[0][1]
+    for name, elapsed, stats in rows:
+        line = f"{name:<12}{elapsed:>9.2f}{baseline / elapsed:>9.2f}x"
+        if stats:
+            line += f"{stats['hit_rate']:>11.1%}{stats['parse_hit_rate']:>12.1%}{stats['entries']:>9}"
+        print(line)
+    print(f"Page contents identical: {identical}")
+
+
+if __name__ == "__main__":
+    main()
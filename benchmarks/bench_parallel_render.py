@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark parallel section rendering at 1/2/4/8 workers against a single-process render.
+
+Usage:
+    python benchmarks/bench_parallel_render.py [--input input.md] [--copies 20] [--font FONT]
+                                               [--workers 1 2 4 8] [--no-split-chapters]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pikepdf  # noqa: E402
+
+import generate_report_simple as report  # noqa: E402
+
+
+def render(md_path, output_path, font_path, workers, split_chapters):
+    start = time.perf_counter()
+    report.generate_pdf(md_path, output_path, font_path, translation_memory_path=None, output_cache_dir=None,
+                        workers=workers, split_chapters=split_chapters)
+    elapsed = time.perf_counter() - start
+    with pikepdf.open(output_path) as pdf:
+        pages = len(pdf.pages)
+    return elapsed, pages, os.path.getsize(output_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", default=os.path.join(ROOT, "input.md"))
+    parser.add_argument("--copies", type=int, default=20, help="times the input is repeated")
+    parser.add_argument("--font", default=None)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--no-split-chapters", dest="split_chapters", action="store_false")
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        md_text = "\n\n".join([f.read()] * args.copies)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        md_path = os.path.join(tmp_dir, "input.md")
+        with open(md_path, 'w', encoding='utf-8') as f:
+            f.write(md_text)
+        output_path = os.path.join(tmp_dir, "report.pdf")
+
+        rows = [("single process",) + render(md_path, output_path, args.font, None, False)]
+        for workers in args.workers:
+            rows.append((f"{workers} workers",) + render(md_path, output_path, args.font, workers,
+                                                         args.split_chapters))
+
+    print(f"\nInput: {args.input} x {args.copies}, {os.cpu_count()} CPUs, "
+          f"split chapters: {args.split_chapters}")
+    print(f"{'layout':<18}{'seconds':>10}{'speed-up':>10}{'pages':>8}{'KB':>8}")
+    baseline = rows[0][1]
+    for name, elapsed, pages, size in rows:
+        print(f"{name:<18}{elapsed:>10.2f}{baseline / elapsed:>9.2f}x{pages:>8}{size // 1024:>8}")
+
+
+if __name__ == "__main__":
+    main()
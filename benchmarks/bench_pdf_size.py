@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark the PDF size and render time of ``--optimize`` for each layout.
+
+The input is rendered in a single layout, split into chapters across
+worker processes, incrementally and streamed, each with and without
+``--optimize``, from a cold output cache. The time and PDF size of every
+render are printed, followed by how the bytes of the last pair of PDFs
+divide between fonts, images, page content and the rest.
+
+Usage:
+    python benchmarks/bench_pdf_size.py [--input input.md] [--repeat 1] [--font FONT]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, "generate_report_simple.py")
+
+LAYOUTS = (
+    ("single", []),
+    ("split, 2 workers", ["--split-chapters", "--workers", "2"]),
+    ("incremental", ["--incremental"]),
+    ("stream", ["--stream"]),
+)
+
+
+def render(command, output_path):
+    start = time.perf_counter()
+    subprocess.run(command, check=True, stdout=subprocess.DEVNULL, cwd=ROOT)
+    return time.perf_counter() - start, os.path.getsize(output_path)
+
+
+def stream_bytes(pdf_path):
+    """Return the stored bytes of the PDF's streams by kind."""
+    import pikepdf
+
+    kinds = {}
+    with pikepdf.open(pdf_path) as pdf:
+        for obj in pdf.objects:
+            if not isinstance(obj, pikepdf.Stream):
+                continue
+            if obj.get('/Subtype') == '/Image':
+                kind = "images"
+            elif obj.get('/Subtype') == '/Form':
+                kind = "forms"
+            elif '/Length1' in obj:
+                kind = "fonts"
+            elif obj.get('/Type') in ('/ObjStm', '/XRef'):
+                kind = "object streams"
+            else:
+                kind = "page content"
+            kinds[kind] = kinds.get(kind, 0) + len(obj.read_raw_bytes())
+    return kinds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", default=os.path.join(ROOT, "input.md"))
+    parser.add_argument("--repeat", type=int, default=1, help="renders per row; the fastest is reported")
+    parser.add_argument("--font", default=None)
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = {}
+        for name, flags in LAYOUTS:
+            for optimize in (False, True):
+                output_path = os.path.join(tmp_dir, f"report-{optimize}.pdf")
+                command = [sys.executable, SCRIPT] + ([args.font] if args.font else [])
+                command += ["--input", args.input, "--output", output_path, "--force"] + flags
+                if optimize:
+                    command.append("--optimize")
+                runs = [render(command, output_path) for _ in range(args.repeat)]
+                rows.append((name, optimize, min(runs)))
+                paths[optimize] = output_path
+        breakdown = {optimize: stream_bytes(path) for optimize, path in paths.items()}
+
+    print(f"\nInput: {args.input}")
+    print(f"{'layout':<18}{'optimize':>9}{'seconds':>9}{'PDF KB':>9}{'saved':>8}")
+    for number, (name, optimize, (elapsed, size)) in enumerate(rows):
+        saved = f"{1 - size / rows[number - 1][2][1]:.0%}" if optimize else ""
+        print(f"{name:<18}{'yes' if optimize else 'no':>9}{elapsed:>9.2f}{size / 1e3:>9.1f}{saved:>8}")
+
+    print(f"\nStreams of the {rows[-1][0]} layout, KB")
+    print(f"{'kind':<18}{'default':>9}{'optimized':>11}")
+    for kind in sorted(set(breakdown[False]) | set(breakdown[True])):
+        print(f"{kind:<18}{breakdown[False].get(kind, 0) / 1e3:>9.1f}{breakdown[True].get(kind, 0) / 1e3:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
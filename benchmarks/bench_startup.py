@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark start-up cost: import time of the generator modules and the time to print --help.
+
+Import times come from ``python -X importtime``, run in a fresh interpreter
+for every measurement; the best of ``--repeat`` runs is reported, together
+with the direct imports that took longest. ``--root`` points the
+benchmark at another checkout, e.g. one extracted with
+``git archive <commit> | tar -x -C /tmp/old``, to compare against it.
+
+Usage:
+    python benchmarks/bench_startup.py [--root PATH] [--repeat 5] [--top 8]
+                                       [--modules generate_report_simple generate_report batch_render]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(root, module):
+    """Import ``module`` in a fresh interpreter.
+
+    Returns its cumulative import time in microseconds and the cumulative
+    times of the modules it imports directly, as (microseconds, name) pairs.
+    """
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=root,
+                             capture_output=True, text=True)
+    if process.returncode != 0:
+        raise RuntimeError(process.stderr.strip().splitlines()[-1])
+    entries = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        # Nesting is shown by two spaces of indentation per level; children come before their parent
+        entries.append((len(name) - len(name.lstrip()), name.strip(), int(cumulative_us)))
+
+    index = max(i for i, (_, name, _) in enumerate(entries) if name == module)
+    depth, _, total = entries[index]
+    children = []
+    for child_depth, name, cumulative in reversed(entries[:index]):
+        if child_depth <= depth:
+            break
+        if child_depth == depth + 2:
+            children.append((cumulative, name))
+    return total, sorted(children, reverse=True)
+
+
+def help_seconds(root, script):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, script, "--help"], cwd=root, capture_output=True, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--root", default=ROOT, help="checkout to measure")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="slowest imports to list per module")
+    parser.add_argument("--modules", nargs="+", default=["generate_report_simple", "generate_report", "batch_render"])
+    args = parser.parse_args()
+    root = os.path.abspath(args.root)
+    print(f"Checkout: {root}, best of {args.repeat} runs")
+
+    for module in args.modules:
+        try:
+            total, children = min(import_times(root, module) for _ in range(args.repeat))
+        except RuntimeError as e:
+            print(f"\nimport {module}: failed ({e})")
+            continue
+        print(f"\nimport {module}: {total / 1000:.1f} ms")
+        for cumulative, name in children[:args.top]:
+            print(f"    {cumulative / 1000:>8.1f} ms  {name}")
+
+    script = os.path.join(root, "generate_report_simple.py")
+    seconds = min(help_seconds(root, script) for _ in range(args.repeat))
+    print(f"\npython generate_report_simple.py --help: {seconds * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
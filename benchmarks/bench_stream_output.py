@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark writing reports to streams against writing a file and reading it back.
+
+A service that keeps inputs in memory and uploads outputs used to write the
+markdown to a temporary file, render to a temporary PDF and read it back.
+This compares that round trip with write_pdf into a BytesIO, and with
+chunked writes into a sink that only counts bytes, as a socket or pipe
+would take them. Peak memory is traced with tracemalloc, so the timings
+are slower than an untraced run.
+
+Usage:
+    python benchmarks/bench_stream_output.py [--input input.md] [--copies 20] [--chunk-size 65536] [--font FONT]
+"""
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import generate_report_simple as report  # noqa: E402
+
+OPTIONS = {'translation_memory_path': None, 'output_cache_dir': None}
+
+
+class CountingSink(io.RawIOBase):
+    """Binary stream that drops what is written, like a socket the PDF is sent over."""
+
+    def __init__(self):
+        self.bytes = 0
+        self.writes = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.bytes += len(data)
+        self.writes += 1
+        return len(data)
+
+
+def via_temp_files(md_text, font_path, chunk_size):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_path = os.path.join(tmp_dir, "input.md")
+        output_path = os.path.join(tmp_dir, "report.pdf")
+        with open(input_path, 'w', encoding='utf-8') as f:
+            f.write(md_text)
+        report.generate_pdf(input_path, output_path, font_path, **OPTIONS)
+        with open(output_path, 'rb') as f:
+            return len(f.read())
+
+
+def via_bytes_io(md_text, font_path, chunk_size):
+    output = io.BytesIO()
+    report.write_pdf(md_text, output, font_path, **OPTIONS)
+    return len(output.getvalue())
+
+
+def via_chunked_sink(md_text, font_path, chunk_size):
+    sink = CountingSink()
+    report.write_pdf(io.StringIO(md_text), sink, font_path, chunk_size=chunk_size, **OPTIONS)
+    return sink.bytes
+
+
+def measure(method, md_text, font_path, chunk_size):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = method(md_text, font_path, chunk_size)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", default=os.path.join(ROOT, "input.md"))
+    parser.add_argument("--copies", type=int, default=20, help="times the input is repeated")
+    parser.add_argument("--chunk-size", type=int, default=64 * 1024, help="bytes per write in chunked mode")
+    parser.add_argument("--font", default=None)
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        md_text = "\n\n".join([f.read()] * args.copies)
+
+    # Warm up fonts, imports and the paragraph cache so every method starts alike
+    via_bytes_io(md_text, args.font, args.chunk_size)
+
+    rows = []
+    for name, method in (("temp files", via_temp_files), ("BytesIO", via_bytes_io),
+                         ("chunked sink", via_chunked_sink)):
+        rows.append((name,) + measure(method, md_text, args.font, args.chunk_size))
+
+    print(f"\nInput: {args.input} x {args.copies}, chunks of {args.chunk_size} bytes")
+    print(f"{'output':<14}{'seconds':>9}{'peak MB':>9}{'PDF MB':>8}")
+    for name, elapsed, peak, size in rows:
+        print(f"{name:<14}{elapsed:>9.2f}{peak / 1e6:>9.1f}{size / 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark peak memory of streaming renders against whole-document renders as the input grows.
+
+Every render runs in a fresh process, which reports its own peak resident
+set size, so the numbers are not skewed by earlier renders. The merged PDF
+of each streaming render is checked with qpdf, since it is written by
+pdf_join.py rather than by ReportLab.
+
+Usage:
+    python benchmarks/bench_streaming.py [--input input.md] [--copies 10 40 160] [--font FONT]
+                                         [--chunk-kb 256]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def child(md_path, output_path, font_path, stream, chunk_kb):
+    """Render once in this process and print the elapsed time and peak RSS as JSON."""
+    import generate_report_simple as report
+    import pdf_join
+    import streaming_render
+
+    streaming_render.DEFAULT_CHUNK_SIZE = chunk_kb * 1024
+    start = time.perf_counter()
+    report.generate_pdf(md_path, output_path, font_path, translation_memory_path=None, output_cache_dir=None,
+                        stream=stream)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / 1e6 if sys.platform == 'darwin' else peak / 1e3
+    problems = pdf_join.check_pdf(output_path) if stream else []
+    print(json.dumps({'seconds': elapsed, 'peak_mb': peak_mb, 'problems': problems}))
+
+
+def render(md_path, output_path, font_path, stream, chunk_kb):
+    command = [sys.executable, os.path.abspath(__file__), "--child", md_path, output_path,
+               "--chunk-kb", str(chunk_kb)]
+    if font_path:
+        command += ["--font", font_path]
+    if stream:
+        command.append("--stream")
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", default=os.path.join(ROOT, "input.md"))
+    parser.add_argument("--copies", type=int, nargs="+", default=[10, 40, 160],
+                        help="times the input is repeated, one render per value")
+    parser.add_argument("--font", default=None)
+    parser.add_argument("--chunk-kb", type=int, default=256, help="streaming chunk size in KB")
+    parser.add_argument("--child", nargs=2, metavar=("MD", "PDF"), help=argparse.SUPPRESS)
+    parser.add_argument("--stream", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], args.child[1], args.font, args.stream, args.chunk_kb)
+        return
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        sample = f.read()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        md_path = os.path.join(tmp_dir, "input.md")
+        output_path = os.path.join(tmp_dir, "report.pdf")
+        for copies in args.copies:
+            with open(md_path, 'w', encoding='utf-8') as f:
+                f.write("\n\n".join([sample] * copies))
+            megabytes = os.path.getsize(md_path) / 1e6
+            whole = render(md_path, output_path, args.font, False, args.chunk_kb)
+            streamed = render(md_path, output_path, args.font, True, args.chunk_kb)
+            rows.append((copies, megabytes, whole, streamed))
+
+    print(f"\nInput: {args.input}, chunk size {args.chunk_kb} KB")
+    print(f"{'copies':>8}{'MB':>8}{'whole s':>10}{'whole RSS':>11}{'stream s':>10}{'stream RSS':>12}  qpdf check")
+    for copies, megabytes, whole, streamed in rows:
+        print(f"{copies:>8}{megabytes:>8.2f}{whole['seconds']:>10.2f}{whole['peak_mb']:>9.0f}MB"
+              f"{streamed['seconds']:>10.2f}{streamed['peak_mb']:>10.0f}MB  {'; '.join(streamed['problems']) or 'ok'}")
+    if any(streamed['problems'] for _, _, _, streamed in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Benchmark both report generators on synthetic bilingual reports of increasing size.
+
+The synthetic reports are Chinese financial markdown shaped like input.md:
+chapter and section headings, paragraphs with bold figures, bullet lists and
+tables of figures, built from the glossary's vocabulary. They are generated
+from a fixed seed, so every run renders the same documents. Each render runs
+in a fresh process so that its peak RSS covers that render only.
+
+Results are written as JSON together with the git commit, the Python and
+ReportLab versions and the machine, so runs can be compared across commits:
+
+    python benchmarks/bench_suite.py                      # writes benchmarks/results/<commit>.json
+    python benchmarks/bench_suite.py --compare benchmarks/results/<older>.json
+
+With ``--compare``, any throughput that dropped, or peak memory that grew, by
+more than ``--threshold`` is reported as a regression and the exit status is 1.
+
+Usage:
+    python benchmarks/bench_suite.py [--sizes 10 100 1000 10000] [--font FONT] [--repeat 1]
+                                     [--generators simple legacy] [--output PATH]
+                                     [--compare PATH] [--threshold 0.1]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import document_ir  # noqa: E402
+from generate_report_simple import translations  # noqa: E402
+from output_cache import hash_text  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+SEED = 20250130
+
+# Filler that joins glossary terms into sentences
+CONNECTORS = ["，", "，其中", "，并且", "；与此同时，", "，主要得益于", "，显示出"]
+SEGMENTS = ["大中华区", "iPhone", "Mac", "iPad", "服务收入", "毛利率", "营业利润", "每股收益", "资本支出"]
+
+
+def _figure(rng):
+    """Return a bold figure such as **1243亿美元** or **+14%**."""
+    kind = rng.randrange(3)
+    if kind == 0:
+        return f"**{rng.randint(10, 1500)}亿美元**"
+    if kind == 1:
+        return f"**{rng.choice('+-')}{rng.randint(1, 40)}%**"
+    return f"**{rng.randint(1, 9)}.{rng.randint(0, 99):02d}美元**"
+
+
+def _sentence(rng, terms):
+    words = [rng.choice(terms)]
+    for _ in range(rng.randint(3, 7)):
+        figure = rng.random() < 0.3
+        # Figures are always set off, so that bold markers never touch
+        words.append(rng.choice(CONNECTORS) if figure or rng.random() < 0.3 else "")
+        words.append(_figure(rng) if figure else rng.choice(terms))
+    return ''.join(words) + "。"
+
+
+def _table(rng):
+    lines = ["| **指标** | **本季度** | **上年同期** | **同比** |", "|:---|:---:|:---:|:---:|"]
+    for segment in rng.sample(SEGMENTS, rng.randint(3, len(SEGMENTS))):
+        current, previous = rng.randint(50, 1500), rng.randint(50, 1500)
+        change = round((current - previous) * 100 / previous)
+        lines.append(f"| **{segment}** | \\${current} 亿 | \\${previous} 亿 | {change:+d}% |")
+    return '\n'.join(lines)
+
+
+def synthetic_report(paragraphs, seed=SEED):
+    """Return a markdown report with ``paragraphs`` body paragraphs, lists and tables."""
+    rng = random.Random(seed)
+    terms = list(translations)
+    blocks = ["# 苹果公司2025财年第一季度财报研究报告", "**面向投资者的财务分析与市场解读**", "---"]
+    for index in range(paragraphs):
+        if index % 20 == 0:
+            blocks.append(f"## {index // 20 + 1}. {rng.choice(terms)}与{rng.choice(terms)}")
+        elif index % 5 == 0:
+            blocks.append(f"### {rng.choice(terms)}")
+        blocks.append(''.join(_sentence(rng, terms) for _ in range(rng.randint(2, 4))))
+        if index % 7 == 3:
+            items = []
+            for _ in range(rng.randint(3, 5)):
+                items.append(f"- **{rng.choice(SEGMENTS)}**：{_sentence(rng, terms)}")
+                if rng.random() < 0.3:
+                    items.append(f"  - {_sentence(rng, terms)}")
+            blocks.append('\n'.join(items))
+        if index % 25 == 12:
+            blocks.append(_table(rng))
+            blocks.append("*数据来源：公司财报。*")
+    return '\n\n'.join(blocks) + '\n'
+
+
+def count_segments(md_text):
+    """Return the number of translatable segments of a markdown document."""
+    return sum(1 for _ in document_ir.iter_segments(document_ir.parse_markdown(md_text)))
+
+
+def child(generator, md_path, output_path, font_path):
+    """Render once with ``generator`` and print the elapsed time and peak RSS as JSON."""
+    start = time.perf_counter()
+    if generator == 'simple':
+        import generate_report_simple
+        generate_report_simple.generate_pdf(md_path, output_path, font_path, translation_memory_path=None,
+                                            output_cache_dir=None)
+    else:
+        import generate_report
+        generate_report.generate_pdf(md_path, output_path, font_path)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'seconds': elapsed, 'peak_rss_mb': peak / 1e6 if sys.platform == 'darwin' else peak / 1e3}))
+
+
+def render(generator, md_path, output_path, font_path):
+    """Run one render in a fresh process; returns its measurements or the reason it failed."""
+    command = [sys.executable, os.path.abspath(__file__), "--child", generator, md_path, output_path]
+    if font_path:
+        command += ["--font", font_path]
+    process = subprocess.run(command, capture_output=True, text=True)
+    if process.returncode != 0:
+        # Report the exception line; messages may continue on further lines
+        errors = [line for line in process.stderr.splitlines() if re.match(r'[\w.]+(Error|Exception): ', line)]
+        return {'error': errors[-1] if errors else f"exit status {process.returncode}"}
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+
+    import pikepdf
+    with pikepdf.open(output_path) as pdf:
+        result['pages'] = len(pdf.pages)
+    result['output_bytes'] = os.path.getsize(output_path)
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def environment():
+    import reportlab
+    return {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'reportlab': reportlab.Version,
+        'machine': f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs",
+    }
+
+
+def run_suite(sizes, generators, font_path, repeat=1):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for paragraphs in sizes:
+            md_text = synthetic_report(paragraphs)
+            md_path = os.path.join(tmp_dir, f"synthetic-{paragraphs}.md")
+            with open(md_path, 'w', encoding='utf-8') as f:
+                f.write(md_text)
+            segments = count_segments(md_text)
+
+            for generator in generators:
+                output_path = os.path.join(tmp_dir, f"{generator}-{paragraphs}.pdf")
+                result = {'generator': generator, 'paragraphs': paragraphs, 'segments': segments,
+                          'input_bytes': len(md_text.encode('utf-8')), 'input_hash': hash_text(md_text)}
+                # Keep the fastest run; peak memory hardly varies between runs
+                runs = [render(generator, md_path, output_path, font_path) for _ in range(repeat)]
+                result.update(min(runs, key=lambda run: run.get('seconds', 0)))
+                if 'error' not in result:
+                    result['pages_per_second'] = result['pages'] / result['seconds']
+                    result['segments_per_second'] = segments / result['seconds']
+                results.append(result)
+                print_row(result)
+    return results
+
+
+def print_header():
+    print(f"{'generator':<10}{'paragraphs':>11}{'seconds':>10}{'pages':>8}{'pages/s':>9}"
+          f"{'segments/s':>12}{'peak MB':>9}")
+
+
+def print_row(result):
+    if 'error' in result:
+        print(f"{result['generator']:<10}{result['paragraphs']:>11}  skipped: {result['error']}")
+        return
+    print(f"{result['generator']:<10}{result['paragraphs']:>11}{result['seconds']:>10.2f}{result['pages']:>8}"
+          f"{result['pages_per_second']:>9.1f}{result['segments_per_second']:>12.0f}{result['peak_rss_mb']:>9.0f}")
+
+
+def compare(results, baseline, threshold):
+    """Print the change of each metric against ``baseline``; returns the regressions."""
+    previous = {(r['generator'], r['paragraphs']): r for r in baseline['results'] if 'error' not in r}
+    regressions = []
+    print(f"\nCompared with {baseline['environment']['commit']} ({baseline['environment']['timestamp']}):")
+    for result in results:
+        old = previous.get((result['generator'], result['paragraphs']))
+        if old is None or 'error' in result:
+            continue
+        if old['input_hash'] != result['input_hash']:
+            print(f"  {result['generator']:<8}{result['paragraphs']:>7}: synthetic input changed, not compared")
+            continue
+        changes = []
+        # Higher is better for throughput, lower is better for memory
+        for metric, higher_is_better in (('pages_per_second', True), ('segments_per_second', True),
+                                         ('peak_rss_mb', False)):
+            change = result[metric] / old[metric] - 1
+            worse = -change if higher_is_better else change
+            flag = ''
+            if worse > threshold:
+                flag = ' REGRESSION'
+                regressions.append((result['generator'], result['paragraphs'], metric, change))
+            changes.append(f"{metric} {change:+.1%}{flag}")
+        print(f"  {result['generator']:<8}{result['paragraphs']:>7}: " + ', '.join(changes))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000],
+                        help="numbers of paragraphs of the synthetic reports")
+    parser.add_argument("--generators", nargs="+", choices=['simple', 'legacy'], default=['simple', 'legacy'],
+                        help="simple is generate_report_simple.py, legacy is generate_report.py")
+    parser.add_argument("--font", default=None)
+    parser.add_argument("--repeat", type=int, default=1, help="renders per size and generator; the fastest counts")
+    parser.add_argument("--output", default=None, help="results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", default=None, help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change counted as a regression")
+    parser.add_argument("--write-markdown", metavar="PARAGRAPHS", type=int,
+                        help="print the synthetic report of this size and exit")
+    parser.add_argument("--child", nargs=3, metavar=("GENERATOR", "MD", "PDF"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child, args.font)
+        return
+    if args.write_markdown:
+        sys.stdout.write(synthetic_report(args.write_markdown))
+        return
+
+    env = environment()
+    print(f"Commit {env['commit']}, Python {env['python']}, ReportLab {env['reportlab']}, {env['machine']}")
+    print_header()
+    results = run_suite(args.sizes, args.generators, args.font, args.repeat)
+
+    output_path = args.output or os.path.join(RESULTS_DIR, f"{env['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({'environment': env, 'results': results}, f, indent=2)
+        f.write('\n')
+    print(f"Results written to {output_path}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
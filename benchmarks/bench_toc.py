@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass forward-reference TOC against a plain multiBuild TOC.
+
+Both variants lay out the same story: a TOC page followed by the English and
+Chinese sections built from the document IR. The plain variant is the usual
+ReportLab recipe, a TableOfContents fed from afterFlowable; it needs extra
+passes until its page numbers stop changing.
+
+Usage:
+    python benchmarks/bench_toc.py [--input input.md] [--copies 20] [--font FONT]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from reportlab.lib.pagesizes import A4  # noqa: E402
+from reportlab.lib.units import inch  # noqa: E402
+from reportlab.platypus import PageBreak, SimpleDocTemplate  # noqa: E402
+from reportlab.platypus.tableofcontents import TableOfContents  # noqa: E402
+
+import document_ir  # noqa: E402
+import generate_report_simple as report  # noqa: E402
+from report_toc import ForwardTableOfContents, ReportDocTemplate  # noqa: E402
+
+
+class PlainDocTemplate(SimpleDocTemplate):
+    def afterFlowable(self, flowable):
+        entry = getattr(flowable, 'toc_entry', None)
+        if entry is not None:
+            level, text, key = entry
+            self.notify('TOCEntry', (level, text, self.page, key))
+
+
+def build_story(blocks, translated, styles, toc, seed):
+    english_content, chinese_content = [], []
+    for block in blocks:
+        report.append_block_flowables(block, translated, styles, english_content, chinese_content,
+                                      toc if seed else None)
+    return [toc, PageBreak()] + english_content + [PageBreak()] + chinese_content
+
+
+def run(doc_class, toc, blocks, translated, styles, seed, output_path):
+    toc.levelStyles = [styles['TOCEntry1'], styles['TOCEntry2']]
+    story = build_story(blocks, translated, styles, toc, seed)
+    doc = doc_class(output_path, pagesize=A4, leftMargin=1*inch, rightMargin=1*inch,
+                    topMargin=1*inch, bottomMargin=1*inch)
+    start = time.perf_counter()
+    passes = doc.multiBuild(story)
+    return passes, time.perf_counter() - start, doc.page
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", default=os.path.join(ROOT, "input.md"))
+    parser.add_argument("--copies", type=int, default=20, help="times the input is repeated")
+    parser.add_argument("--font", default=None)
+    args = parser.parse_args()
+
+    report.register_font(args.font)
+    styles = report.create_styles()
+    with open(args.input, 'r', encoding='utf-8') as f:
+        md_text = "\n\n".join([f.read()] * args.copies)
+    blocks = document_ir.parse_markdown(md_text)
+    translator = report.get_translator()
+    translated = {text: translator(text)
+                  for text in (report.clean_html(t) for t in document_ir.iter_segments(blocks))}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_path = os.path.join(tmp_dir, "toc.pdf")
+        plain = run(PlainDocTemplate, TableOfContents(), blocks, translated, styles, False, output_path)
+        forward = run(ReportDocTemplate, ForwardTableOfContents(), blocks, translated, styles, True, output_path)
+
+    print(f"Input: {args.input} x {args.copies}")
+    print(f"{'TOC':<24}{'passes':>8}{'seconds':>10}{'pages':>8}")
+    print(f"{'multiBuild':<24}{plain[0]:>8}{plain[1]:>10.2f}{plain[2]:>8}")
+    print(f"{'forward references':<24}{forward[0]:>8}{forward[1]:>10.2f}{forward[2]:>8}")
+    print(f"Speed-up: {plain[1] / forward[1]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark the compiled glossary translator against the old str.replace loop.
+
+Synthetic glossaries of 10k and 100k finance-like terms are generated around
+the real dictionary from generate_report_simple.py, and every paragraph of
+input.md is translated with both implementations.
+
+Usage:
+    python benchmarks/bench_translation.py [--sizes 10000 100000] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from translation import GlossaryTranslator  # noqa: E402
+
+# Base glossary copied from generate_report_simple.py so the benchmark does not
+# need reportlab installed
+BASE_TERMS = {
+    "苹果": "Apple", "财年": "Fiscal Year", "第一季度": "First Quarter",
+    "公司": "Company", "美元": "USD", "同比增长": "Year-over-Year Growth",
+    "美洲": "Americas", "欧洲": "Europe", "日本": "Japan", "亚太地区": "Asia Pacific",
+    "历史新高": "All-Time High", "新兴市场": "Emerging Markets", "毛利率": "Gross Margin",
+    "净收入": "Net Income", "服务业务": "Services Business", "向股东返还": "Returned to Shareholders",
+}
+
+# Characters frequently found in Chinese financial text; synthetic terms are
+# drawn from these so that many of them share prefixes with real text
+CJK_POOL = "营收利润同比增长季度财年市场服务业务毛利率净收入每股收益资本支出现金流美元亿中国欧洲日本地区产品销售研发费用管理股东回购分红风险展望指引汇率供应链需求"
+
+
+def load_segments():
+    """Split input.md into the paragraph/list-item sized segments the generators translate."""
+    with open(os.path.join(ROOT, "input.md"), encoding="utf-8") as f:
+        text = f.read()
+    segments = [line.strip(" -*#|") for line in text.splitlines()]
+    return [re.sub(r"\*\*", "", s) for s in segments if s]
+
+
+def make_glossary(size, seed=0):
+    """Return a glossary with ``size`` entries: the real terms plus random CJK phrases."""
+    rng = random.Random(seed)
+    glossary = dict(BASE_TERMS)
+    while len(glossary) < size:
+        term = "".join(rng.choice(CJK_POOL) for _ in range(rng.randint(2, 8)))
+        glossary.setdefault(term, f"term{len(glossary)}")
+    return glossary
+
+
+def replace_loop(glossary, text):
+    """The translation loop used before the compiled translator."""
+    for cn, en in glossary.items():
+        text = text.replace(cn, en)
+    return text
+
+
+def best_of(repeat, func):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    segments = load_segments()
+    chars = sum(len(s) for s in segments)
+    print(f"{len(segments)} segments, {chars} characters per document\n")
+    print(f"{'entries':>8}  {'compile':>9}  {'replace loop':>12}  {'trie scan':>9}  {'speed-up':>8}")
+
+    for size in args.sizes:
+        glossary = make_glossary(size)
+
+        start = time.perf_counter()
+        translator = GlossaryTranslator(glossary)
+        compile_time = time.perf_counter() - start
+
+        loop_time = best_of(args.repeat, lambda: [replace_loop(glossary, s) for s in segments])
+        scan_time = best_of(args.repeat, lambda: [translator.translate(s) for s in segments])
+
+        print(f"{size:>8}  {compile_time * 1000:>7.1f}ms  {loop_time * 1000:>10.1f}ms  "
+              f"{scan_time * 1000:>7.2f}ms  {loop_time / scan_time:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark batched, concurrent translation against one request per segment.
+
+Uses the in-process FakeMTBackend and the local MockTranslationServer so no
+network service is needed. The document is input.md repeated ``--copies``
+times, which also exercises deduplication of identical segments.
+
+Usage:
+    python benchmarks/bench_translation_backend.py [--copies 20] [--latency 0.02]
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from translation_backend import (  # noqa: E402
+    BatchTranslator, FakeMTBackend, HTTPBackend, MockTranslationServer,
+)
+
+
+def load_segments(copies):
+    with open(os.path.join(ROOT, "input.md"), encoding="utf-8") as f:
+        lines = [re.sub(r"\*\*", "", line.strip(" -*#|")) for line in f]
+    segments = [line for line in lines if line]
+    # Give each copy a few unique segments so not everything deduplicates away
+    document = []
+    for copy in range(copies):
+        document.extend(segments)
+        document.extend(f"第{copy}章 补充说明 {i}" for i in range(10))
+    return document
+
+
+async def one_request_per_segment(backend, segments):
+    for segment in segments:
+        await backend.translate_batch([segment])
+
+
+def run(label, segments, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<42} {elapsed:>8.2f}s  {len(segments) / elapsed:>9.0f} segments/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--copies", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated per-call latency (s)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--sequential-sample", type=int, default=200,
+                        help="segments timed for the one-request-per-segment baseline")
+    args = parser.parse_args()
+
+    segments = load_segments(args.copies)
+    print(f"{len(segments)} segments, {len(set(segments))} unique\n")
+
+    sample = segments[:args.sequential_sample]
+    backend = FakeMTBackend(latency=args.latency)
+    run(f"fake, sequential ({len(sample)} segment sample)", sample,
+        lambda: asyncio.run(one_request_per_segment(backend, sample)))
+
+    backend = FakeMTBackend(latency=args.latency, max_batch_size=args.batch_size)
+    translator = BatchTranslator(backend, max_concurrency=args.concurrency)
+    run("fake, batched + concurrent", segments, lambda: translator.translate(segments))
+    print(f"    {translator.stats}")
+
+    backend = FakeMTBackend(latency=args.latency, max_batch_size=args.batch_size,
+                            failure_rate=0.2, seed=1)
+    translator = BatchTranslator(backend, max_concurrency=args.concurrency, backoff=0.01, retries=6)
+    run("fake, batched + concurrent, 20% failures", segments, lambda: translator.translate(segments))
+    print(f"    {translator.stats}")
+
+    with MockTranslationServer(latency=args.latency) as server:
+        translator = BatchTranslator(HTTPBackend(server.url, max_batch_size=args.batch_size),
+                                     max_concurrency=args.concurrency)
+        run("mock HTTP server, batched + concurrent", segments, lambda: translator.translate(segments))
+        print(f"    {translator.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark the time from saving the markdown to an updated PDF in watch mode.
+
+A copy of the input is watched by ``generate_report_simple.py --watch`` in
+a child process, as an author would run it. After the first render, a
+sentence is appended to one paragraph per edit and the time until the
+watcher reports the new PDF is measured. That includes the polling
+interval and the debounce as well as the render. A cold run of the CLI on the same input is
+timed for comparison.
+
+Usage:
+    python benchmarks/bench_watch.py [--input input.md] [--edits 5] [--incremental] [--font FONT]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, "generate_report_simple.py")
+
+EDIT = "编辑补充：管理层在第{number}次修订中再次上调了收入指引。"
+
+
+def wait_for_render(watcher):
+    """Read the watcher's output up to its next render report; returns the render time it printed."""
+    for line in watcher.stdout:
+        if line.startswith("Rendered in "):
+            return float(line.split()[2].rstrip('s'))
+        if line.startswith("Render failed"):
+            raise RuntimeError(line.strip())
+    raise RuntimeError("the watcher exited")
+
+
+def edit_paragraph(md_text, number):
+    """Append a sentence to the last long text line of ``md_text``."""
+    lines = md_text.split('\n')
+    index = max(i for i, line in enumerate(lines)
+                if len(line) > 80 and not line.lstrip().startswith(('#', '|', '`')))
+    lines[index] += EDIT.format(number=number)
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", default=os.path.join(ROOT, "input.md"))
+    parser.add_argument("--edits", type=int, default=5)
+    parser.add_argument("--incremental", action="store_true", help="watch with --incremental")
+    parser.add_argument("--font", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_path = os.path.join(tmp_dir, "input.md")
+        output_path = os.path.join(tmp_dir, "report.pdf")
+        shutil.copyfile(args.input, input_path)
+        command = [sys.executable, SCRIPT] + ([args.font] if args.font else [])
+        command += ["--input", input_path, "--output", output_path, "--force"]
+        if args.incremental:
+            command.append("--incremental")
+
+        # A cold render, as running the CLI once per change would cost
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, cwd=ROOT)
+        cold = time.perf_counter() - start
+
+        watcher = subprocess.Popen(command + ["--watch"], stdout=subprocess.PIPE, text=True, cwd=ROOT,
+                                   env={**os.environ, "PYTHONUNBUFFERED": "1"})
+        try:
+            wait_for_render(watcher)
+            with open(input_path, 'r', encoding='utf-8') as f:
+                md_text = f.read()
+
+            rows = []
+            for number in range(args.edits):
+                md_text = edit_paragraph(md_text, number)
+                start = time.perf_counter()
+                with open(input_path, 'w', encoding='utf-8') as f:
+                    f.write(md_text)
+                render = wait_for_render(watcher)
+                rows.append((time.perf_counter() - start, render))
+        finally:
+            watcher.terminate()
+            watcher.wait()
+
+    print(f"\nInput: {args.input}{' (incremental)' if args.incremental else ''}")
+    print(f"{'run':<18}{'turnaround':>12}{'render':>9}")
+    print(f"{'cold CLI run':<18}{cold:>12.2f}")
+    for number, (turnaround, render) in enumerate(rows, 1):
+        print(f"{f'watch edit {number}':<18}{turnaround:>12.2f}{render:>9.2f}")
+    print(f"{'watch median':<18}{statistics.median(row[0] for row in rows):>12.2f}"
+          f"{statistics.median(row[1] for row in rows):>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Line breaking for Chinese paragraphs from cached glyph-advance tables.
+
+ReportLab splits paragraphs at spaces. Chinese text has no spaces, so a
+whole paragraph is one "word" that ``splitLongWords`` cuts wherever the
+line is full: measuring it with ``stringWidth`` over and over, cutting
+English words and figures such as "iPhone" or "1243亿美元" in two, and
+starting lines with "，" or "。".
+
+CJKParagraph breaks such paragraphs in one pass over the text instead:
+- the advance widths of every BMP character of a registered TrueType font
+  are kept in a table indexed by code point, built once per font;
+- each paragraph is measured into cumulative widths, so the longest run of
+  characters that fits a line is a bisection;
+- from the end of that run, ``can_break`` walks back to the last place a
+  line may break: next to CJK characters and after spaces, but not inside
+  runs of Latin letters and digits. ReportLab's kinsoku tables add that a
+  line may not start with closing punctuation or end with opening
+  punctuation.
+Only text without any such place, such as a URL longer than the line, is
+cut mid-run.
+
+Paragraphs without CJK text, and those with inline images, ``<br/>`` or
+fonts that are not TrueType, are left to ReportLab.
+"""
+
+import re
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, chain
+from operator import itemgetter
+
+from reportlab.lib.textsplit import ALL_CANNOT_END, ALL_CANNOT_START
+from reportlab.pdfbase.pdfmetrics import getAscentDescent, getFont
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus.paragraph import FragLine, ParaLines, _handleBulletWidth
+from reportlab.rl_config import _FUZZ
+
+from paragraph_cache import CachedParagraph
+
+# CJK ideographs, kana, CJK punctuation and full-width forms
+_CJK_RANGES = (('\u2e80', '\u9fff'), ('\uf900', '\ufaff'), ('\ufe30', '\ufe4f'), ('\uff00', '\uffef'))
+_CJK_RE = re.compile('[' + ''.join(f'{low}-{high}' for low, high in _CJK_RANGES) + ']')
+_NON_BMP_RE = re.compile('[\U00010000-\U0010ffff]')
+_CANNOT_START = frozenset(ALL_CANNOT_START)
+_CANNOT_END = frozenset(ALL_CANNOT_END)
+
+# font name -> (font, advance widths in 1/1000 em indexed by code point)
+_advance_tables = {}
+
+
+def advance_table(font_name):
+    """Return the advance widths of the BMP of a registered TrueType font, or None for other fonts."""
+    font = getFont(font_name)
+    cached = _advance_tables.get(font_name)
+    if cached is not None and cached[0] is font:
+        return cached[1]
+    if not isinstance(font, TTFont):
+        return None
+    face = font.face
+    # A list rather than an array, so looking widths up does not create float objects
+    table = [face.defaultWidth] * 0x10000
+    for code, width in face.charWidths.items():
+        if code < 0x10000:
+            table[code] = width
+    _advance_tables[font_name] = (font, table)
+    return table
+
+
+def _advances(table, text):
+    """Return the advance of every character of ``text``, looked up in C rather than per character."""
+    if len(text) < 2:
+        return [table[ord(char)] for char in text]
+    return itemgetter(*array('I', text.encode('utf-32-le')))(table)
+
+
+def _is_cjk(char):
+    return any(low <= char <= high for low, high in _CJK_RANGES)
+
+
+def can_break(text, k):
+    """Return True if a line may break between ``text[k - 1]`` and ``text[k]``.
+
+    Lines break after spaces and next to CJK characters, but not inside runs
+    of Latin letters and digits, not before closing punctuation and not after
+    opening punctuation.
+    """
+    before, after = text[k - 1], text[k]
+    if after.isspace() or after in _CANNOT_START or before in _CANNOT_END:
+        return False
+    return before.isspace() or _is_cjk(before) or _is_cjk(after)
+
+
+def _make_line(frags, starts, text, start, stop, width, max_width, metrics):
+    """Build the FragLine of ``text[start:stop]`` as makeCJKParaLine does."""
+    words = []
+    index = bisect_right(starts, start) - 1
+    font_size = ascent = descent = 0
+    while index < len(frags) and starts[index] < stop:
+        begin, end = max(start, starts[index]), min(stop, starts[index + 1])
+        if end > begin:
+            frag = frags[index]
+            words.append(frag.clone(text=text[begin:end]))
+            frag_ascent, frag_descent = metrics[index]
+            font_size = max(font_size, frag.fontSize)
+            ascent = max(ascent, frag_ascent)
+            descent = min(descent, frag_descent)
+        index += 1
+    return FragLine(kind=1, extraSpace=max_width - width, wordCount=1, words=words, fontSize=font_size,
+                    ascent=ascent, descent=descent, maxWidth=max_width, currentWidth=width, lineBreak=False,
+                    breakSpace=False)
+
+
+def break_cjk_lines(frags, max_widths):
+    """Break ``frags`` into lines no wider than ``max_widths``; returns ParaLines, or None if not applicable."""
+    if any(not hasattr(frag, 'text') or hasattr(frag, 'cbDefn') or hasattr(frag, 'lineBreak')
+           for frag in frags):
+        return None
+    text = ''.join(frag.text for frag in frags)
+    if not _CJK_RE.search(text) or _NON_BMP_RE.search(text):
+        return None
+    tables = [advance_table(frag.fontName) for frag in frags]
+    if None in tables:
+        return None
+
+    starts = list(accumulate((len(frag.text) for frag in frags), initial=0))
+    metrics = [getAscentDescent(frag.fontName, frag.fontSize) for frag in frags]
+
+    # cum[k] is the advance of text[:k] in units of ``unit`` points. Text in one font and size,
+    # the usual case, is added up in font units and only scaled when compared with a line width.
+    if all(frag.fontName == frags[0].fontName and frag.fontSize == frags[0].fontSize for frag in frags):
+        unit = frags[0].fontSize * 0.001
+        advances = _advances(tables[0], text)
+    else:
+        unit = 1.0
+        advances = chain.from_iterable(map((frag.fontSize * 0.001).__mul__, _advances(table, frag.text))
+                                       for frag, table in zip(frags, tables))
+    cum = list(accumulate(advances, initial=0.0))
+
+    n = len(text)
+    text_end = len(text.rstrip())
+    if cum[text_end] * unit <= max_widths[0] + _FUZZ:
+        # Headings, cells and short paragraphs fit on one line
+        if len(frags) == 1:
+            # In the simple form ReportLab uses for single-fragment text; one line is never split
+            ascent, descent = metrics[0]
+            return frags[0].clone(kind=0, lines=[(max_widths[0] - cum[text_end] * unit, [text[:text_end]])],
+                                  ascent=ascent, descent=descent)
+        para_lines = ParaLines(kind=1, lines=[_make_line(frags, starts, text, 0, text_end, cum[text_end] * unit,
+                                                         max_widths[0], metrics)])
+        para_lines.cjk = True
+        return para_lines
+
+    lines = []
+    start = 0
+    while start < n:
+        max_width = max_widths[min(len(lines), len(max_widths) - 1)]
+        # text[start:end] is the longest run that fits
+        end = bisect_right(cum, cum[start] + (max_width + _FUZZ) / unit, start) - 1
+        # Spaces may run past the margin; they are not drawn
+        while end < n and text[end].isspace():
+            end += 1
+        if end >= n:
+            stop = n
+        else:
+            # Break at the last opportunity that fits
+            stop = end
+            while stop > start and not can_break(text, stop):
+                stop -= 1
+            if stop == start:
+                # Nowhere to break: cut the run, as ReportLab's splitLongWords does
+                stop = max(end, start + 1)
+        line_end = stop
+        while line_end > start and text[line_end - 1].isspace():
+            line_end -= 1
+        line = _make_line(frags, starts, text, start, line_end, (cum[line_end] - cum[start]) * unit,
+                          max_width, metrics)
+        start = stop
+        while start < n and text[start].isspace():
+            start += 1
+        # Remember the spaces dropped at the break, so that split parts can be broken again
+        line.breakSpace = start > line_end
+        lines.append(line)
+
+    para_lines = ParaLines(kind=1, lines=lines)
+    para_lines.cjk = True
+    return para_lines
+
+
+def _split_cjk_lines(blPara, start, stop):
+    """Return the fragments of lines ``start:stop``.
+
+    Unlike ReportLab, which adds a space after every line, a space is only
+    put back where the line broke at one.
+    """
+    words = []
+    for line in blPara.lines[start:stop]:
+        words.extend(word.clone() for word in line.words)
+        if line.breakSpace and words:
+            words[-1] = words[-1].clone(text=words[-1].text + ' ')
+    return words
+
+
+class CJKParagraph(CachedParagraph):
+    """Paragraph whose CJK text is broken by break_cjk_lines; other text is left to ReportLab."""
+
+    def breakLines(self, width):
+        if getattr(self, '_splitpara', 0) and getattr(getattr(self, 'blPara', None), 'cjk', False):
+            # The first part of a split keeps the lines it was split from
+            return self.blPara
+        max_widths = list(width) if isinstance(width, (list, tuple)) else [width]
+        _handleBulletWidth(self.bulletText, self.style, max_widths)
+        blPara = break_cjk_lines(self.frags, max_widths)
+        if blPara is None:
+            return super().breakLines(width)
+        self.height = 0
+        if blPara.kind == 0:
+            self._width_max = max_widths[0] - blPara.lines[0][0]
+        else:
+            self._width_max = max((line.currentWidth for line in blPara.lines), default=0)
+        return blPara
+
+    def split(self, availWidth, availHeight):
+        parts = super().split(availWidth, availHeight)
+        if len(parts) == 2 and getattr(self.blPara, 'cjk', False):
+            # ReportLab gives the first part new ParaLines; mark them so breakLines keeps them
+            parts[0].blPara.cjk = True
+        return parts
+
+    def _get_split_blParaFunc(self):
+        if getattr(self.blPara, 'cjk', False):
+            return _split_cjk_lines
+        return super()._get_split_blParaFunc()
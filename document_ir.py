@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Typed intermediate representation of a markdown report.
+
+The markdown is parsed once with Python-Markdown, and the resulting element
+tree is turned directly into a flat list of small block nodes. There is no
+HTML serialization or re-parsing step. Renderers for each language then walk
+that list in a single pass.
+"""
+
+import html
+import os
+import re
+
+import markdown
+from markdown import util
+
+# Markdown extensions used to parse reports
+MARKDOWN_EXTENSIONS = ['tables']
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_ALIGN_RE = re.compile(r'text-align:\s*(left|center|right)')
+# Inline images: ![alt](src "title")
+_IMAGE_RE = re.compile(r'!\[[^\]]*\]\(\s*<?([^)\s>]+)')
+
+
+class Heading:
+    __slots__ = ('level', 'text')
+
+    def __init__(self, level, text):
+        self.level = level
+        self.text = text
+
+    def __repr__(self):
+        return f"Heading({self.level}, {self.text!r})"
+
+
+class Paragraph:
+    """A paragraph; ``emphasized`` is set when it contains italic text."""
+
+    __slots__ = ('text', 'emphasized')
+
+    def __init__(self, text, emphasized=False):
+        self.text = text
+        self.emphasized = emphasized
+
+    def __repr__(self):
+        return f"Paragraph({self.text!r}, emphasized={self.emphasized})"
+
+
+class ListBlock:
+    """A bulleted or numbered list; ``items`` holds (depth, text) pairs in document order."""
+
+    __slots__ = ('items', 'ordered')
+
+    def __init__(self, items, ordered=False):
+        self.items = items
+        self.ordered = ordered
+
+    def __repr__(self):
+        return f"ListBlock({self.items!r}, ordered={self.ordered})"
+
+
+class Table:
+    """A table; ``alignments`` holds 'left', 'center', 'right' or None per column."""
+
+    __slots__ = ('header', 'rows', 'alignments')
+
+    def __init__(self, header, rows, alignments):
+        self.header = header
+        self.rows = rows
+        self.alignments = alignments
+
+    def __repr__(self):
+        return f"Table({len(self.header)} columns, {len(self.rows)} rows)"
+
+
+class Quote:
+    __slots__ = ('text',)
+
+    def __init__(self, text):
+        self.text = text
+
+    def __repr__(self):
+        return f"Quote({self.text!r})"
+
+
+class Image:
+    """An image; ``src`` is resolved against the markdown's directory when it is relative."""
+
+    __slots__ = ('src', 'alt')
+
+    def __init__(self, src, alt=''):
+        self.src = src
+        self.alt = alt
+
+    def __repr__(self):
+        return f"Image({self.src!r})"
+
+
+class Rule:
+    __slots__ = ()
+
+    def __repr__(self):
+        return "Rule()"
+
+
+class _TextResolver:
+    """Turns element text into plain text, expanding Markdown's stash placeholders."""
+
+    def __init__(self, md):
+        self._stash = md.htmlStash.rawHtmlBlocks
+
+    def _expand(self, match):
+        index = int(match.group(1))
+        if index >= len(self._stash):
+            return ''
+        raw = self._stash[index]
+        raw = raw if isinstance(raw, str) else ''.join(raw.itertext())
+        return html.unescape(_TAG_RE.sub('', raw))
+
+    def __call__(self, element, skip=()):
+        if skip:
+            parts = [element.text or '']
+            for child in element:
+                if child.tag not in skip:
+                    parts.extend(child.itertext())
+                parts.append(child.tail or '')
+            text = ''.join(parts)
+        else:
+            text = ''.join(element.itertext())
+        if util.STX in text:
+            text = util.HTML_PLACEHOLDER_RE.sub(self._expand, text)
+        # Markdown has no escape for '$', but reports written for math-aware
+        # renderers use '\$' for currency amounts
+        return text.replace('\\$', '$').strip()
+
+
+def _has_emphasis(element):
+    return any(child.tag == 'em' for child in element.iter())
+
+
+def _list_items(element, text_of, depth=0):
+    """Flatten a list and its nested lists into (depth, text) pairs."""
+    items = []
+    for li in element:
+        if li.tag != 'li':
+            continue
+        # Loose lists wrap item text in <p>; nested lists are emitted separately
+        own_text = text_of(li, skip=('ul', 'ol'))
+        if own_text:
+            items.append((depth, own_text))
+        for child in li:
+            if child.tag in ('ul', 'ol'):
+                items.extend(_list_items(child, text_of, depth + 1))
+    return items
+
+
+def _cell_alignment(cell):
+    align = cell.get('align')
+    if align:
+        return align
+    match = _ALIGN_RE.search(cell.get('style', ''))
+    return match.group(1) if match else None
+
+
+def _table(element, text_of):
+    header, rows, alignments = [], [], []
+    for tr in element.iter('tr'):
+        cells = [cell for cell in tr if cell.tag in ('th', 'td')]
+        if cells and cells[0].tag == 'th' and not header:
+            header = [text_of(cell) for cell in cells]
+            alignments = [_cell_alignment(cell) for cell in cells]
+        elif cells:
+            rows.append([text_of(cell) for cell in cells])
+    if not alignments and rows:
+        alignments = [None] * len(rows[0])
+    return Table(header, rows, alignments)
+
+
+def resolve_image_source(src, base_dir=None):
+    """Return the path of an image source, relative ones taken from ``base_dir``."""
+    if base_dir and src and '://' not in src and not os.path.isabs(src):
+        return os.path.join(base_dir, src)
+    return src
+
+
+def referenced_images(md_text, base_dir=None):
+    """Return the paths of the inline images in markdown text without parsing it, for cache keys."""
+    return [resolve_image_source(src, base_dir) for src in _IMAGE_RE.findall(md_text)]
+
+
+def _blocks(parent, text_of, base_dir):
+    for element in parent:
+        tag = element.tag
+        if tag in ('h1', 'h2', 'h3', 'h4', 'h5', 'h6'):
+            text = text_of(element)
+            if text:
+                yield Heading(int(tag[1]), text)
+        elif tag in ('p', 'pre'):
+            text = text_of(element)
+            if text:
+                yield Paragraph(text, _has_emphasis(element))
+            # Images are laid out as blocks of their own, after the paragraph's text
+            for image in element.iter('img'):
+                yield Image(resolve_image_source(image.get('src', ''), base_dir), image.get('alt', ''))
+        elif tag in ('ul', 'ol'):
+            items = _list_items(element, text_of)
+            if items:
+                yield ListBlock(items, ordered=(tag == 'ol'))
+        elif tag == 'table':
+            yield _table(element, text_of)
+        elif tag == 'blockquote':
+            text = text_of(element)
+            if text:
+                yield Quote(text)
+        elif tag == 'hr':
+            yield Rule()
+        else:
+            # Containers such as <div>: descend into their children
+            yield from _blocks(element, text_of, base_dir)
+
+
+def parse_markdown(md_text, extensions=None, base_dir=None):
+    """Parse markdown text into a list of IR block nodes.
+
+    Relative image sources are taken from ``base_dir``, or the current
+    directory when it is None.
+    """
+    md = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS if extensions is None else extensions)
+    if not md_text.strip():
+        return []
+
+    # Same steps as Markdown.convert, stopping before the tree is serialized
+    lines = md_text.split("\n")
+    for preprocessor in md.preprocessors:
+        lines = preprocessor.run(lines)
+    root = md.parser.parseDocument(lines).getroot()
+    for treeprocessor in md.treeprocessors:
+        new_root = treeprocessor.run(root)
+        if new_root is not None:
+            root = new_root
+
+    return list(_blocks(root, _TextResolver(md), base_dir))
+
+
+def iter_segments(blocks):
+    """Yield every piece of text in ``blocks`` that needs translating, in order."""
+    for block in blocks:
+        if isinstance(block, (Heading, Paragraph, Quote)):
+            yield block.text
+        elif isinstance(block, ListBlock):
+            for _, text in block.items:
+                yield text
+        elif isinstance(block, Table):
+            yield from block.header
+            for row in block.rows:
+                yield from row
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Cache of parsed TrueType font metrics.
+
+Building a ReportLab ``TTFont`` reads the whole font file and walks its cmap,
+hmtx and loca tables in Python, which for a CJK font with tens of thousands
+of glyphs dominates cold start. The first time a font is loaded, the parsed
+tables are written to a compact binary file: a small JSON header followed by
+raw native-endian arrays. Later loads memory-map that file and the font file
+itself, so no table is re-parsed and glyph outlines are only paged in when a
+subset is embedded.
+
+The cache file name is derived from the font path, size, modification time,
+subfont index and ReportLab version; a sampled hash of the font content is
+stored in the header and checked on load.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from weakref import WeakKeyDictionary
+
+import reportlab
+
+# reportlab.pdfbase is imported where fonts are built, so that computing
+# cache keys (content_fingerprint, cache_path_for) stays cheap to import
+
+_MAGIC = b'RLFCACHE'
+_FORMAT_VERSION = 1
+
+# Scalar face attributes copied verbatim into the JSON header
+_SCALARS = (
+    'ascent', 'descent', 'capHeight', 'stemV', 'italicAngle', 'underlinePosition',
+    'underlineThickness', 'flags', 'numGlyphs', 'unitsPerEm', 'defaultWidth', 'bbox',
+    'fontRevision', 'version', 'numTables', 'searchRange', 'entrySelector', 'rangeShift',
+    'tables', 'validate', '_full_font',
+)
+# Face attributes holding TTFNameBytes
+_NAMES = ('name', 'familyName', 'styleName', 'fullName', 'uniqueFontID')
+
+
+class _MetricPairs:
+    """Read-only sequence of (advance width, lsb) pairs over a flat array."""
+
+    __slots__ = ('_values',)
+
+    def __init__(self, values):
+        self._values = values
+
+    def __len__(self):
+        return len(self._values) // 2
+
+    def __getitem__(self, index):
+        return self._values[2 * index], self._values[2 * index + 1]
+
+
+def content_fingerprint(path, sample=1 << 16):
+    """Hash of the file size plus its first and last 64 KiB."""
+    digest = hashlib.blake2b(digest_size=16)
+    size = os.path.getsize(path)
+    digest.update(str(size).encode())
+    with open(path, 'rb') as f:
+        digest.update(f.read(sample))
+        if size > sample:
+            f.seek(max(sample, size - sample))
+            digest.update(f.read(sample))
+    return digest.hexdigest()
+
+
+def cache_path_for(font_path, cache_dir, subfont_index=0):
+    """Return the cache file used for ``font_path``."""
+    stat = os.stat(font_path)
+    key = '\0'.join(map(str, (
+        os.path.abspath(font_path), stat.st_size, stat.st_mtime_ns, subfont_index,
+        reportlab.Version, sys.byteorder, _FORMAT_VERSION,
+    )))
+    name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, f"{name}.rlfont")
+
+
+def write_font_cache(face, cache_file, fingerprint):
+    """Serialize the parsed tables of a TTFontFace to ``cache_file``."""
+    codes = sorted(face.charToGlyph)
+    arrays = {
+        'codes': array('I', codes),
+        'glyphs': array('I', (face.charToGlyph[c] for c in codes)),
+        'widths': array('d', (face.charWidths.get(c, face.defaultWidth) for c in codes)),
+        'hmetrics': array('H', (v for pair in face.hmetrics for v in pair)),
+        'glyphPos': array('I', face.glyphPos),
+    }
+
+    header = {
+        'format': _FORMAT_VERSION,
+        'fingerprint': fingerprint,
+        'scalars': {k: getattr(face, k) for k in _SCALARS},
+        'names': {k: getattr(face, k).ustr for k in _NAMES},
+        'subfontNameX': face.subfontNameX.decode('latin1'),
+        'table': face.table,
+        'arrays': {},
+    }
+
+    # Lay the arrays out after the header, each aligned to 8 bytes so they can
+    # be cast directly from the memory map
+    offset = 0
+    for key, values in arrays.items():
+        size = len(values) * values.itemsize
+        header['arrays'][key] = [offset, len(values), values.typecode]
+        offset += (size + 7) & ~7
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    header_bytes += b' ' * (-(len(_MAGIC) + 4 + len(header_bytes)) % 8)
+
+    os.makedirs(os.path.dirname(cache_file) or '.', exist_ok=True)
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    with open(tmp_file, 'wb') as f:
+        f.write(_MAGIC)
+        f.write(struct.pack('<I', len(header_bytes)))
+        f.write(header_bytes)
+        for values in arrays.values():
+            data = values.tobytes()
+            f.write(data)
+            f.write(b'\0' * (-len(data) % 8))
+    # Atomic so concurrent workers never see a half-written cache
+    os.replace(tmp_file, cache_file)
+
+
+def read_font_cache(cache_file, font_path, fingerprint=None):
+    """Rebuild a TTFontFace from ``cache_file``; returns None if it is stale."""
+    with open(cache_file, 'rb') as f:
+        cache = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if cache[:len(_MAGIC)] != _MAGIC:
+        return None
+    header_length = struct.unpack_from('<I', cache, len(_MAGIC))[0]
+    data_start = len(_MAGIC) + 4 + header_length
+    header = json.loads(cache[len(_MAGIC) + 4:data_start])
+    if header['format'] != _FORMAT_VERSION:
+        return None
+    if fingerprint is None:
+        fingerprint = content_fingerprint(font_path)
+    if header['fingerprint'] != fingerprint:
+        return None
+
+    view = memoryview(cache)
+    arrays = {}
+    for key, (offset, count, typecode) in header['arrays'].items():
+        itemsize = array(typecode).itemsize
+        start = data_start + offset
+        arrays[key] = view[start:start + count * itemsize].cast(typecode)
+
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFNameBytes, TTFontFace
+
+    face = TTFontFace.__new__(TTFontFace)
+    pdfmetrics.TypeFace.__init__(face, None)
+    for key, value in header['scalars'].items():
+        setattr(face, key, value)
+    face.bbox = list(face.bbox)
+    face.fontRevision = tuple(face.fontRevision)
+    for key, value in header['names'].items():
+        setattr(face, key, TTFNameBytes(value.encode('utf-8')))
+    face.subfontNameX = header['subfontNameX'].encode('latin1')
+    face.table = header['table']
+
+    units = face.unitsPerEm
+    face._pdfScale = (lambda x: x) if units == 1000 else (lambda x, m=1000 / units: x * m)
+    face.charToGlyph = dict(zip(arrays['codes'], arrays['glyphs']))
+    face.charWidths = dict(zip(arrays['codes'], arrays['widths']))
+    face.hmetrics = _MetricPairs(arrays['hmetrics'])
+    face.glyphPos = arrays['glyphPos']
+
+    # Glyph data is read lazily from the mapped font file when subsetting
+    face.filename = font_path
+    with open(font_path, 'rb') as f:
+        face._ttf_data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    face._pos = 0
+    return face
+
+
+def _font_from_face(name, face):
+    """Wrap a TTFontFace in a TTFont without re-reading the font file."""
+    from reportlab import rl_config
+    from reportlab.pdfbase.ttfonts import TTEncoding, TTFont
+
+    font = TTFont.__new__(TTFont)
+    font.fontName = name
+    font.face = face
+    font.encoding = TTEncoding()
+    font.state = WeakKeyDictionary()
+    font._asciiReadable = rl_config.ttfAsciiReadable
+    # HarfBuzz shaping needs the glyph-to-char table, which is not cached;
+    # CJK text is laid out unshaped anyway
+    font.shapable = False
+    return font
+
+
+def load_ttfont(name, font_path, cache_dir, subfont_index=0):
+    """Return a TTFont for ``font_path``, using and filling the metrics cache.
+
+    Falls back to a normal parse when the cache is missing, stale or unreadable.
+    """
+    try:
+        cache_file = cache_path_for(font_path, cache_dir, subfont_index)
+        fingerprint = content_fingerprint(font_path)
+        if os.path.exists(cache_file):
+            face = read_font_cache(cache_file, font_path, fingerprint)
+            if face is not None:
+                return _font_from_face(name, face)
+    except (OSError, ValueError, KeyError, struct.error):
+        cache_file = None
+
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    font = TTFont(name, font_path, subfontIndex=subfont_index)
+    if cache_file is not None:
+        try:
+            write_font_cache(font.face, cache_file, fingerprint)
+        except OSError as e:
+            print(f"Warning: Could not write font cache {cache_file}: {e}")
+    return font
@@ -1,156 +1,161 @@
 import os
 import re
-import markdown
 from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch, cm
-from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, Image, PageBreak, 
-    Table, TableStyle, Frame, PageTemplate, NextPageTemplate
-)
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.platypus.flowables import Flowable
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-from html.parser import HTMLParser
-import jieba
-import re
+from reportlab.lib.units import inch
+from reportlab.lib.enums import TA_CENTER
+from translation import GlossaryTranslator
 
-# Register the font
-font_path = "/System/Library/Fonts/STHeiti Light.ttc"  # Path to Huawen Kaiti font on macOS
-pdfmetrics.registerFont(TTFont("HuawenKaiti", font_path))
+# markdown and ReportLab's styles, fonts and layout engine are imported when a
+# report is generated, so that importing this module stays cheap
 
-# Define styles
-styles = getSampleStyleSheet()
-custom_styles = {
-    'CustomTitle': ParagraphStyle(
-        name='CustomTitle',
-        fontName='HuawenKaiti',
-        fontSize=18,
-        alignment=TA_CENTER,
-        spaceAfter=12
-    ),
-    'CustomNormal': ParagraphStyle(
-        name='CustomNormal',
-        fontName='HuawenKaiti',
-        fontSize=12,
-        leading=14,
-        spaceAfter=6
-    ),
-    'CustomHeading1': ParagraphStyle(
-        name='CustomHeading1',
-        fontName='HuawenKaiti',
-        fontSize=16,
-        leading=18,
-        spaceAfter=6
-    ),
-    'CustomHeading2': ParagraphStyle(
-        name='CustomHeading2',
-        fontName='HuawenKaiti',
-        fontSize=14,
-        leading=16,
-        spaceAfter=6
-    ),
-    'CustomQuote': ParagraphStyle(
-        name='CustomQuote',
-        fontName='HuawenKaiti',
-        fontSize=12,
-        leading=14,
-        leftIndent=20,
-        rightIndent=20,
-        spaceAfter=6,
-        italics=True
-    ),
-    'CustomFooter': ParagraphStyle(
-        name='CustomFooter',
-        fontName='HuawenKaiti',
-        fontSize=10,
-        alignment=TA_CENTER
-    )
-}
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# Add custom styles to the stylesheet
-for style_name, style in custom_styles.items():
-    styles.add(style)
+# Path to Huawen Kaiti font on macOS; registered by register_font()
+DEFAULT_FONT_PATH = "/System/Library/Fonts/STHeiti Light.ttc"
 
-# Custom flowable for page numbers
-class PageNumberFlowable(Flowable):
-    def __init__(self, page_size=A4):
-        Flowable.__init__(self)
-        self.page_size = page_size
-        self.width = page_size[0]
-        self.height = 20
+# Logo images
+COVER_LOGO_PATH = os.path.join(PROJECT_DIR, "logo-b.png")
+HEADER_LOGO_PATH = os.path.join(PROJECT_DIR, "logo-short.png")
 
-    def draw(self):
-        canvas = self.canv
-        canvas.saveState()
-        canvas.setFont('HuawenKaiti', 10)
-        page_num = canvas.getPageNumber()
-        text = f"Page {page_num}"
-        canvas.drawCentredString(self.width / 2, 0, text)
-        canvas.restoreState()
+# Font registered as HuawenKaiti, if any
+_registered_font_path = None
 
-# Function to translate Chinese text to English
-def translate_chinese_to_english(text):
-    # This is a simplified translation dictionary
-    # In a real application, you would use a proper translation API or service
-    translations = {
-        "苹果": "Apple",
-        "财年": "Fiscal Year",
-        "第一季度": "First Quarter",
-        "财报会议": "Financial Report Meeting",
-        "公司": "Company",
-        "创纪录的收入": "Record Revenue",
-        "美元": "USD",
-        "同比增长": "Year-over-Year Growth",
-        "美洲": "Americas",
-        "欧洲": "Europe",
-        "日本": "Japan",
-        "亚太地区": "Asia Pacific",
-        "历史新高": "All-Time High",
-        "新兴市场": "Emerging Markets",
-        "显著的收入增长": "Significant Revenue Growth",
-        "尤其是": "Especially in",
-        "拉丁美洲": "Latin America",
-        "中东": "Middle East",
-        "南亚": "South Asia",
-        "蒂姆·库克": "Tim Cook",
-        "产品表现": "Product Performance",
-        "可穿戴设备": "Wearables",
-        "家居": "Home",
-        "配件": "Accessories",
-        "服务业务": "Services Business",
-        "继续吸引观众": "Continues to Attract Viewers",
-        "获得了": "Received",
-        "超过": "Over",
-        "提名": "Nominations",
-        "奖项": "Awards",
-        "未来展望": "Future Outlook",
-        "计划": "Plans",
-        "在沙特阿拉伯开设旗舰店": "to Open a Flagship Store in Saudi Arabia",
-        "继续在印度等新兴市场扩展业务": "Continue to Expand Business in Emerging Markets like India",
-        "推出更多语言版本": "Launch More Language Versions of",
-        "包括": "Including",
-        "法语": "French",
-        "德语": "German",
-        "意大利语": "Italian",
-        "我们将继续投资于创新和变革性工具": "We Will Continue to Invest in Innovative and Transformative Tools",
-        "以帮助用户在日常生活中受益": "to Help Users Benefit in Their Daily Lives",
-        "财务状况": "Financial Condition",
-        "毛利率": "Gross Margin",
-        "净收入": "Net Income",
-        "向股东返还": "Returned to Shareholders",
-    }
+def register_font(font_path=None):
+    """Register the report font as HuawenKaiti, once per process and font."""
+    global _registered_font_path
+    font_path = font_path or DEFAULT_FONT_PATH
+    if font_path != _registered_font_path:
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+        pdfmetrics.registerFont(TTFont("HuawenKaiti", font_path))
+        _registered_font_path = font_path
+
+# Stylesheet built by get_styles()
+_styles = None
+
+def get_styles():
+    """Return the report stylesheet, building it on first use."""
+    global _styles
+    if _styles is not None:
+        return _styles
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
     
-    # Simple word-by-word translation
-    for cn, en in translations.items():
-        text = text.replace(cn, en)
+    # Define styles
+    styles = getSampleStyleSheet()
+    custom_styles = {
+        'CustomTitle': ParagraphStyle(
+            name='CustomTitle',
+            fontName='HuawenKaiti',
+            fontSize=18,
+            alignment=TA_CENTER,
+            spaceAfter=12
+        ),
+        'CustomNormal': ParagraphStyle(
+            name='CustomNormal',
+            fontName='HuawenKaiti',
+            fontSize=12,
+            leading=14,
+            spaceAfter=6
+        ),
+        'CustomHeading1': ParagraphStyle(
+            name='CustomHeading1',
+            fontName='HuawenKaiti',
+            fontSize=16,
+            leading=18,
+            spaceAfter=6
+        ),
+        'CustomHeading2': ParagraphStyle(
+            name='CustomHeading2',
+            fontName='HuawenKaiti',
+            fontSize=14,
+            leading=16,
+            spaceAfter=6
+        ),
+        'CustomQuote': ParagraphStyle(
+            name='CustomQuote',
+            fontName='HuawenKaiti',
+            fontSize=12,
+            leading=14,
+            leftIndent=20,
+            rightIndent=20,
+            spaceAfter=6,
+            italics=True
+        ),
+        'CustomFooter': ParagraphStyle(
+            name='CustomFooter',
+            fontName='HuawenKaiti',
+            fontSize=10,
+            alignment=TA_CENTER
+        )
+    }
+
+    # Add custom styles to the stylesheet
+    for style_name, style in custom_styles.items():
+        styles.add(style)
     
-    return text
+    _styles = styles
+    return styles
+
+# This is a simplified translation dictionary
+# In a real application, you would use a proper translation API or service
+TRANSLATIONS = {
+    "苹果": "Apple",
+    "财年": "Fiscal Year",
+    "第一季度": "First Quarter",
+    "财报会议": "Financial Report Meeting",
+    "公司": "Company",
+    "创纪录的收入": "Record Revenue",
+    "美元": "USD",
+    "同比增长": "Year-over-Year Growth",
+    "美洲": "Americas",
+    "欧洲": "Europe",
+    "日本": "Japan",
+    "亚太地区": "Asia Pacific",
+    "历史新高": "All-Time High",
+    "新兴市场": "Emerging Markets",
+    "显著的收入增长": "Significant Revenue Growth",
+    "尤其是": "Especially in",
+    "拉丁美洲": "Latin America",
+    "中东": "Middle East",
+    "南亚": "South Asia",
+    "蒂姆·库克": "Tim Cook",
+    "产品表现": "Product Performance",
+    "可穿戴设备": "Wearables",
+    "家居": "Home",
+    "配件": "Accessories",
+    "服务业务": "Services Business",
+    "继续吸引观众": "Continues to Attract Viewers",
+    "获得了": "Received",
+    "超过": "Over",
+    "提名": "Nominations",
+    "奖项": "Awards",
+    "未来展望": "Future Outlook",
+    "计划": "Plans",
+    "在沙特阿拉伯开设旗舰店": "to Open a Flagship Store in Saudi Arabia",
+    "继续在印度等新兴市场扩展业务": "Continue to Expand Business in Emerging Markets like India",
+    "推出更多语言版本": "Launch More Language Versions of",
+    "包括": "Including",
+    "法语": "French",
+    "德语": "German",
+    "意大利语": "Italian",
+    "我们将继续投资于创新和变革性工具": "We Will Continue to Invest in Innovative and Transformative Tools",
+    "以帮助用户在日常生活中受益": "to Help Users Benefit in Their Daily Lives",
+    "财务状况": "Financial Condition",
+    "毛利率": "Gross Margin",
+    "净收入": "Net Income",
+    "向股东返还": "Returned to Shareholders",
+}
+
+# The glossary is compiled once; each call is then a single longest-match scan
+_translator = GlossaryTranslator(TRANSLATIONS)
+
+# Function to translate Chinese text to English
+def translate_chinese_to_english(text):
+    return _translator.translate(text)
 
 # Function to create a bilingual paragraph
 def create_bilingual_paragraph(chinese_text, style):
+    from reportlab.platypus import Paragraph, Spacer
     english_text = translate_chinese_to_english(chinese_text)
     return [
         Paragraph(chinese_text, style),
@@ -160,11 +165,14 @@ def create_bilingual_paragraph(chinese_text, style):
 
 # Function to parse markdown and convert to ReportLab flowables
 def markdown_to_flowables(md_text):
+    import markdown
+    styles = get_styles()
+    
     # Convert markdown to HTML
     html = markdown.markdown(md_text)
     
-    # Split HTML by tags to process each element
-    elements = re.findall(r'<[^>]+>.*?</[^>]+>|[^<]+', html)
+    # Split HTML into its top-level elements, each running to its own closing tag
+    elements = [match.group(0) for match in re.finditer(r'<(\w+)[^>]*>.*?</\1>|[^<]+', html, re.DOTALL)]
     
     flowables = []
     
@@ -218,7 +226,7 @@ def add_page_header(canvas, doc):
     canvas.saveState()
     
     # Add logo
-    logo_path = "/Users/haoxue/LLMQuant_report/logo-short.png"
+    logo_path = HEADER_LOGO_PATH
     canvas.drawImage(logo_path, 1*inch, doc.height - 1*inch, width=1.5*inch, height=0.5*inch)
     
     # Add title
@@ -228,7 +236,31 @@ def add_page_header(canvas, doc):
     canvas.restoreState()
 
 # Main function to generate the PDF
-def generate_pdf(input_md_path, output_pdf_path):
+def generate_pdf(input_md_path, output_pdf_path, font_path=None):
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, PageBreak
+    from reportlab.platypus.flowables import Flowable
+    
+    # Custom flowable for page numbers
+    class PageNumberFlowable(Flowable):
+        def __init__(self, page_size=A4):
+            Flowable.__init__(self)
+            self.page_size = page_size
+            self.width = page_size[0]
+            self.height = 20
+
+        def draw(self):
+            canvas = self.canv
+            canvas.saveState()
+            canvas.setFont('HuawenKaiti', 10)
+            page_num = canvas.getPageNumber()
+            text = f"Page {page_num}"
+            canvas.drawCentredString(self.width / 2, 0, text)
+            canvas.restoreState()
+    
+    # Register the font
+    register_font(font_path)
+    styles = get_styles()
+    
     # Read markdown content
     with open(input_md_path, 'r', encoding='utf-8') as file:
         md_content = file.read()
@@ -247,7 +279,7 @@ def generate_pdf(input_md_path, output_pdf_path):
     story = []
     
     # Add cover page
-    cover_logo_path = "/Users/haoxue/LLMQuant_report/logo-b.png"
+    cover_logo_path = COVER_LOGO_PATH
     cover_logo = Image(cover_logo_path, width=4*inch, height=2*inch)
     cover_logo.hAlign = 'CENTER'
     
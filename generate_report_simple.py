@@ -3,43 +3,104 @@
 A simpler version of the PDF report generator that handles HTML tags better.
 """
 
+import argparse
+import json
 import os
-import re
 import sys
-import markdown
+import reportlab
 from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch, cm
-from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, Image, PageBreak, 
-    Table, TableStyle, NextPageTemplate, PageTemplate, Frame
-)
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.platypus.flowables import Flowable
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
-import html
-from bs4 import BeautifulSoup
-from PIL import Image as PILImage
-from reportlab.platypus.tableofcontents import TableOfContents
+from reportlab.lib.units import inch
+from reportlab.lib.enums import TA_CENTER
+from translation import GlossaryTranslator
+from output_cache import OutputCache, hash_file, hash_text, style_fingerprint
+from pipeline_profile import PipelineProfiler
+from translation_memory import glossary_version
+
+# ReportLab's layout engine, PIL, markdown and the translation backends are
+# imported by the functions that use them, so that ``--help``, dry runs and
+# output cache hits do not pay for loading them.
 
 # Default font paths
-PROJECT_FONT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "font", "STKaiti.ttf")
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_FONT_PATH = os.path.join(PROJECT_DIR, "font", "STKaiti.ttf")
 DEFAULT_FONT_PATH = PROJECT_FONT_PATH if os.path.exists(PROJECT_FONT_PATH) else "/System/Library/Fonts/STHeiti Light.ttc"
 FONT_NAME = "HuawenKaiti"  # The name we'll use to refer to the font in the document
 
+# Logo images
+COVER_LOGO_PATH = os.path.join(PROJECT_DIR, "logo-b.png")
+HEADER_LOGO_PATH = os.path.join(PROJECT_DIR, "logo-short.png")
+
+# Titles of the two language sections
+SECTION_TITLES = {'en': "English Version", 'zh': "中文版"}
+
+# Width of the text frame between the 1 inch page margins
+CONTENT_WIDTH = A4[0] - 2*inch
+
+# Images are embedded at this many pixels per inch of their drawn size (None embeds the originals)
+IMAGE_DPI = 150
+# Markdown images are drawn at this many pixels per inch, shrunk to fit the frame
+IMAGE_SCREEN_DPI = 96
+IMAGE_MAX_HEIGHT = A4[1] - 3*inch
+
+# Local caches shared between report runs
+CACHE_DIR = os.path.join(PROJECT_DIR, ".cache")
+TRANSLATION_MEMORY_PATH = os.path.join(CACHE_DIR, "translation_memory.sqlite")
+FONT_CACHE_DIR = os.path.join(CACHE_DIR, "fonts")
+OUTPUT_CACHE_DIR = os.path.join(CACHE_DIR, "output")
+CHAPTER_CACHE_DIR = os.path.join(CACHE_DIR, "chapters")
+IMAGE_CACHE_DIR = os.path.join(CACHE_DIR, "images")
+
+# Source files whose changes invalidate cached PDFs: this module, translation and every layout module
+GENERATOR_SOURCES = [os.path.abspath(__file__)] + [os.path.join(PROJECT_DIR, name) for name in (
+    "translation.py", "translation_backend.py", "document_ir.py", "report_tables.py", "report_toc.py",
+    "cjk_linebreak.py", "paragraph_cache.py", "image_assets.py", "pdf_optimize.py", "pdf_linearize.py",
+    "parallel_render.py", "streaming_render.py", "incremental_render.py", "pdf_join.py",
+)]
+
+# Cover and header text; individual keys can be overridden per report
+DEFAULT_METADATA = {
+    'title': "LLMQuant Financial Report",
+    'subtitle': "Quarterly Financial Analysis",
+    'fiscal_period': "Fiscal Year 2025 - First Quarter",
+    'date': "February 2024",
+}
+
+# Bytes read at a time when a rendered PDF is copied from disk to a stream
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Path of the font currently registered as FONT_NAME
+_registered_font_path = None
+
+def resolve_font_path(font_path=None):
+    """Return the font file that register_font will use for ``font_path``."""
+    return font_path if font_path and os.path.exists(font_path) else DEFAULT_FONT_PATH
+
 def register_font(font_path=None):
     """Register the font with ReportLab."""
+    global _registered_font_path
     # Use provided font path or default
-    path_to_use = font_path if font_path and os.path.exists(font_path) else DEFAULT_FONT_PATH
+    path_to_use = resolve_font_path(font_path)
+    
+    # Parsing a CJK font is expensive, so long-running processes only do it once
+    if path_to_use == _registered_font_path:
+        return True
     
     if not os.path.exists(path_to_use):
         print(f"Warning: Font file not found at {path_to_use}. Using system default font.")
         return False
     
+    from reportlab.pdfbase import pdfmetrics
+    from font_cache import load_ttfont
+    
     try:
-        pdfmetrics.registerFont(TTFont(FONT_NAME, path_to_use))
+        # Parsed font tables are cached on disk, so only the first run pays for parsing
+        pdfmetrics.registerFont(load_ttfont(FONT_NAME, path_to_use, FONT_CACHE_DIR))
+        if _registered_font_path is not None:
+            # Paragraphs laid out with the previous font have different line breaks
+            from paragraph_cache import CachedParagraph
+            if CachedParagraph.cache is not None:
+                CachedParagraph.cache.clear()
+        _registered_font_path = path_to_use
         print(f"Successfully registered font: {path_to_use}")
         return True
     except Exception as e:
@@ -49,6 +110,9 @@ def register_font(font_path=None):
 # Define styles
 def create_styles():
     """Create and return the styles for the document."""
+    from reportlab.lib import colors
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    
     styles = getSampleStyleSheet()
     custom_styles = {
         'CustomTitle': ParagraphStyle(
@@ -145,6 +209,19 @@ def create_styles():
             fontSize=9,
             alignment=TA_CENTER
         ),
+        'TableHeader': ParagraphStyle(
+            name='TableHeader',
+            fontName=FONT_NAME,
+            fontSize=10,
+            leading=13,
+            textColor=colors.darkblue
+        ),
+        'TableCell': ParagraphStyle(
+            name='TableCell',
+            fontName=FONT_NAME,
+            fontSize=10,
+            leading=13
+        ),
         'TOCHeading': ParagraphStyle(
             name='TOCHeading',
             fontName=FONT_NAME,
@@ -246,23 +323,6 @@ def create_styles():
     
     return styles
 
-# Custom flowable for page numbers
-class PageNumberFlowable(Flowable):
-    def __init__(self, page_size=A4):
-        Flowable.__init__(self)
-        self.page_size = page_size
-        self.width = page_size[0]
-        self.height = 20
-
-    def draw(self):
-        canvas = self.canv
-        canvas.saveState()
-        canvas.setFont(FONT_NAME, 9)
-        page_num = canvas.getPageNumber()
-        text = f"Page {page_num}"
-        canvas.drawCentredString(self.width / 2, 0, text)
-        canvas.restoreState()
-
 # Simple translation dictionary
 translations = {
     "苹果": "Apple",
@@ -312,11 +372,31 @@ translations = {
     "向股东返还": "Returned to Shareholders",
 }
 
-def translate_text(text):
-    """Simple word-by-word translation."""
-    result = text
-    for cn, en in translations.items():
-        result = result.replace(cn, en)
+# Compiled form of ``translations``, rebuilt whenever its contents change
+_translator = None
+_translator_key = None
+
+def get_translator():
+    """Return the glossary translator compiled from ``translations``."""
+    global _translator, _translator_key
+    # Keyed by content, so that entries edited in place are picked up too
+    key = glossary_version(translations)
+    if _translator is None or _translator_key != key:
+        _translator = GlossaryTranslator(translations)
+        _translator_key = key
+    return _translator
+
+def translate_text(text, translator=None, memory=None):
+    """Translate text with the glossary, consulting the translation memory first."""
+    if memory is not None:
+        cached = memory.lookup(text)
+        if cached is not None:
+            return cached
+    if translator is None:
+        translator = get_translator()
+    result = translator.translate(text)
+    if memory is not None:
+        memory.store(text, result)
     return result
 
 def clean_html(text):
@@ -328,168 +408,273 @@ def clean_html(text):
     text = text.replace('"', '&quot;')
     return text
 
-def add_page_header(canvas, doc):
-    """Add logo and title to each page."""
-    # Skip for the first page (cover page) and TOC page
-    if doc.page == 1 or doc.page == 2:
-        return
-        
-    canvas.saveState()
-    
-    # Add logo - only specify width to maintain aspect ratio
-    logo_path = "/Users/haoxue/LLMQuant_report/logo-short.png"
-    
-    # Get image dimensions using PIL
+# Image sizes in pixels, keyed by (path, mtime) so each image is probed once per process
+_image_sizes = {}
+
+def get_image_size(image_path):
+    """Return the (width, height) of an image in pixels, probing it with PIL only once, or None."""
     try:
-        with PILImage.open(logo_path) as img:
-            img_width, img_height = img.size
-            aspect_ratio = img_width / img_height
+        key = (image_path, os.stat(image_path).st_mtime_ns)
+    except OSError as e:
+        print(f"Warning: Could not read image {image_path}: {e}")
+        return None
+    if key not in _image_sizes:
+        from PIL import Image as PILImage
+        try:
+            with PILImage.open(image_path) as img:
+                _image_sizes[key] = img.size
+        except Exception as e:
+            print(f"Warning: Could not read image {image_path}: {e}")
+            return None
+    return _image_sizes[key]
+
+def get_image_aspect_ratio(image_path, fallback):
+    """Return width / height of an image, or ``fallback`` when it cannot be read."""
+    size = get_image_size(image_path)
+    return size[0] / size[1] if size else fallback
+
+# Downsampled and recompressed images, shared by the renders of this process
+_image_assets = None
+
+def prepare_image(image_path, width, height):
+    """Return the file to embed for ``image_path`` drawn at ``width`` x ``height`` points.
+
+    The image is resized for IMAGE_DPI and recompressed through the asset
+    cache (see image_assets.py); the original is used when IMAGE_DPI is
+    None or the image cannot be processed.
+    """
+    global _image_assets
+    if IMAGE_DPI is None:
+        return image_path
+    try:
+        if _image_assets is None or _image_assets.dpi != IMAGE_DPI:
+            from image_assets import ImageAssetCache
+            _image_assets = ImageAssetCache(IMAGE_CACHE_DIR, IMAGE_DPI)
+        return _image_assets.prepare(image_path, width, height)
     except Exception as e:
-        print(f"Warning: Could not determine logo aspect ratio: {e}")
-        aspect_ratio = 3  # Fallback aspect ratio (typical for logos)
-    
-    logo_width = 1.5*inch
-    logo_height = logo_width / aspect_ratio
-    
-    # Position the logo at the top of the page
-    # The y-coordinate is calculated as: page height - top margin - logo height
-    canvas.drawImage(logo_path, 1*inch, doc.height + 0.5*inch, 
-                    width=logo_width, height=logo_height, preserveAspectRatio=True)
+        print(f"Warning: Could not prepare image {image_path}: {e}")
+        return image_path
+
+# Name of the form XObject holding the header and footer of content pages
+PAGE_CHROME_FORM = "pageChrome"
+
+def draw_page_chrome(canvas, doc):
+    """Draw the header and footer shared by every page except the page number.
+
+    The drawing is recorded once per document as a form XObject that each page
+    then references, so the logo, text and rules are emitted a single time.
+    """
+    if not canvas.hasForm(PAGE_CHROME_FORM):
+        from reportlab.lib import colors
+        metadata = getattr(doc, 'report_metadata', DEFAULT_METADATA)
+        canvas.beginForm(PAGE_CHROME_FORM)
+        
+        # Add logo - only specify width to maintain aspect ratio
+        logo_width = 1.5*inch
+        logo_height = logo_width / get_image_aspect_ratio(HEADER_LOGO_PATH, 3)
+        
+        # Position the logo at the top of the page
+        canvas.drawImage(prepare_image(HEADER_LOGO_PATH, logo_width, logo_height), 1*inch, doc.height + 0.5*inch, 
+                        width=logo_width, height=logo_height, preserveAspectRatio=True)
+        
+        # Add title next to the logo
+        canvas.setFont(FONT_NAME, 12)
+        canvas.drawString(3*inch, doc.height + 0.25*inch, metadata['title'])
+        
+        # Add date on the right side of the header
+        canvas.setFont(FONT_NAME, 9)
+        canvas.drawRightString(doc.width + 1*inch - 0.5*inch, doc.height + 0.25*inch, metadata['date'])
+        
+        # Add horizontal line below the header
+        canvas.setStrokeColor(colors.lightgrey)
+        canvas.line(1*inch, doc.height - 0.2*inch, doc.width + 1*inch - 0.5*inch, doc.height - 0.2*inch)
+        canvas.line(1*inch, 0.8*inch, doc.width + 1*inch - 0.5*inch, 0.8*inch)
+        
+        # Add footer with disclaimer
+        canvas.setFont(FONT_NAME, 7)
+        canvas.setFillColor(colors.darkgrey)
+        canvas.drawCentredString(doc.width / 2 + 1*inch, 0.3*inch, "Confidential - For internal use only. LLMQuant © 2024")
+        
+        canvas.endForm()
     
-    # Add title next to the logo
-    canvas.setFont(FONT_NAME, 12)
-    canvas.drawString(3*inch, doc.height + 0.25*inch, "LLMQuant Financial Report")
+    canvas.saveState()
+    canvas.doForm(PAGE_CHROME_FORM)
     
-    # Add date on the right side of the header
-    canvas.setFont(FONT_NAME, 9)
-    canvas.drawRightString(doc.width + 1*inch - 0.5*inch, doc.height + 0.25*inch, "February 2024")
+    # Parts rendered in parallel get their page numbers after the merge
+    if getattr(doc, 'page_numbers', True):
+        draw_page_number(canvas, doc, canvas.getPageNumber())
     
-    # Add page number
+    canvas.restoreState()
+
+def draw_page_number(canvas, doc, page_num):
+    """Draw the page number in the footer."""
     canvas.setFont(FONT_NAME, 9)
-    page_num = canvas.getPageNumber()
     canvas.drawRightString(doc.width + 1*inch - 0.5*inch, 0.5*inch, f"Page {page_num}")
-    
-    # Add horizontal line below the header
-    canvas.setStrokeColor(colors.lightgrey)
-    canvas.line(1*inch, doc.height - 0.2*inch, doc.width + 1*inch - 0.5*inch, doc.height - 0.2*inch)
-    canvas.line(1*inch, 0.8*inch, doc.width + 1*inch - 0.5*inch, 0.8*inch)
-    
-    # Add footer with disclaimer
-    canvas.setFont(FONT_NAME, 7)
-    canvas.setFillColor(colors.darkgrey)
-    canvas.drawCentredString(doc.width / 2 + 1*inch, 0.3*inch, "Confidential - For internal use only. LLMQuant © 2024")
-    
-    canvas.restoreState()
+
+def append_block_flowables(block, translated, styles, english_content, chinese_content, toc=None,
+                           available_width=CONTENT_WIDTH, index=None, estimate=False):
+    """Append the English and Chinese flowables for one IR block.
+
+    ``translated`` maps each (escaped) source segment to its translation.
+    Either content list may be None to lay out only one language. Headings
+    are also added to ``toc`` when given; ``index`` (the block's position in
+    the document) names their bookmark. With ``estimate`` images are sized
+    from their headers and stood in for by spacers, so none is prepared.
+    """
+    import document_ir
+    from reportlab.platypus import Image, Spacer
+    from cjk_linebreak import CJKParagraph as Paragraph
+    from report_tables import analyze_table, build_table
+    
+    if isinstance(block, document_ir.Heading):
+        # Headers
+        text = clean_html(block.text)
+        
+        # Determine header level and style
+        if block.level == 1:
+            style_name = 'CustomHeading1'
+            level = 0
+        else:
+            style_name = 'CustomHeading2'
+            level = 1
+        
+        if english_content is not None:
+            english_text = translated[text]
+            
+            # Add bookmark for TOC
+            bookmark_name = f"section-en-{len(english_content) if index is None else index}"
+            
+            heading = Paragraph(f'<a name="{bookmark_name}"/>{english_text}', styles[style_name + 'En'])
+            heading.toc_entry = (level, english_text, bookmark_name)
+            english_content.append(heading)
+            
+            # Seed the TOC; the page number is filled in when the heading is laid out
+            if toc is not None:
+                toc.addEntry(level, english_text, 0, bookmark_name)
+            
+            # Add some space after headers
+            english_content.append(Spacer(1, 0.2*inch))
+        
+        if chinese_content is not None:
+            chinese_content.append(Paragraph(text, styles[style_name]))
+            chinese_content.append(Spacer(1, 0.2*inch))
+        
+    elif isinstance(block, (document_ir.Paragraph, document_ir.Quote)):
+        # Paragraphs; italic paragraphs and block quotes use the quote style
+        text = clean_html(block.text)
+        if isinstance(block, document_ir.Quote) or block.emphasized:
+            english_style, chinese_style = 'CustomQuoteEn', 'CustomQuote'
+        else:
+            english_style, chinese_style = 'CustomEnglish', 'CustomNormal'
+        
+        if english_content is not None:
+            english_content.append(Paragraph(translated[text], styles[english_style]))
+            english_content.append(Spacer(1, 0.2*inch))
+        if chinese_content is not None:
+            chinese_content.append(Paragraph(text, styles[chinese_style]))
+            chinese_content.append(Spacer(1, 0.2*inch))
+        
+    elif isinstance(block, document_ir.ListBlock):
+        # Lists
+        for depth, item in block.items:
+            text = clean_html(item)
+            if english_content is not None:
+                english_content.append(Paragraph(f"• {translated[text]}", styles['CustomEnglish']))
+                english_content.append(Spacer(1, 0.1*inch))
+            if chinese_content is not None:
+                chinese_content.append(Paragraph(f"• {text}", styles['CustomNormal']))
+                chinese_content.append(Spacer(1, 0.1*inch))
+        
+        # Add extra space after the list
+        for content in (english_content, chinese_content):
+            if content is not None:
+                content.append(Spacer(1, 0.1*inch))
+        
+    elif isinstance(block, document_ir.Table):
+        # Tables; numeric cells are classified once from the source text
+        cells, alignments = analyze_table(block)
+        header = [clean_html(text) for text in block.header]
+        rows = [[clean_html(text) for text in row] for row in block.rows]
+        
+        if english_content is not None:
+            english_content.append(build_table(
+                [translated[text] for text in header], [[translated[text] for text in row] for row in rows],
+                cells, alignments, styles['TableHeader'], styles['TableCell'], available_width))
+            english_content.append(Spacer(1, 0.2*inch))
+        if chinese_content is not None:
+            chinese_content.append(build_table(
+                header, rows, cells, alignments, styles['TableHeader'], styles['TableCell'], available_width))
+            chinese_content.append(Spacer(1, 0.2*inch))
+        
+    elif isinstance(block, document_ir.Image):
+        # Images keep their aspect ratio and are shrunk to fit the frame; both languages share the file
+        size = get_image_size(block.src)
+        if size is None:
+            return
+        width = min(size[0] * 72 / IMAGE_SCREEN_DPI, available_width)
+        height = width * size[1] / size[0]
+        if height > IMAGE_MAX_HEIGHT:
+            width, height = IMAGE_MAX_HEIGHT * size[0] / size[1], IMAGE_MAX_HEIGHT
+        image_path = None if estimate else prepare_image(block.src, width, height)
+        
+        for content in (english_content, chinese_content):
+            if content is not None:
+                content.append(Spacer(width, height) if estimate else Image(image_path, width=width, height=height))
+                content.append(Spacer(1, 0.2*inch))
+
+def add_page_header(canvas, doc):
+    """Add logo and title to each page."""
+    # Skip for the first page (cover page) and TOC page
+    if doc.page == 1 or doc.page == 2:
+        return
+    draw_page_chrome(canvas, doc)
 
 def add_toc_header(canvas, doc):
     """Add header for table of contents page."""
-    canvas.saveState()
-    
-    # Add logo - only specify width to maintain aspect ratio
-    logo_path = "/Users/haoxue/LLMQuant_report/logo-short.png"
-    
-    # Get image dimensions using PIL
-    try:
-        with PILImage.open(logo_path) as img:
-            img_width, img_height = img.size
-            aspect_ratio = img_width / img_height
-    except Exception as e:
-        print(f"Warning: Could not determine logo aspect ratio: {e}")
-        aspect_ratio = 3  # Fallback aspect ratio (typical for logos)
-    
-    logo_width = 1.5*inch
-    logo_height = logo_width / aspect_ratio
-    
-    # Position the logo at the top of the page
-    canvas.drawImage(logo_path, 1*inch, doc.height + 0.5*inch, 
-                    width=logo_width, height=logo_height, preserveAspectRatio=True)
-    
-    # Add title next to the logo
-    canvas.setFont(FONT_NAME, 12)
-    canvas.drawString(3*inch, doc.height + 0.25*inch, "LLMQuant Financial Report")
-    
-    # Add date on the right side of the header
-    canvas.setFont(FONT_NAME, 9)
-    canvas.drawRightString(doc.width + 1*inch - 0.5*inch, doc.height + 0.25*inch, "February 2024")
-    
-    # Add page number
-    canvas.setFont(FONT_NAME, 9)
-    page_num = canvas.getPageNumber()
-    canvas.drawRightString(doc.width + 1*inch - 0.5*inch, 0.5*inch, f"Page {page_num}")
-    
-    # Add horizontal line below the header
-    canvas.setStrokeColor(colors.lightgrey)
-    canvas.line(1*inch, doc.height - 0.2*inch, doc.width + 1*inch - 0.5*inch, doc.height - 0.2*inch)
-    canvas.line(1*inch, 0.8*inch, doc.width + 1*inch - 0.5*inch, 0.8*inch)
-    
-    # Add footer with disclaimer
-    canvas.setFont(FONT_NAME, 7)
-    canvas.setFillColor(colors.darkgrey)
-    canvas.drawCentredString(doc.width / 2 + 1*inch, 0.3*inch, "Confidential - For internal use only. LLMQuant © 2024")
-    
-    canvas.restoreState()
+    draw_page_chrome(canvas, doc)
 
-def generate_pdf(input_md_path, output_pdf_path, font_path=None):
-    """Generate a PDF report from markdown content."""
-    # Register the font
-    if not register_font(font_path):
-        print("Warning: Using default font as fallback.")
-    
-    # Create styles
-    styles = create_styles()
-    
-    # Read markdown content
-    with open(input_md_path, 'r', encoding='utf-8') as file:
-        md_content = file.read()
-    
-    # Create PDF document
-    doc = SimpleDocTemplate(
-        output_pdf_path,
-        pagesize=A4,
-        leftMargin=1*inch,
-        rightMargin=1*inch,
-        topMargin=1*inch,  # Reduced top margin to accommodate the header
-        bottomMargin=1*inch
-    )
+def build_front_matter(styles, metadata, toc, estimate=False):
+    """Return the cover page and table of contents flowables.
+
+    With ``estimate`` the cover logo is stood in for by a spacer of its size.
+    """
+    from reportlab.platypus import Image, PageBreak, Spacer
+    from cjk_linebreak import CJKParagraph as Paragraph
     
-    # Create story (content)
     story = []
     
     # Add cover page with proper aspect ratio
-    cover_logo_path = "/Users/haoxue/LLMQuant_report/logo-b.png"
+    cover_logo_path = COVER_LOGO_PATH
     
-    # Get image dimensions using PIL
-    try:
-        with PILImage.open(cover_logo_path) as img:
-            img_width, img_height = img.size
-            aspect_ratio = img_width / img_height
-    except Exception as e:
-        print(f"Warning: Could not determine cover logo aspect ratio: {e}")
-        aspect_ratio = 2  # Fallback aspect ratio
+    aspect_ratio = get_image_aspect_ratio(cover_logo_path, 2)
     
     cover_width = 4*inch
     cover_height = cover_width / aspect_ratio
     
-    cover_logo = Image(cover_logo_path, width=cover_width, height=cover_height)
-    cover_logo.hAlign = 'CENTER'
+    if estimate:
+        cover_logo = Spacer(cover_width, cover_height)
+    else:
+        cover_logo = Image(prepare_image(cover_logo_path, cover_width, cover_height),
+                           width=cover_width, height=cover_height)
+        cover_logo.hAlign = 'CENTER'
     
     story.append(cover_logo)
     story.append(Spacer(1, 1*inch))
     
-    title_text = "LLMQuant Financial Report"
+    title_text = metadata['title']
     story.append(Paragraph(title_text, styles['CustomTitle']))
     story.append(Spacer(1, 0.5*inch))
     
-    subtitle_text = "Quarterly Financial Analysis"
+    subtitle_text = metadata['subtitle']
     story.append(Paragraph(subtitle_text, styles['CustomHeading2']))
     story.append(Spacer(1, 0.5*inch))
     
     # Add fiscal period
-    fiscal_text = "Fiscal Year 2025 - First Quarter"
+    fiscal_text = metadata['fiscal_period']
     story.append(Paragraph(fiscal_text, styles['CustomHeading2']))
     story.append(Spacer(1, 1.5*inch))
     
-    date_text = "February 2024"
+    date_text = metadata['date']
     story.append(Paragraph(date_text, styles['CustomNormal']))
     
     # Add confidentiality notice
@@ -501,22 +686,17 @@ def generate_pdf(input_md_path, output_pdf_path, font_path=None):
     story.append(PageBreak())
     
     # Add Table of Contents
-    toc = TableOfContents()
-    toc.levelStyles = [
-        styles['TOCEntry1'],
-        styles['TOCEntry2'],
-    ]
-    
     story.append(Paragraph("Table of Contents", styles['TOCHeading']))
     story.append(Spacer(1, 0.2*inch))
     story.append(toc)
     story.append(PageBreak())
     
-    # Convert markdown to HTML
-    html_content = markdown.markdown(md_content)
-    
-    # Parse HTML content
-    soup = BeautifulSoup(html_content, 'html.parser')
+    return story
+
+def build_summary_flowables(styles):
+    """Return the English and Chinese flowables that open each language section."""
+    from reportlab.platypus import Spacer
+    from cjk_linebreak import CJKParagraph as Paragraph
     
     # Create lists to store English and Chinese content separately
     english_content = []
@@ -592,147 +772,487 @@ def generate_pdf(input_md_path, output_pdf_path, font_path=None):
     
     chinese_content.append(Spacer(1, 0.2*inch))
     
-    # Process each element for English content
-    for element in soup.find_all(['h1', 'h2', 'h3', 'p', 'ul']):
-        if element.name in ['h1', 'h2', 'h3']:
-            # Headers
-            text = clean_html(element.get_text())
-            english_text = translate_text(text)
-            
-            # Determine header level and style
-            if element.name == 'h1':
-                style_name = 'CustomHeading1En'
-                level = 0
-            else:
-                style_name = 'CustomHeading2En'
-                level = 1
-            
-            # Add bookmark for TOC
-            bookmark_name = f"section-en-{len(english_content)}"
-            
-            # Add English header with bookmark
-            para = Paragraph(english_text, styles[style_name])
-            english_content.append(para)
-            
-            # Add to TOC
-            toc.addEntry(level, english_text, bookmark_name)
-            
-            # Add some space after headers
-            english_content.append(Spacer(1, 0.2*inch))
-            
-        elif element.name == 'p':
-            # Paragraphs
-            text = clean_html(element.get_text())
-            english_text = translate_text(text)
-            
-            # Determine if this is a quote
-            if element.find('em'):
-                style_name = 'CustomQuoteEn'
-            else:
-                style_name = 'CustomEnglish'
-            
-            # Add English paragraph
-            english_content.append(Paragraph(english_text, styles[style_name]))
-            english_content.append(Spacer(1, 0.2*inch))
-            
-        elif element.name == 'ul':
-            # Lists
-            for li in element.find_all('li'):
-                text = clean_html(li.get_text())
-                english_text = f"• {translate_text(text)}"
-                
-                # Add English list item
-                english_content.append(Paragraph(english_text, styles['CustomEnglish']))
-                english_content.append(Spacer(1, 0.1*inch))
-            
-            # Add extra space after the list
-            english_content.append(Spacer(1, 0.1*inch))
-    
-    # Process each element for Chinese content
-    for element in soup.find_all(['h1', 'h2', 'h3', 'p', 'ul']):
-        if element.name in ['h1', 'h2', 'h3']:
-            # Headers
-            text = clean_html(element.get_text())
-            
-            # Determine header level and style
-            if element.name == 'h1':
-                style_name = 'CustomHeading1'
-                level = 0
-            else:
-                style_name = 'CustomHeading2'
-                level = 1
-            
-            # Add bookmark for TOC
-            bookmark_name = f"section-cn-{len(chinese_content)}"
-            
-            # Add Chinese header with bookmark
-            para = Paragraph(text, styles[style_name])
-            chinese_content.append(para)
-            
-            # Add some space after headers
-            chinese_content.append(Spacer(1, 0.2*inch))
-            
-        elif element.name == 'p':
-            # Paragraphs
-            text = clean_html(element.get_text())
-            
-            # Determine if this is a quote
-            if element.find('em'):
-                style_name = 'CustomQuote'
-            else:
-                style_name = 'CustomNormal'
-            
-            # Add Chinese paragraph
-            chinese_content.append(Paragraph(text, styles[style_name]))
-            chinese_content.append(Spacer(1, 0.2*inch))
-            
-        elif element.name == 'ul':
-            # Lists
-            for li in element.find_all('li'):
-                text = f"• {clean_html(li.get_text())}"
-                
-                # Add Chinese list item
-                chinese_content.append(Paragraph(text, styles['CustomNormal']))
-                chinese_content.append(Spacer(1, 0.1*inch))
-            
-            # Add extra space after the list
-            chinese_content.append(Spacer(1, 0.1*inch))
+    return english_content, chinese_content
+
+def make_doc_template(output_pdf_path, metadata):
+    """Create the document template shared by full reports and their parts."""
+    from report_toc import ReportDocTemplate
     
-    # Add English content section title
-    story.append(Paragraph("English Version", styles['SectionTitle']))
-    story.append(Spacer(1, 0.3*inch))
+    doc = ReportDocTemplate(
+        output_pdf_path,
+        pagesize=A4,
+        leftMargin=1*inch,
+        rightMargin=1*inch,
+        topMargin=1*inch,  # Reduced top margin to accommodate the header
+        bottomMargin=1*inch
+    )
+    doc.report_metadata = metadata
+    return doc
+
+def make_toc(styles):
+    """Create the table of contents; entries are seeded while the content is laid out."""
+    from report_toc import ForwardTableOfContents
     
-    # Add all English content
+    toc = ForwardTableOfContents()
+    toc.levelStyles = [
+        styles['TOCEntry1'],
+        styles['TOCEntry2'],
+    ]
+    return toc
+
+def section_title_flowables(language, styles):
+    """Return the title that opens the English ('en') or Chinese ('zh') section."""
+    from reportlab.platypus import Spacer
+    from cjk_linebreak import CJKParagraph as Paragraph
+    
+    title = Paragraph(SECTION_TITLES[language], styles['SectionTitle'])
+    title.section_title = SECTION_TITLES[language]
+    return [title, Spacer(1, 0.3*inch)]
+
+def build_story(blocks, translated, styles, metadata, toc, estimate=False):
+    """Return the flowables of the whole report: front matter, English and Chinese sections.
+
+    With ``estimate`` images only take up their space (see append_block_flowables).
+    """
+    from reportlab.platypus import PageBreak
+    
+    # Create story (content)
+    story = build_front_matter(styles, metadata, toc, estimate)
+    
+    # Executive summaries and highlights open both language sections
+    english_content, chinese_content = build_summary_flowables(styles)
+    
+    # Lay out both languages from the IR in a single pass
+    for index, block in enumerate(blocks):
+        append_block_flowables(block, translated, styles, english_content, chinese_content, toc, index=index,
+                               estimate=estimate)
+    
+    # Add English content section title and all English content
+    story.extend(section_title_flowables('en', styles))
     story.extend(english_content)
     
     # Add page break before Chinese content
     story.append(PageBreak())
     
-    # Add Chinese content section title
-    story.append(Paragraph("中文版", styles['SectionTitle']))
-    story.append(Spacer(1, 0.3*inch))
-    
-    # Add all Chinese content
+    # Add Chinese content section title and all Chinese content
+    story.extend(section_title_flowables('zh', styles))
     story.extend(chinese_content)
+    return story
+
+def render_story(blocks, translated, output_pdf_path, styles, metadata, profiler=None):
+    """Lay out the whole report in this process and write it to ``output_pdf_path``."""
+    from paragraph_cache import CachedParagraph
+    
+    if profiler is None:
+        profiler = PipelineProfiler()
+    doc = make_doc_template(output_pdf_path, metadata)
+    toc = make_toc(styles)
+    
+    # Identical paragraphs reuse parsed markup and line breaks (see paragraph_cache.py)
+    cache = CachedParagraph.cache
+    cache_before = cache.stats() if cache is not None else None
+    
+    with profiler.stage('story'):
+        story = build_story(blocks, translated, styles, metadata, toc)
+    profiler.count('flowables', len(story))
+    
+    # Build PDF with custom page layout; Paragraph wrapping happens here too
+    with profiler.stage('layout'):
+        passes = doc.multiBuild(story, onFirstPage=add_page_header, onLaterPages=add_page_header)
+    profiler.count('layout_passes', passes)
+    profiler.count('pages', doc.page)
+    if cache_before is not None:
+        cache_after = cache.stats()
+        for name in ('parse_hits', 'parse_misses', 'hits', 'misses'):
+            profiler.count(f'paragraph_cache_{name}', cache_after[name] - cache_before[name])
+    return doc
+
+class PDFBuffer:
+    """Write target that keeps the byte strings ReportLab writes instead of copying them."""
     
-    # Build PDF with custom page layout
-    doc.build(story, onFirstPage=add_page_header, onLaterPages=add_page_header)
+    name = '<memory>'
     
-    print(f"PDF report generated successfully: {output_pdf_path}")
+    def __init__(self):
+        self.chunks = []
+    
+    def write(self, data):
+        self.chunks.append(data)
+        return len(data)
+    
+    def size(self):
+        return sum(len(chunk) for chunk in self.chunks)
+
+def read_markdown(source):
+    """Return markdown text given as a string or as a text or binary file object."""
+    if hasattr(source, 'read'):
+        source = source.read()
+    if isinstance(source, bytes):
+        source = source.decode('utf-8')
+    return source
+
+def write_stream(chunks, output, chunk_size=None):
+    """Write byte strings to a binary stream, in slices of at most ``chunk_size`` bytes if given."""
+    for data in chunks:
+        view = memoryview(data)
+        step = chunk_size or len(view)
+        while view:
+            count = output.write(view[:step])
+            # Raw streams, such as an unbuffered stdout, may take fewer bytes than offered
+            view = view[step if count is None else count:]
+    output.flush()
+
+def report_cache_key(md_hash, font_path, styles, metadata, translation_backend=None, layout='single'):
+    """Return the output cache key covering every input that affects the PDF."""
+    from font_cache import content_fingerprint
+    
+    font_path = resolve_font_path(font_path)
+    font_stat = os.stat(font_path) if os.path.exists(font_path) else None
+    return OutputCache.make_key(
+        md_hash,
+        glossary_version(translations),
+        style_fingerprint(styles),
+        font_path,
+        (font_stat.st_size, font_stat.st_mtime_ns, content_fingerprint(font_path)) if font_stat else 'missing',
+        hash_file(COVER_LOGO_PATH),
+        hash_file(HEADER_LOGO_PATH),
+        sorted(metadata.items()),
+        IMAGE_DPI,
+        translation_backend.fingerprint() if translation_backend is not None else None,
+        layout,
+        reportlab.Version,
+        [hash_file(path) for path in GENERATOR_SOURCES],
+    )
+
+def generate_pdf(input_md_path, output_pdf_path, font_path=None,
+                 translation_memory_path=TRANSLATION_MEMORY_PATH, translation_backend=None,
+                 metadata=None, styles=None, output_cache_dir=OUTPUT_CACHE_DIR, force=False,
+                 workers=None, split_chapters=False, stream=False, profiler=None, markdown=None,
+                 chunk_size=None, incremental=False, chapter_cache_dir=CHAPTER_CACHE_DIR, optimize=False,
+                 linearize=False, update_translation_memory=True, image_dir=None):
+    """Generate a PDF report from markdown content.
+
+    Translated segments are cached in the translation memory at
+    ``translation_memory_path``; pass None to translate everything afresh,
+    or set ``update_translation_memory`` to False to only look them up.
+    ``translation_backend`` is a TranslationBackend used for segments not in
+    the memory; the compiled glossary is used when it is None.
+    ``metadata`` overrides keys of DEFAULT_METADATA for the cover and header,
+    and ``styles`` lets long-running callers reuse the result of create_styles().
+    Unless ``force`` is set, a PDF rendered earlier from identical inputs is
+    copied from ``output_cache_dir`` instead of being rebuilt (None disables
+    the cache). With ``workers`` > 1 the language sections, and with
+    ``split_chapters`` every chapter, are laid out in parallel processes and
+    merged (see parallel_render.py). With ``stream`` the input is read,
+    translated and laid out one chunk at a time so that memory stays bounded
+    (see streaming_render.py). With ``incremental`` every chapter is laid out
+    separately and only chapters changed since earlier renders, whose parts
+    are kept in ``chapter_cache_dir``, are rebuilt (see incremental_render.py). With
+    ``optimize`` the written PDF is made smaller, at the cost of some time
+    (see pdf_optimize.py). With ``linearize`` it is written for fast
+    web view, so that viewers show the first page before the rest has been
+    downloaded (see pdf_linearize.py). Each stage is timed with ``profiler``, a
+    PipelineProfiler (see pipeline_profile.py), when one is given.
+    
+    ``output_pdf_path`` may also be a writable binary file object, and
+    ``markdown`` text or a file object may be given instead of
+    ``input_md_path``; see write_pdf. Relative image paths are taken from
+    the input file's directory, or for ``markdown`` from ``image_dir`` (the
+    current directory when None).
+    """
+    if profiler is None:
+        profiler = PipelineProfiler()
+    if stream and markdown is not None:
+        raise ValueError("stream mode reads the markdown from input_md_path")
+    if stream and incremental:
+        raise ValueError("stream and incremental modes cannot be combined")
+    to_stream = hasattr(output_pdf_path, 'write')
+    output_name = getattr(output_pdf_path, 'name', type(output_pdf_path).__name__) if to_stream else output_pdf_path
+    
+    with profiler.stage('setup'):
+        # Register the font
+        if not register_font(font_path):
+            print("Warning: Using default font as fallback.")
+        
+        # Create styles
+        if styles is None:
+            styles = create_styles()
+    
+    metadata = {**DEFAULT_METADATA, **(metadata or {})}
+    
+    # Relative image paths are taken from the markdown file's directory, or image_dir for markdown text
+    base_dir = os.path.dirname(os.path.abspath(input_md_path)) if markdown is None else image_dir
+    
+    # Read markdown content; streaming renders never hold the whole file
+    md_content = None
+    if not stream:
+        with profiler.stage('read'):
+            if markdown is not None:
+                md_content = read_markdown(markdown)
+            else:
+                with open(input_md_path, 'r', encoding='utf-8') as file:
+                    md_content = file.read()
+        profiler.count('input_chars', len(md_content))
+    
+    # Reuse an earlier render when none of the inputs have changed
+    output_cache = None
+    if output_cache_dir:
+        with profiler.stage('cache_lookup'):
+            output_cache = OutputCache(output_cache_dir)
+            if stream:
+                layout = 'stream'
+            elif incremental:
+                layout = 'incremental'
+            else:
+                layout = 'chapters' if split_chapters else ('sections' if workers and workers > 1 else 'single')
+            if optimize:
+                layout += '-optimized'
+            if linearize:
+                layout += '-linearized'
+            import document_ir
+            if stream:
+                md_hash = hash_file(input_md_path)
+                with open(input_md_path, 'r', encoding='utf-8') as file:
+                    image_paths = [path for line in file for path in document_ir.referenced_images(line, base_dir)]
+            else:
+                md_hash = hash_text(md_content)
+                image_paths = document_ir.referenced_images(md_content, base_dir)
+            # Images referenced from the markdown are inputs as well
+            if image_paths:
+                md_hash = OutputCache.make_key(md_hash, *[hash_file(path) for path in image_paths])
+            cache_key = report_cache_key(md_hash, font_path, styles, metadata, translation_backend, layout)
+            cache_hit = not force and output_cache.fetch(cache_key, output_pdf_path)
+        if cache_hit:
+            profiler.count('cache_hits', 1)
+            print(f"PDF report unchanged, copied from cache: {output_name}")
+            return
+    
+    import document_ir
+    from translation_backend import BatchTranslator, GlossaryBackend
+    from translation_memory import TranslationMemory
+    
+    # Compile the glossary once per process, or again when it changed
+    translator = get_translator()
+    backend = translation_backend or GlossaryBackend(translator)
+    
+    # Streams get the PDF from memory, or from a temporary file when parts are merged or it is rewritten
+    tmp_dir = None
+    target = output_pdf_path
+    if to_stream:
+        if stream or incremental or (workers and workers > 1) or split_chapters or optimize or linearize:
+            import tempfile
+            tmp_dir = tempfile.TemporaryDirectory(prefix="llmquant-output-")
+            target = os.path.join(tmp_dir.name, "report.pdf")
+        else:
+            target = PDFBuffer()
+    
+    memory = None
+    try:
+        if translation_memory_path:
+            memory = TranslationMemory(translation_memory_path, glossary_version(translations),
+                                       backend=backend.fingerprint(), read_only=not update_translation_memory)
+        
+        if stream:
+            # Parse, translate and lay out one chunk at a time
+            from streaming_render import render_streaming
+            with profiler.stage('render'):
+                parts = render_streaming(input_md_path, target, backend, memory=memory, styles=styles,
+                                         metadata=metadata)
+            profiler.count('parts', parts)
+        elif incremental:
+            # Parse, translate and lay out only the chapters that changed
+            from incremental_render import render_incremental
+            with profiler.stage('render'):
+                stats = render_incremental(md_content, target, backend, memory=memory, styles=styles,
+                                           metadata=metadata, font_path=font_path,
+                                           translation_backend=translation_backend,
+                                           cache_dir=chapter_cache_dir, base_dir=base_dir)
+            for name in ('parts', 'reused_parts', 'body_pages', 'reused_body_pages', 'segments',
+                         'translation_memory_hits', 'translated_segments'):
+                profiler.count(name, stats[name])
+        else:
+            # Parse markdown straight into the document IR
+            with profiler.stage('parse'):
+                blocks = document_ir.parse_markdown(md_content, base_dir=base_dir)
+                
+                # Collect every segment up front so the backend can translate them in batches
+                segments = [clean_html(text) for text in document_ir.iter_segments(blocks)]
+            profiler.count('blocks', len(blocks))
+            
+            with profiler.stage('translate'):
+                batch_translator = BatchTranslator(backend, memory=memory)
+                translated = batch_translator.translate(segments)
+            profiler.count('segments', batch_translator.stats['segments'])
+            profiler.count('unique_segments', batch_translator.stats['unique'])
+            profiler.count('translation_memory_hits', batch_translator.stats['cached'])
+            
+            if (workers and workers > 1) or split_chapters:
+                # Lay out the sections in worker processes and merge the parts
+                from parallel_render import render_parallel
+                with profiler.stage('render'):
+                    parts = render_parallel(blocks, translated, target, font_path=font_path,
+                                            metadata=metadata, styles=styles, workers=workers,
+                                            split_chapters=split_chapters)
+                profiler.count('parts', parts)
+            else:
+                render_story(blocks, translated, target, styles, metadata, profiler)
+        
+        if linearize:
+            # The first page's objects and hint tables go first, optimized on the way if asked for
+            from pdf_linearize import check_linearization, linearize_pdf
+            with profiler.stage('linearize'):
+                before, after = linearize_pdf(target, optimize=optimize)
+                problems = check_linearization(target)
+            print(f"Linearized PDF: {before / 1024:.0f} KB -> {after / 1024:.0f} KB")
+            for problem in problems:
+                print(f"Warning: linearization check failed: {problem}")
+        elif optimize:
+            # Compact the fonts, share identical streams, pack objects into object streams and recompress
+            from pdf_optimize import optimize_pdf
+            with profiler.stage('optimize'):
+                before, after = optimize_pdf(target)
+            print(f"Optimized PDF: {before / 1024:.0f} KB -> {after / 1024:.0f} KB")
+        
+        if memory is not None:
+            stats = memory.stats()
+            print(f"Translation memory: {stats['hits']} hits, {stats['misses']} misses, "
+                  f"{stats['entries']} entries")
+        
+        if to_stream:
+            # ReportLab's buffer is handed out in slices, so the PDF is not copied whole again
+            with profiler.stage('write'):
+                if isinstance(target, PDFBuffer):
+                    write_stream(target.chunks, output_pdf_path, chunk_size)
+                else:
+                    with open(target, 'rb') as f:
+                        write_stream(iter(lambda: f.read(chunk_size or COPY_CHUNK_SIZE), b''), output_pdf_path)
+        
+        if output_cache is not None:
+            with profiler.stage('cache_store'):
+                if isinstance(target, PDFBuffer):
+                    output_cache.store_data(cache_key, target.chunks)
+                else:
+                    output_cache.store(cache_key, target)
+        
+        profiler.count('output_bytes', target.size() if isinstance(target, PDFBuffer) else os.path.getsize(target))
+    finally:
+        # Also after a failed render, so that the memory's write lock is not kept
+        if memory is not None:
+            memory.close()
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+    print(f"PDF report generated successfully: {output_name}")
+
+def write_pdf(markdown, output, font_path=None, chunk_size=None, **options):
+    """Render a report from markdown in memory to a binary stream.
+    
+    ``markdown`` is the report's text, or a text or binary file object to
+    read it from. ``output`` is any writable binary file object: a BytesIO,
+    an open file, ``sys.stdout.buffer`` or a socket's ``makefile('wb')``.
+    The PDF is laid out in memory and written with one ``write`` call, or,
+    with ``chunk_size``, in slices of that many bytes taken straight from
+    ReportLab's buffer. Other keyword arguments are those of generate_pdf,
+    except ``stream``, which reads its input from a file.
+    """
+    generate_pdf(None, output, font_path, markdown=markdown, chunk_size=chunk_size, **options)
+
+def parse_args(argv=None):
+    """Parse the command line of the report generator."""
+    parser = argparse.ArgumentParser(description="Generate the bilingual LLMQuant PDF report.")
+    parser.add_argument("font_path", nargs="?", default=None, help="font file (TTF or TTC) to use")
+    parser.add_argument("--input", default=os.path.join(PROJECT_DIR, "input.md"),
+                        help="markdown input file, or - for stdin")
+    parser.add_argument("--output", default=os.path.join(PROJECT_DIR, "output", "LLMQuant_Report.pdf"),
+                        help="PDF output file, or - for stdout")
+    parser.add_argument("--force", action="store_true", help="re-render even if a cached PDF matches the inputs")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="lay out the language sections in this many processes and merge them")
+    parser.add_argument("--split-chapters", action="store_true",
+                        help="with --workers, also lay out each chapter separately (chapters start on a new page)")
+    parser.add_argument("--stream", action="store_true",
+                        help="read, translate and lay out the input in chunks to bound memory use")
+    parser.add_argument("--incremental", action="store_true",
+                        help="lay out each chapter separately and rebuild only the chapters that changed "
+                             "(chapters start on a new page)")
+    parser.add_argument("--optimize", action="store_true",
+                        help="make the PDF smaller: fonts without hinting, shared streams, object streams")
+    parser.add_argument("--linearize", action="store_true",
+                        help="write a linearized PDF (fast web view) that viewers can show before it has downloaded")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and render again whenever the markdown, glossary or logos change")
+    parser.add_argument("--timings", metavar="JSON",
+                        help="write the wall time, CPU time and counts of each stage to this JSON file")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="with --timings, also record each stage's peak allocation (slower)")
+    parser.add_argument("--profile", metavar="PSTATS", help="write a cProfile dump of the run to this file")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="print the estimated page count, section pages and layout warnings as JSON "
+                             "instead of writing the PDF")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
-    input_md_path = "/Users/haoxue/LLMQuant_report/input.md"
-    output_pdf_path = "/Users/haoxue/LLMQuant_report/output/LLMQuant_Report.pdf"
+    args = parse_args()
+    input_md_path = args.input
+    output_pdf_path = args.output
+    
+    # "-" reads the markdown from stdin and writes the PDF to stdout
+    markdown = None
+    if input_md_path == '-':
+        input_md_path, markdown = None, sys.stdin.buffer
+    chunk_size = None
+    if output_pdf_path == '-':
+        output_pdf_path, chunk_size = sys.stdout.buffer, COPY_CHUNK_SIZE
+        # Progress messages go to stderr so that they do not end up in the PDF
+        sys.stdout = sys.stderr
     
     # Check if a custom font path is provided as a command-line argument
-    font_path = None
-    if len(sys.argv) > 1:
-        font_path = sys.argv[1]
-        if not os.path.exists(font_path):
-            print(f"Warning: Font file not found at {font_path}. Will use default font.")
-            font_path = None
+    font_path = args.font_path
+    if font_path and not os.path.exists(font_path):
+        print(f"Warning: Font file not found at {font_path}. Will use default font.")
+        font_path = None
+    
+    if args.dry_run:
+        # Paginate without drawing and report the layout summary
+        import contextlib
+        from layout_estimate import estimate_layout
+        # Keep stdout for the JSON; progress messages go to stderr
+        with contextlib.redirect_stdout(sys.stderr):
+            summary = estimate_layout(input_md_path, font_path, markdown=markdown)
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        raise SystemExit(0)
+    
+    if args.watch:
+        if markdown is not None or chunk_size is not None:
+            raise SystemExit("--watch needs files for --input and --output")
+        os.makedirs(os.path.dirname(os.path.abspath(output_pdf_path)), exist_ok=True)
+        # Render again after every change, in this warm process
+        from watch_render import watch
+        watch(input_md_path, output_pdf_path, font_path, force=args.force, workers=args.workers,
+              split_chapters=args.split_chapters, stream=args.stream, incremental=args.incremental,
+              optimize=args.optimize, linearize=args.linearize)
+        raise SystemExit(0)
     
     # Ensure output directory exists
-    os.makedirs(os.path.dirname(output_pdf_path), exist_ok=True)
-    
-    generate_pdf(input_md_path, output_pdf_path, font_path) 
\ No newline at end of file
+    if chunk_size is None:
+        os.makedirs(os.path.dirname(os.path.abspath(output_pdf_path)), exist_ok=True)
+    
+    profiler = PipelineProfiler(trace_memory=args.trace_memory)
+    cprofile = None
+    if args.profile:
+        import cProfile
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+    
+    generate_pdf(input_md_path, output_pdf_path, font_path, force=args.force,
+                 workers=args.workers, split_chapters=args.split_chapters, stream=args.stream,
+                 profiler=profiler, markdown=markdown, chunk_size=chunk_size, incremental=args.incremental,
+                 optimize=args.optimize, linearize=args.linearize)
+    
+    if cprofile is not None:
+        cprofile.disable()
+        cprofile.dump_stats(args.profile)
+        print(f"Profile written to {args.profile} (view with: python -m pstats {args.profile})")
+    profiler.stop()
+    if args.timings:
+        profiler.write_json(args.timings)
+        print(profiler.summary())
+        print(f"Stage timings written to {args.timings}")
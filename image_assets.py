@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Downsample and recompress the images embedded in reports, with a disk cache.
+
+ReportLab embeds images at their full resolution. A 1500 pixel wide logo
+drawn 1.5 inches wide, or a chart screenshot scaled into the text frame,
+carries far more pixels than print needs. ImageAssetCache resizes each
+image to ``dpi`` pixels per inch of the size it is placed at. It never
+enlarges an image. The result is encoded as a JPEG when the image is a
+photograph-like picture without transparency, and as an optimized PNG
+otherwise. An image that needs no resizing keeps its original bytes when
+recompressing does not make it smaller.
+
+Entries are keyed by the image's content hash, the target pixel size and
+the encoder settings, so a renamed or copied image is a cache hit and an
+edited one is not. The directory is bounded by total size and entry count,
+evicting the least recently used images first. Within a process, each
+(file, placed size) is looked up once, so logos drawn on every page and
+images repeated across a batch are processed a single time.
+
+Usage:
+    cache = ImageAssetCache(".cache/images")
+    path = cache.prepare("chart.png", width=6 * 72, height=4 * 72)
+"""
+
+import math
+import os
+import shutil
+
+from output_cache import OutputCache, hash_file
+
+DEFAULT_DPI = 150
+DEFAULT_MAX_BYTES = 256 * 1024 ** 2
+DEFAULT_MAX_ENTRIES = 2000
+JPEG_QUALITY = 85
+
+# Images with at most this many colors, such as logos and charts, compress better as PNG
+PNG_MAX_COLORS = 256
+
+def target_size(pixel_size, width, height, dpi=DEFAULT_DPI):
+    """Return the pixel size for an image placed at ``width`` x ``height`` points, never enlarging it."""
+    pixel_width, pixel_height = pixel_size
+    scale = min(1.0, max(width * dpi / 72 / pixel_width, height * dpi / 72 / pixel_height))
+    return max(1, math.ceil(pixel_width * scale)), max(1, math.ceil(pixel_height * scale))
+
+
+def _has_alpha(img):
+    return img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info)
+
+
+def encode_image(source_path, output_path, width, height, dpi=DEFAULT_DPI):
+    """Write ``source_path`` resized for ``width`` x ``height`` points to ``output_path``.
+
+    Returns the format written, 'JPEG' or 'PNG'.
+    """
+    from PIL import Image as PILImage
+
+    with PILImage.open(source_path) as img:
+        img.load()
+        size = target_size(img.size, width, height, dpi)
+        if _has_alpha(img):
+            img = img.convert('RGBA')
+            image_format = 'PNG'
+        else:
+            img = img.convert('RGB')
+            image_format = 'PNG' if img.getcolors(PNG_MAX_COLORS) else 'JPEG'
+        if size != img.size:
+            img = img.resize(size, PILImage.LANCZOS)
+
+        if image_format == 'JPEG':
+            img.save(output_path, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+        else:
+            # Few colors: a palette keeps the PNG small, and ReportLab embeds it as indexed color
+            colors = img.getcolors(PNG_MAX_COLORS)
+            if colors and img.mode == 'RGB':
+                img = img.quantize(len(colors))
+            img.save(output_path, 'PNG', optimize=True)
+    return image_format
+
+
+class ImageAssetCache:
+    """Directory of images prepared for the size they are drawn at."""
+
+    def __init__(self, cache_dir, dpi=DEFAULT_DPI, max_bytes=DEFAULT_MAX_BYTES, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.dpi = dpi
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.stats = {'prepared': 0, 'cached': 0, 'reused': 0, 'original_bytes': 0, 'output_bytes': 0}
+        # (path, mtime, size, placed size) -> prepared path, for this process
+        self._prepared = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def prepare(self, path, width, height):
+        """Return the path of ``path`` prepared to be drawn at ``width`` x ``height`` points."""
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, round(width, 2), round(height, 2))
+        prepared = self._prepared.get(memo_key)
+        if prepared is not None and os.path.exists(prepared):
+            self.stats['reused'] += 1
+            return prepared
+
+        from PIL import Image as PILImage
+
+        with PILImage.open(path) as img:
+            pixel_size = img.size
+        size = target_size(pixel_size, width, height, self.dpi)
+        key = OutputCache.make_key(hash_file(path), size, self.dpi, JPEG_QUALITY, PILImage.__version__)
+
+        prepared = self._fetch(key)
+        if prepared is not None:
+            self.stats['cached'] += 1
+        else:
+            prepared = self._store(key, path, width, height, resized=size != pixel_size)
+            self.stats['prepared'] += 1
+            self.stats['original_bytes'] += stat.st_size
+            self.stats['output_bytes'] += os.path.getsize(prepared)
+            self.evict()
+        self._prepared[memo_key] = prepared
+        return prepared
+
+    def _fetch(self, key):
+        for extension in ('png', 'jpg'):
+            cached = os.path.join(self.cache_dir, f"{key}.{extension}")
+            if os.path.exists(cached):
+                # Recency for eviction is the cached file's mtime
+                os.utime(cached)
+                return cached
+        return None
+
+    def _store(self, key, path, width, height, resized):
+        tmp_path = os.path.join(self.cache_dir, f"{key}.{os.getpid()}.tmp")
+        image_format = encode_image(path, tmp_path, width, height, self.dpi)
+        extension = 'jpg' if image_format == 'JPEG' else 'png'
+
+        # An image that needed no resizing is kept as it was when recompressing did not shrink it
+        original_extension = os.path.splitext(path)[1].lower().lstrip('.')
+        if (not resized and original_extension in ('png', 'jpg', 'jpeg')
+                and os.path.getsize(path) <= os.path.getsize(tmp_path)):
+            shutil.copyfile(path, tmp_path)
+            extension = 'png' if original_extension == 'png' else 'jpg'
+
+        cached = os.path.join(self.cache_dir, f"{key}.{extension}")
+        os.replace(tmp_path, cached)
+        return cached
+
+    def evict(self):
+        """Delete least recently used images until the size and count limits hold."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(('.png', '.jpg')):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        while entries and (total > self.max_bytes or len(entries) > self.max_entries):
+            _, size, path = entries.pop(0)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        if removed:
+            # Prepared paths of this process may point at evicted files
+            self._prepared = {key: value for key, value in self._prepared.items() if os.path.exists(value)}
+        return removed
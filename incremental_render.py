@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Rebuild only the chapters of a report that changed since the last render.
+
+The markdown is cut at every ``#``/``##`` heading into chapters, and each
+chapter is laid out into its own part PDF per language, as the parallel
+renderer lays out its parts (see parallel_render.py). Each part is kept in
+a ChapterCache under a fingerprint of the chapter's source and of
+everything else that affects its layout: the glossary, styles, font, logos,
+metadata, layout code and the images the chapter shows. The cache stores the part's pages and
+headings and, for English parts, the chapter's translations.
+
+On the next render, chapters whose fingerprint is cached are neither
+parsed, translated nor laid out. Only changed chapters are. The cover and
+table of contents are then laid out again, and the parts are merged, which
+renumbers the pages after an edited chapter and points the TOC and outline
+at their new pages. Laid-out parts stand in for the chapters' flowables,
+which cannot be kept across processes.
+
+As with ``--split-chapters``, each chapter starts on a new page, and
+markdown constructs that span chapters, such as reference-style link
+definitions, are not resolved across them.
+
+Usage:
+    python generate_report_simple.py --incremental --input input.md
+"""
+
+import json
+import os
+import re
+import shutil
+import tempfile
+
+import document_ir
+import generate_report_simple as generator
+from output_cache import OutputCache, hash_file, hash_text
+from parallel_render import assemble_report, layout_part
+from translation_backend import BatchTranslator
+
+DEFAULT_CACHE_DIR = generator.CHAPTER_CACHE_DIR
+DEFAULT_MAX_ENTRIES = 2000
+
+# Modules that lay out a part, besides generate_report_simple.py (covered by the report key)
+LAYOUT_SOURCES = [os.path.join(generator.PROJECT_DIR, name) for name in (
+    "incremental_render.py", "parallel_render.py", "document_ir.py", "translation_backend.py",
+    "report_tables.py", "report_toc.py", "cjk_linebreak.py", "paragraph_cache.py", "image_assets.py",
+)]
+
+_CHAPTER_RE = re.compile(r'#{1,2}\s')
+_FENCE_RE = re.compile(r'\s*(```|~~~)')
+
+
+def split_chapters(md_text):
+    """Split markdown before every ``#``/``##`` heading outside code fences.
+
+    Text before the first heading is a chapter of its own. Joined, the
+    chapters are the original text.
+    """
+    chapters = []
+    lines = []
+    fenced = False
+    for line in md_text.splitlines(keepends=True):
+        if _FENCE_RE.match(line):
+            fenced = not fenced
+        elif not fenced and lines and _CHAPTER_RE.match(line):
+            chapters.append(''.join(lines))
+            lines = []
+        lines.append(line)
+    if lines:
+        chapters.append(''.join(lines))
+    return chapters
+
+
+class ChapterCache:
+    """Directory of laid-out chapter parts.
+
+    Each entry is ``<key>.pdf`` with a ``<key>.json`` of the part's page
+    count, headings and translations. The directory is bounded by entry
+    count, evicting the least recently used parts first.
+    """
+
+    def __init__(self, cache_dir, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key, extension):
+        return os.path.join(self.cache_dir, f"{key}.{extension}")
+
+    def fetch(self, key):
+        """Return the cached part for ``key`` like layout_part's result, or None."""
+        pdf_path, json_path = self._path(key, 'pdf'), self._path(key, 'json')
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if not os.path.exists(pdf_path):
+            return None
+        # Recency for eviction is the JSON file's mtime
+        os.utime(json_path)
+        return {'output': pdf_path, 'pages': entry['pages'],
+                'headings': [tuple(heading) for heading in entry['headings']],
+                'translated': entry['translated']}
+
+    def store(self, key, result, translated):
+        """Add a part laid out by layout_part; returns it as ``fetch`` would."""
+        pdf_path, json_path = self._path(key, 'pdf'), self._path(key, 'json')
+        suffix = f".{os.getpid()}.tmp"
+        shutil.copyfile(result['output'], pdf_path + suffix)
+        os.replace(pdf_path + suffix, pdf_path)
+        # The JSON is written last, so an entry is only found once its PDF is complete
+        with open(json_path + suffix, 'w', encoding='utf-8') as f:
+            json.dump({'pages': result['pages'], 'headings': result['headings'], 'translated': translated},
+                      f, ensure_ascii=False)
+        os.replace(json_path + suffix, json_path)
+        return {'output': pdf_path, 'pages': result['pages'], 'headings': result['headings'],
+                'translated': translated}
+
+    def evict(self):
+        """Delete least recently used parts until the count limit holds."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                entries.append((os.stat(path).st_mtime, path))
+            except FileNotFoundError:
+                continue
+
+        entries.sort()
+        removed = 0
+        while len(entries) > self.max_entries:
+            _, path = entries.pop(0)
+            for stale in (path, path[:-len('.json')] + '.pdf'):
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
+            removed += 1
+        return removed
+
+
+def render_incremental(md_text, output_pdf_path, backend, memory=None, styles=None, metadata=None,
+                       font_path=None, translation_backend=None, cache_dir=DEFAULT_CACHE_DIR, base_dir=None):
+    """Render ``md_text`` reusing the cached parts of unchanged chapters.
+
+    Relative image paths are taken from ``base_dir`` (see document_ir.parse_markdown).
+
+    Returns a dict counting the chapters, the parts and body pages laid out
+    or reused, and the segments of the chapters laid out. Of their distinct
+    segments, ``translation_memory_hits`` came from the translation memory
+    and ``translated_segments`` were translated by the backend.
+    """
+    metadata = {**generator.DEFAULT_METADATA, **(metadata or {})}
+    if styles is None:
+        styles = generator.create_styles()
+    cache = ChapterCache(cache_dir)
+
+    # Everything but the chapter's own source, hashed once for the whole report
+    report_key = generator.report_cache_key('chapters', font_path, styles, metadata, translation_backend,
+                                            'chapter')
+    layout_key = OutputCache.make_key(report_key, *[hash_file(path) for path in LAYOUT_SOURCES])
+
+    chapters = split_chapters(md_text)
+    stats = {'chapters': len(chapters), 'parts': 0, 'reused_parts': 0, 'body_pages': 0, 'reused_body_pages': 0,
+             'segments': 0, 'translation_memory_hits': 0, 'translated_segments': 0}
+    with tempfile.TemporaryDirectory(prefix="llmquant-incremental-") as tmp_dir:
+        results = []
+        for language in ('en', 'zh'):
+            for number, chapter in enumerate(chapters):
+                opening = number == 0
+                images = [hash_file(path) for path in document_ir.referenced_images(chapter, base_dir)]
+                key = OutputCache.make_key(layout_key, hash_text(chapter), language, opening, *images)
+                result = cache.fetch(key)
+                if result is not None:
+                    stats['reused_parts'] += 1
+                    stats['reused_body_pages'] += result['pages']
+                else:
+                    blocks = document_ir.parse_markdown(chapter, base_dir=base_dir)
+                    translated = {}
+                    if language == 'en':
+                        segments = [generator.clean_html(text) for text in document_ir.iter_segments(blocks)]
+                        batch_translator = BatchTranslator(backend, memory=memory)
+                        translated = batch_translator.translate(segments)
+                        stats['segments'] += len(segments)
+                        stats['translation_memory_hits'] += batch_translator.stats['cached']
+                        stats['translated_segments'] += (batch_translator.stats['unique']
+                                                         - batch_translator.stats['cached'])
+                    # Bookmarks are numbered within the chapter, so the part does not depend on its position
+                    result = cache.store(key, layout_part({
+                        'language': language, 'blocks': blocks, 'start': 0, 'opening': opening,
+                        'translated': translated, 'metadata': metadata,
+                        'output': os.path.join(tmp_dir, f"{language}-{number:05d}.pdf"),
+                    }, styles), translated)
+                stats['parts'] += 1
+                stats['body_pages'] += result['pages']
+                # Bookmark names must be unique across the merged parts
+                result['headings'] = [(level, text, f"{bookmark}-{number}", page)
+                                      for level, text, bookmark, page in result['headings']]
+                results.append(result)
+
+        assemble_report(results, output_pdf_path, styles, metadata, tmp_dir)
+    cache.evict()
+
+    print(f"Incremental render: reused {stats['reused_parts']} of {stats['parts']} chapter parts "
+          f"({stats['reused_body_pages']} of {stats['body_pages']} body pages), "
+          f"{stats['translated_segments']} segments translated, "
+          f"{stats['translation_memory_hits']} from the translation memory")
+    return stats
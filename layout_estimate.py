@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Estimate the layout of a report without rendering it.
+
+``estimate_layout`` runs the same pipeline as generate_pdf up to the story:
+parse, translate and build the flowables. It then paginates them by calling
+``wrap`` and ``split`` against the frame of the report's page template,
+following the rules of ReportLab's Frame and DocTemplate:
+- space before is dropped at the top of a frame and overlaps the previous
+  space after;
+- flowables that do not fit are split or moved to the next page;
+- a PageBreak always ends the page.
+Nothing is drawn, no images are embedded and no PDF is written, so the
+estimate is much cheaper than a build.
+
+The summary lists the page count, the page range of each section and
+English heading, and layout warnings:
+- flowables wider than the frame;
+- table cells whose longest word is wider than the column;
+- flowables too tall to fit on an empty page, which make a real build fail.
+
+Usage:
+    python generate_report_simple.py --dry-run [--input input.md]
+"""
+
+import html
+import io
+import os
+import re
+import time
+
+from reportlab import rl_config
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import PageBreak, Paragraph, Table
+from reportlab.platypus.frames import Frame
+
+import generate_report_simple as generator
+
+# Lines may break at spaces and between any two CJK characters
+_BREAK_RE = re.compile(r'\s+|[\u2e80-\u9fff\uf900-\ufaff\uff00-\uffef]')
+
+
+def _shorten(text, limit=40):
+    """Shorten ``text`` for warning messages."""
+    text = ' '.join(text.split())
+    return text if len(text) <= limit else text[:limit - 1] + '…'
+
+
+def _flowable_text(flowable):
+    """Return the start of a flowable's text, or its class name, for warning messages."""
+    return _shorten(flowable.getPlainText() if isinstance(flowable, Paragraph)
+                    else flowable.__class__.__name__)
+
+
+def _widest_word(paragraph):
+    """Return the width and text of the widest word in ``paragraph`` that has no break opportunity.
+
+    ReportLab breaks such words anywhere when they do not fit on a line, so
+    a word wider than the line ends up split part way through.
+    """
+    style = paragraph.style
+    words = [word for word in _BREAK_RE.split(paragraph.getPlainText()) if word]
+    if not words:
+        return 0, ''
+    return max((stringWidth(word, style.fontName, style.fontSize), word) for word in words)
+
+
+def _overflow_warnings(flowable, width):
+    """Yield ``(kind, message)`` for words that are too wide for ``flowable``'s paragraph or table cells."""
+    fuzz = rl_config._FUZZ
+    if isinstance(flowable, Paragraph):
+        needed, word = _widest_word(flowable)
+        if needed > width + fuzz:
+            yield ('long_word', f"'{_shorten(word)}' is {needed:.0f}pt wide and is broken "
+                                f"across lines; the frame is {width:.0f}pt")
+    elif isinstance(flowable, Table):
+        for row, values in enumerate(flowable._cellvalues):
+            for column, value in enumerate(values):
+                if not isinstance(value, Paragraph):
+                    continue
+                cell_style = flowable._cellStyles[row][column]
+                available = flowable._colWidths[column] - cell_style.leftPadding - cell_style.rightPadding
+                needed, word = _widest_word(value)
+                if needed > available + fuzz:
+                    yield ('narrow_column', f"table cell (row {row + 1}, column {column + 1}): "
+                                            f"'{_shorten(word)}' is {needed:.0f}pt wide, "
+                                            f"the column has {available:.0f}pt")
+
+
+def _call(flowable, canvas, method, *args):
+    """Call ``wrap`` or ``split`` the way Frame does, with the flowable bound to ``canvas``."""
+    flowable.canv = canvas
+    try:
+        return getattr(flowable, method)(*args)
+    finally:
+        if hasattr(flowable, 'canv'):
+            del flowable.canv
+
+
+def paginate(story, frame, canvas):
+    """Assign the flowables of ``story`` to pages as a build into ``frame`` would.
+
+    ``canvas`` is only used for measuring and is never drawn on. Returns
+    ``(pages, placed, warnings)``: the page count, ``(page, at_top, flowable)``
+    for every flowable laid out (split parts included), and
+    ``(page, kind, message)`` warnings.
+    """
+    top, bottom, width = frame._y, frame._y1p, frame._aW
+    fuzz = rl_config._FUZZ
+    placed = []
+    warnings = []
+
+    # Messages about a flowable wait until it is placed, so that they carry its page
+    pending = {}
+    for flowable in story:
+        messages = list(_overflow_warnings(flowable, width))
+        if messages:
+            pending[id(flowable)] = messages
+
+    page, y, at_top, previous_after = 1, top, True, 0
+    flowables = list(story)
+    while flowables:
+        flowable = flowables.pop(0)
+        if isinstance(flowable, PageBreak):
+            page, y, at_top, previous_after = page + 1, top, True, 0
+            continue
+
+        space = 0
+        if not at_top:
+            space = flowable.getSpaceBefore()
+            if frame._oASpace:
+                space = max(space - previous_after, 0)
+        available = y - bottom - space
+        if available > 0:
+            w, h = _call(flowable, canvas, 'wrap', width, available)
+            fits = y - h - space >= bottom - fuzz
+        else:
+            fits = False
+
+        if fits:
+            placed.append((page, at_top, flowable))
+            for kind, message in pending.pop(id(flowable), []):
+                warnings.append((page, kind, message))
+            if w > width + fuzz:
+                warnings.append((page, 'too_wide', f"{_flowable_text(flowable)} is {w:.0f}pt wide, "
+                                                   f"frame is {width:.0f}pt"))
+            y -= h + space + flowable.getSpaceAfter()
+            previous_after = flowable.getSpaceAfter()
+            if h + space:
+                at_top = False
+            continue
+
+        parts = _call(flowable, canvas, 'split', width, available) if available > 0 else []
+        if parts:
+            if id(flowable) in pending:
+                pending[id(parts[0])] = pending.pop(id(flowable))
+            flowables[0:0] = parts
+        elif at_top:
+            # ReportLab raises a LayoutError here; skip it so the rest can still be estimated
+            warnings.append((page, 'too_tall', f"{_flowable_text(flowable)} does not fit on an empty page"))
+        else:
+            page, y, at_top, previous_after = page + 1, top, True, 0
+            flowables.insert(0, flowable)
+
+    # Like a build, a trailing empty page is not emitted
+    if page > 1 and (not placed or placed[-1][0] < page):
+        page -= 1
+    return page, placed, warnings
+
+
+def _page_ranges(starts, pages):
+    """Turn ``(title, page, at_top)`` starts into ``(title, first_page, last_page)`` ranges.
+
+    A range ends on the page before the next start, or on the same page when
+    the next one starts part way down it.
+    """
+    ranges = []
+    for index, (title, first, _) in enumerate(starts):
+        if index + 1 < len(starts):
+            _, next_first, next_at_top = starts[index + 1]
+            last = next_first - 1 if next_at_top else next_first
+        else:
+            last = pages
+        ranges.append((title, first, max(first, last)))
+    return ranges
+
+
+def _heading_ranges(heading_starts, section_starts, pages):
+    """Page ranges of the headings.
+
+    A heading runs until the next heading of the same or a higher level, or
+    the end of its section.
+    """
+    section_firsts = [first for _, first, _ in section_starts[1:]]
+    ranges = []
+    for index, ((level, text), first, _) in enumerate(heading_starts):
+        last = pages
+        for (next_level, _), next_first, next_at_top in heading_starts[index + 1:]:
+            if next_level <= level:
+                last = next_first - 1 if next_at_top else next_first
+                break
+        # Sections start on a new page
+        for section_first in section_firsts:
+            if section_first > first:
+                last = min(last, section_first - 1)
+                break
+        ranges.append(((level, text), first, max(first, last)))
+    return ranges
+
+
+def estimate_layout(input_md_path, font_path=None, translation_memory_path=generator.TRANSLATION_MEMORY_PATH,
+                    translation_backend=None, metadata=None, styles=None, markdown=None):
+    """Estimate the pagination of the report generate_pdf would build from ``input_md_path``.
+
+    The arguments mean the same as for generate_pdf, so ``markdown`` text or
+    a file object may be given instead of ``input_md_path``. Returns a dict with the
+    page count, the ``sections`` and ``headings`` with their first and last
+    pages, the layout ``warnings``, the number of flowables and the seconds
+    taken.
+    """
+    import document_ir
+    from translation_backend import BatchTranslator, GlossaryBackend
+    from translation_memory import TranslationMemory
+
+    start = time.perf_counter()
+    if not generator.register_font(font_path):
+        print("Warning: Using default font as fallback.")
+    if styles is None:
+        styles = generator.create_styles()
+    metadata = {**generator.DEFAULT_METADATA, **(metadata or {})}
+
+    if markdown is not None:
+        blocks = document_ir.parse_markdown(generator.read_markdown(markdown))
+    else:
+        with open(input_md_path, 'r', encoding='utf-8') as file:
+            blocks = document_ir.parse_markdown(file.read(),
+                                                base_dir=os.path.dirname(os.path.abspath(input_md_path)))
+    segments = [generator.clean_html(text) for text in document_ir.iter_segments(blocks)]
+
+    backend = translation_backend or GlossaryBackend(generator.get_translator())
+    if translation_memory_path:
+        with TranslationMemory(translation_memory_path, generator.glossary_version(generator.translations),
+                               backend=backend.fingerprint()) as memory:
+            translated = BatchTranslator(backend, memory=memory).translate(segments)
+    else:
+        translated = BatchTranslator(backend).translate(segments)
+
+    doc = generator.make_doc_template(io.BytesIO(), metadata)
+    # Images are sized from their headers; preparing them would only slow the estimate down
+    story = generator.build_story(blocks, translated, styles, metadata, generator.make_toc(styles), estimate=True)
+    # The frame SimpleDocTemplate.build lays pages out in
+    frame = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height)
+    pages, placed, warnings = paginate(story, frame, Canvas(io.BytesIO(), pagesize=doc.pagesize))
+
+    # Everything before the first section title is the cover and contents
+    section_starts = [('Cover and contents', 1, True)]
+    heading_starts = []
+    for page, at_top, flowable in placed:
+        if hasattr(flowable, 'section_title'):
+            section_starts.append((flowable.section_title, page, at_top))
+        if hasattr(flowable, 'toc_entry'):
+            level, text, _ = flowable.toc_entry
+            heading_starts.append(((level, html.unescape(text)), page, at_top))
+
+    return {
+        'pages': pages,
+        'sections': [{'title': title, 'first_page': first, 'last_page': last}
+                     for title, first, last in _page_ranges(section_starts, pages)],
+        'headings': [{'level': level, 'text': text, 'first_page': first, 'last_page': last}
+                     for (level, text), first, last in _heading_ranges(heading_starts, section_starts, pages)],
+        'warnings': [{'page': page, 'kind': kind, 'message': message} for page, kind, message in warnings],
+        'flowables': len(story),
+        'seconds': time.perf_counter() - start,
+    }
+
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of rendered PDFs.
+
+A report is identified by hashing everything that determines its bytes: the
+markdown, the glossary, the style parameters, the font, the image assets and
+the generator code. When nothing has changed since an earlier run, the cached
+PDF is copied to the output path instead of rendering it again. The cache
+directory is bounded by total size and entry count, evicting the least
+recently used PDFs first.
+"""
+
+import hashlib
+import os
+import shutil
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+DEFAULT_MAX_ENTRIES = 1000
+
+
+def hash_text(text):
+    """Return the BLAKE2b digest of a string."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=20).hexdigest()
+
+
+def hash_file(path, chunk_size=1 << 20):
+    """Return the BLAKE2b digest of a file's contents, or 'missing'."""
+    if not path or not os.path.exists(path):
+        return 'missing'
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def style_fingerprint(styles):
+    """Return a hash of every attribute of every style in a StyleSheet."""
+    digest = hashlib.blake2b(digest_size=20)
+    for name in sorted(styles.byName):
+        style = styles.byName[name]
+        attributes = sorted((k, repr(v)) for k, v in style.__dict__.items() if k != 'parent')
+        digest.update(repr((name, attributes)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class OutputCache:
+    """Directory of PDFs keyed by the hash of their inputs."""
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts):
+        """Combine already-hashed (or short) input descriptions into a cache key."""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pdf")
+
+    def fetch(self, key, output_path):
+        """Copy the cached PDF for ``key`` to ``output_path``; returns True on a hit.
+
+        ``output_path`` may also be a writable binary file object.
+        """
+        cached = self._path(key)
+        if not os.path.exists(cached):
+            return False
+        if hasattr(output_path, 'write'):
+            with open(cached, 'rb') as f:
+                shutil.copyfileobj(f, output_path)
+        else:
+            shutil.copyfile(cached, output_path)
+        # Recency for eviction is the cached file's mtime
+        os.utime(cached)
+        return True
+
+    def store(self, key, pdf_path):
+        """Add a freshly rendered PDF to the cache and evict if over budget."""
+        cached = self._path(key)
+        tmp_path = f"{cached}.{os.getpid()}.tmp"
+        shutil.copyfile(pdf_path, tmp_path)
+        os.replace(tmp_path, cached)
+        self.evict()
+
+    def store_data(self, key, chunks):
+        """Add a PDF rendered into memory, given as a sequence of byte strings."""
+        cached = self._path(key)
+        tmp_path = f"{cached}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp_path, cached)
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used PDFs until the size and count limits hold."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.pdf'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        while entries and (total > self.max_bytes or len(entries) > self.max_entries):
+            _, size, path = entries.pop(0)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Reuse the parsed markup and line breaks of identical paragraphs.
+
+Reports repeat many paragraphs word for word: the financial highlights,
+disclaimers, bullet labels, table headers and segment names. ReportLab's
+Paragraph parses its markup when it is created and breaks it into lines in
+every ``wrap``, even when an identical paragraph was laid out a moment ago.
+
+CachedParagraph keeps both results in a ParagraphLayoutCache. Markup is
+keyed by (text, style). Line breaks are keyed by (text, style, available
+width), so a paragraph that is wrapped again at the same width, or a copy
+of it, skips line breaking. Styles are compared by value, so equal styles
+built for different tables or reports share entries. Both tables are
+bounded, with least recently used eviction, and the cache lives for the
+whole process, so batch and server workers reuse layouts across reports.
+
+Split parts are built from line fragments rather than markup and are
+never cached. Cached results depend on the metrics of the registered
+fonts, so the cache must be cleared when a font name is registered again
+with a different file.
+"""
+
+import weakref
+from collections import OrderedDict
+
+from reportlab.platypus import Paragraph
+from reportlab.rl_config import _FUZZ
+
+DEFAULT_MAX_ENTRIES = 20000
+
+# Attributes Paragraph.wrap sets; breakLines also replaces ``frags`` with word fragments
+_WRAP_ATTRIBUTES = ('width', 'height', '_wrapWidths', 'blPara', 'frags', '_width_max',
+                    '_splitLongWordCount', '_hyphenations')
+
+# Value-based key of each style object, computed once per object
+_style_keys = weakref.WeakKeyDictionary()
+
+
+def style_key(style):
+    """Return a hashable key equal for styles with equal attributes."""
+    key = _style_keys.get(style)
+    if key is None:
+        attributes = sorted((k, repr(v)) for k, v in style.__dict__.items() if k != 'parent')
+        key = _style_keys[style] = repr(attributes)
+    return key
+
+
+class ParagraphLayoutCache:
+    """Bounded in-memory store of parsed paragraphs and their line breaks."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._parsed = OrderedDict()
+        self._layouts = OrderedDict()
+        self.parse_hits = 0
+        self.parse_misses = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get(self, table, key):
+        value = table.get(key)
+        if value is not None:
+            table.move_to_end(key)
+        return value
+
+    def _put(self, table, key, value):
+        table[key] = value
+        if len(table) > self.max_entries:
+            table.popitem(last=False)
+            self.evictions += 1
+
+    def get_parsed(self, key):
+        """Return ``(text, frags, style, bulletText)`` for a parse key, or None."""
+        value = self._get(self._parsed, key)
+        if value is None:
+            self.parse_misses += 1
+        else:
+            self.parse_hits += 1
+        return value
+
+    def put_parsed(self, key, value):
+        self._put(self._parsed, key, value)
+
+    def get_layout(self, key):
+        """Return the attributes ``wrap`` set for a layout key, as a dict, or None."""
+        value = self._get(self._layouts, key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put_layout(self, key, value):
+        self._put(self._layouts, key, value)
+
+    def clear(self):
+        """Drop every entry, e.g. after the font behind a font name changed."""
+        self._parsed.clear()
+        self._layouts.clear()
+
+    def trim(self, max_entries):
+        """Evict least recently used entries until each table holds at most ``max_entries``."""
+        for table in (self._parsed, self._layouts):
+            while len(table) > max_entries:
+                table.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        """Return hit/miss counters and the current size as a dict.
+
+        ``hits`` and ``misses`` count line-break lookups; parse lookups are
+        counted separately.
+        """
+        lookups = self.hits + self.misses
+        parse_lookups = self.parse_hits + self.parse_misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'parse_hits': self.parse_hits,
+            'parse_misses': self.parse_misses,
+            'parse_hit_rate': self.parse_hits / parse_lookups if parse_lookups else 0.0,
+            'entries': len(self._parsed) + len(self._layouts),
+            'evictions': self.evictions,
+        }
+
+
+class CachedParagraph(Paragraph):
+    """Paragraph that takes its parsed markup and line breaks from ``CachedParagraph.cache``.
+
+    Set ``CachedParagraph.cache`` to None to lay out every paragraph afresh.
+    """
+
+    cache = ParagraphLayoutCache()
+
+    def _setup(self, text, style, bulletText, frags, cleaner):
+        cache = self.cache
+        self._layout_key = None
+        if cache is None or frags is not None or not isinstance(bulletText, (str, type(None))):
+            super()._setup(text, style, bulletText, frags, cleaner)
+            return
+
+        key = (text, style_key(style), bulletText, self.caseSensitive)
+        parsed = cache.get_parsed(key)
+        if parsed is None:
+            super()._setup(text, style, bulletText, frags, cleaner)
+            cache.put_parsed(key, (self.text, self.frags, self.style, self.bulletText))
+        else:
+            # Fragments are only read while wrapping and drawing, so copies share them
+            self.text, self.frags, self.style, self.bulletText = parsed
+            self.debug = 0
+        self._layout_key = key
+
+    def wrap(self, availWidth, availHeight):
+        cache = self.cache
+        # autoLeading set on the instance changes the height, which the key does not cover
+        if cache is None or self._layout_key is None or availWidth < _FUZZ or 'autoLeading' in self.__dict__:
+            return super().wrap(availWidth, availHeight)
+
+        # Subclasses may break lines differently
+        key = (type(self), self._layout_key, availWidth)
+        layout = cache.get_layout(key)
+        if layout is None:
+            super().wrap(availWidth, availHeight)
+            cache.put_layout(key, {name: self.__dict__[name] for name in _WRAP_ATTRIBUTES if name in self.__dict__})
+        else:
+            self.__dict__.update(layout)
+        return self.width, self.height
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Lay out the sections of a report in parallel processes and merge them.
+
+The English and Chinese halves of a report do not depend on each other, so
+each can be laid out by its own worker process. With ``split_chapters``,
+each half is also cut at ``#``/``##`` chapter headings into about one run of
+chapters per worker. Each such part then starts on a new page. Parts are
+rendered without page numbers.
+
+Once every part is back, the coordinator knows where each heading landed
+and lays out the cover and table of contents, a bounded number of entries
+per document. Their page numbers are stamped once the length of the front
+matter is known. The PDFs are then joined (see pdf_join.py): page numbers
+are stamped on the body pages, the outline is rebuilt from the headings,
+and TOC links are pointed at the merged pages.
+
+Usage:
+    python generate_report_simple.py --workers 4 --split-chapters
+"""
+
+import html
+import json
+import os
+import tempfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+
+import pikepdf
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas as pdf_canvas
+from reportlab.platypus import PageBreak
+
+import document_ir
+import generate_report_simple as generator
+import pdf_join
+
+# TOC entries laid out per front matter document (see layout_front_matter)
+TOC_ENTRIES_PER_DOCUMENT = 500
+
+# Per-worker state set up once by init_worker
+_worker_styles = None
+
+
+def init_worker(font_path):
+    """Register the font and build the styles once per worker process."""
+    global _worker_styles
+    generator.register_font(font_path)
+    _worker_styles = generator.create_styles()
+
+
+def _block_size(block):
+    return sum(len(text) for text in document_ir.iter_segments([block]))
+
+
+def plan_parts(blocks, split_chapters=False, parts_per_language=1):
+    """Split a report into parts that can be laid out independently.
+
+    With ``split_chapters``, each language is cut at chapter headings into at
+    most ``parts_per_language`` runs of consecutive chapters of similar size.
+    Returns one dict per part, in document order, with the part's
+    ``language`` ('en' or 'zh'), its ``blocks``, the index of its first
+    block (``start``), and whether it opens its language section
+    (``opening``).
+    """
+    chunks = []
+    start = 0
+    if split_chapters and parts_per_language > 1:
+        target = sum(_block_size(block) for block in blocks) / parts_per_language
+        size = 0
+        for index, block in enumerate(blocks):
+            if (index > start and size >= target and len(chunks) < parts_per_language - 1
+                    and isinstance(block, document_ir.Heading) and block.level <= 2):
+                chunks.append((start, blocks[start:index]))
+                start, size = index, 0
+            size += _block_size(block)
+    chunks.append((start, blocks[start:]))
+
+    parts = []
+    for language in ('en', 'zh'):
+        for number, (start, chunk) in enumerate(chunks):
+            parts.append({'language': language, 'blocks': chunk, 'start': start, 'opening': number == 0})
+    return parts
+
+
+def layout_part(part, styles):
+    """Lay out one part to ``part['output']``; returns its page count and headings."""
+    language = part['language']
+    content = []
+    if part['opening']:
+        content.extend(generator.section_title_flowables(language, styles))
+        english_summary, chinese_summary = generator.build_summary_flowables(styles)
+        content.extend(english_summary if language == 'en' else chinese_summary)
+
+    english_content = content if language == 'en' else None
+    chinese_content = content if language == 'zh' else None
+    for offset, block in enumerate(part['blocks']):
+        generator.append_block_flowables(block, part['translated'], styles, english_content, chinese_content,
+                                         index=part['start'] + offset)
+
+    doc = generator.make_doc_template(part['output'], part['metadata'])
+    doc.page_numbers = False
+    doc.build(content, onFirstPage=generator.draw_page_chrome, onLaterPages=generator.draw_page_chrome)
+    return {'output': part['output'], 'pages': doc.page, 'headings': doc.headings}
+
+
+def render_part(part):
+    """Pool task: lay out one part with this worker's styles."""
+    return layout_part(part, _worker_styles)
+
+
+class JSONLines:
+    """Tuples kept on disk, one line of JSON each, and read back on every iteration."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def append(self, values):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(values, ensure_ascii=False) + '\n')
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __iter__(self):
+        self.close()
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    yield tuple(json.loads(line))
+
+
+def spill_headings(result, path):
+    """Move the headings of a laid out part to a file at ``path``; they still iterate the same."""
+    headings = JSONLines(path)
+    for heading in result['headings']:
+        headings.append(heading)
+    headings.close()
+    result['headings'] = headings
+
+
+def _outline_items(pdf):
+    """Return the destination of every outline item and whether it is closed, depth first."""
+    items = []
+
+    def walk(children):
+        for item in children:
+            items.append((item.destination, item.is_closed))
+            walk(item.children)
+
+    with pdf.open_outline() as outline:
+        walk(outline.root)
+    return items
+
+
+def _stamp(pdf_path, output_path, overlay_path, metadata, draw, pages=None):
+    """Write the PDF at ``pdf_path`` to ``output_path`` with ``draw(canvas, doc, index)`` drawn over each page.
+
+    Only the first ``pages`` pages are kept when given.
+    """
+    with pikepdf.open(pdf_path) as pdf:
+        if pages is not None:
+            del pdf.pages[pages:]
+        overlay = pdf_canvas.Canvas(overlay_path, pagesize=A4)
+        overlay_doc = generator.make_doc_template(overlay_path, metadata)
+        for index in range(len(pdf.pages)):
+            draw(overlay, overlay_doc, index)
+            overlay.showPage()
+        overlay.save()
+        with pikepdf.open(overlay_path) as overlay_pdf:
+            for page, overlay_page in zip(pdf.pages, overlay_pdf.pages):
+                page.add_overlay(overlay_page)
+            pdf.save(output_path)
+
+
+def _stamp_page_numbers(part_path, output_path, first_page, numbers_path, metadata):
+    """Write the PDF at ``part_path`` to ``output_path`` with page numbers from ``first_page`` on."""
+    _stamp(part_path, output_path, numbers_path, metadata,
+           lambda canvas, doc, index: generator.draw_page_number(canvas, doc, first_page + index))
+
+
+def _toc_entries(results):
+    """Yield (level, text, key, page) for every heading of the parts, with pages counted over all parts."""
+    body_pages = 0
+    for result in results:
+        for level, text, key, page in result['headings']:
+            yield level, text, key, body_pages + page
+        body_pages += result['pages']
+
+
+def layout_front_matter(results, styles, metadata, tmp_dir):
+    """Lay out the cover and TOC for rendered parts, TOC_ENTRIES_PER_DOCUMENT entries at a time.
+
+    Each run of entries is laid out in a document of its own that continues
+    where the previous one stopped, so only one run is held at a time. Its
+    last page is dropped and its entries laid out again at the top of the
+    next document, which is how a single TOC would have continued. The
+    page numbers of the entries are stamped once the length of the front
+    matter is known. Returns the front matter PDFs, their page count and
+    the TOC links as (page index, rect, heading index), where headings are
+    counted in document order.
+    """
+    entries = enumerate(_toc_entries(results))
+    carried = []
+    documents = []
+    while True:
+        chunk = carried + list(islice(entries, TOC_ENTRIES_PER_DOCUMENT + 1 - len(carried)))
+        final = len(chunk) <= TOC_ENTRIES_PER_DOCUMENT
+        if not final:
+            entries = chain([chunk.pop()], entries)
+        toc = generator.make_toc(styles)
+        chunk_entries = {}
+        for index, (level, text, key, page) in chunk:
+            toc.addEntry(level, text, 0, key)
+            toc.external_keys.add(key)
+            chunk_entries[key] = (index, (level, text, key, page))
+
+        path = os.path.join(tmp_dir, f"front-{len(documents):05d}.pdf")
+        doc = generator.make_doc_template(path, metadata)
+        if documents:
+            # Numbered along with the TOC entries, counting the pages before it
+            doc.page_numbers = False
+            story, draw = [toc], generator.draw_page_chrome
+        else:
+            # Without its closing page break; that only ends the final document
+            story, draw = generator.build_front_matter(styles, metadata, toc)[:-1], generator.add_page_header
+        if final:
+            story.append(PageBreak())
+        doc.multiBuild(story, onFirstPage=draw, onLaterPages=draw)
+
+        pages = doc.page if final else doc.page - 1
+        numbers = JSONLines(path[:-len(".pdf")] + "-toc.jsonl")
+        carried = []
+        for page, rect, key in toc.external_links:
+            index, (level, _, _, body_page) = chunk_entries[key]
+            if page <= pages:
+                numbers.append((page, rect, index, level, body_page))
+            else:
+                carried.append(chunk_entries[key])
+        numbers.close()
+        documents.append({'output': path, 'pages': pages, 'numbers': numbers})
+        if final:
+            break
+
+    front_pages = sum(document['pages'] for document in documents)
+    toc = generator.make_toc(styles)
+    front_paths = []
+    links = JSONLines(os.path.join(tmp_dir, "toc-links.jsonl"))
+    first_page = 0
+    for document in documents:
+        numbers = list(document['numbers'])
+
+        def draw_numbers(canvas, doc, index):
+            # The first document numbered its own pages
+            if first_page:
+                generator.draw_page_number(canvas, doc, first_page + index + 1)
+            for page, rect, _, level, body_page in numbers:
+                if page == index + 1:
+                    style = toc.getLevelStyle(level)
+                    canvas.setFont(style.fontName, style.fontSize)
+                    canvas.setFillColor(style.textColor)
+                    canvas.drawRightString(rect[2], rect[1], toc.format_page_number(front_pages + body_page))
+
+        front_paths.append(document['output'][:-len(".pdf")] + "-numbered.pdf")
+        _stamp(document['output'], front_paths[-1], os.path.join(tmp_dir, "numbers.pdf"), metadata,
+               draw_numbers, document['pages'])
+        for page, rect, index, _, _ in numbers:
+            links.append((first_page + page - 1, rect, index))
+        first_page += document['pages']
+    links.close()
+    return front_paths, front_pages, links
+
+
+def merge_parts(front_paths, front_pages, toc_links, results, output_pdf_path, tmp_dir, metadata):
+    """Append the parts to the front matter and fix up numbering, outline and links.
+
+    ``toc_links`` are the TOC links into the parts, as returned by
+    layout_front_matter. One part is open at a time, the outline and links
+    are kept on disk, and the merged PDF is written out as it is joined (see
+    pdf_join.py), so neither the open files nor the memory grow with the
+    number of parts.
+    """
+    # Where each heading landed, in document order: index of its page in the merged PDF, left and top
+    pages, lefts, tops = array('q'), array('d'), array('d')
+    outline = JSONLines(os.path.join(tmp_dir, "outline.jsonl"))
+    paths = list(front_paths)
+    offset = front_pages
+    for number, result in enumerate(results):
+        with pikepdf.open(result['output']) as part:
+            # ReportDocTemplate added one outline item per heading, in order
+            for (level, text, key, page), (destination, closed) in zip(result['headings'], _outline_items(part)):
+                pages.append(offset + page - 1)
+                lefts.append(float(destination[2]))
+                tops.append(float(destination[3]))
+                outline.append((level, html.unescape(text), pages[-1], lefts[-1], tops[-1], closed))
+        # Stamp the global page number on every body page; parts may be cached, so on a copy
+        paths.append(os.path.join(tmp_dir, f"numbered-{number:05d}.pdf"))
+        _stamp_page_numbers(result['output'], paths[-1], offset + 1, os.path.join(tmp_dir, "numbers.pdf"),
+                            metadata)
+        offset += result['pages']
+
+    links = JSONLines(os.path.join(tmp_dir, "links.jsonl"))
+    for page, rect, index in toc_links:
+        links.append((page, rect, pages[index], lefts[index], tops[index]))
+    pdf_join.join_pdfs(paths, output_pdf_path, outline=outline, links=links)
+
+
+def assemble_report(results, output_pdf_path, styles, metadata, tmp_dir):
+    """Lay out the cover and TOC for rendered parts and merge everything into one PDF."""
+    # The cover and TOC are laid out last, once every heading's page is known. The
+    # laid out TOC is released before the merge, which keeps the two peaks apart.
+    front_paths, front_pages, toc_links = layout_front_matter(results, styles, metadata, tmp_dir)
+    merge_parts(front_paths, front_pages, toc_links, results, output_pdf_path, tmp_dir, metadata)
+
+
+def render_parallel(blocks, translated, output_pdf_path, font_path=None, metadata=None, styles=None,
+                    workers=None, split_chapters=False):
+    """Render a report from its IR blocks with the parts laid out in parallel."""
+    metadata = {**generator.DEFAULT_METADATA, **(metadata or {})}
+    if styles is None:
+        styles = generator.create_styles()
+    workers = workers or os.cpu_count() or 1
+    parts = plan_parts(blocks, split_chapters, max(1, workers // 2))
+
+    with tempfile.TemporaryDirectory(prefix="llmquant-parts-") as tmp_dir:
+        for number, part in enumerate(parts):
+            part['output'] = os.path.join(tmp_dir, f"part-{number:03d}.pdf")
+            part['metadata'] = metadata
+            # Only the English parts need translations, and only their own
+            part['translated'] = {}
+            if part['language'] == 'en':
+                for text in document_ir.iter_segments(part['blocks']):
+                    text = generator.clean_html(text)
+                    part['translated'][text] = translated[text]
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(font_path,)) as pool:
+            results = list(pool.map(render_part, parts))
+
+        assemble_report(results, output_pdf_path, styles, metadata, tmp_dir)
+    return len(parts)
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Join PDFs into one without holding the joined document in memory.
+
+pikepdf (qpdf) keeps every object of a PDF it writes in memory, so joining
+the parts of a very large report that way grows with its page count.
+join_pdfs writes the joined PDF object by object instead. The inputs are
+opened one at a time and the objects their pages use are renumbered and
+copied to the output. Afterwards only the byte offset of every object is
+kept, together with the object number of every page and a digest of
+every object that may be shared. Identical objects, such as the logos and
+fonts each part embeds, are written once; page contents never are.
+
+The outline and the links into other parts refer to pages by their index
+in the joined PDF, and are written at the end. Both are read twice, once
+to lay out the outline tree and count the links on each page and once to
+write them, so the caller may keep them on disk. Everything the first
+PDF's catalog holds besides its pages, such as its own outline, is left
+out. Its document information is kept.
+
+Usage:
+    join_pdfs(["front.pdf", "part-000.pdf"], "report.pdf",
+              outline=[(0, "Chapter 1", 2, 72, 770, False)], links=[(1, rect, 2, 72, 770)])
+"""
+
+import hashlib
+import os
+from array import array
+from decimal import Decimal
+
+import pikepdf
+
+# Page attributes a page may inherit from its page tree nodes
+INHERITED_PAGE_KEYS = ('/Resources', '/MediaBox', '/CropBox', '/Rotate')
+
+
+def _unparse(value, renumber):
+    """Serialize a PDF object, with references renumbered by ``renumber(objgen)``."""
+    if isinstance(value, bool):
+        return b'true' if value else b'false'
+    if isinstance(value, (int, float, Decimal)):
+        return _number(value)
+    if value is None:
+        return b'null'
+    if value.is_indirect:
+        return b'%d 0 R' % renumber(value.objgen)
+    if isinstance(value, (pikepdf.Dictionary, pikepdf.Stream)):
+        return _unparse_dictionary(value.items(), renumber)
+    if isinstance(value, pikepdf.Array):
+        return b'[' + b' '.join(_unparse(item, renumber) for item in value) + b']'
+    return value.unparse()
+
+
+def _unparse_object(obj, renumber):
+    """Serialize the body of the indirect object ``obj``."""
+    if isinstance(obj, pikepdf.Dictionary):
+        return _unparse_dictionary(obj.items(), renumber)
+    if isinstance(obj, pikepdf.Array):
+        return b'[' + b' '.join(_unparse(item, renumber) for item in obj) + b']'
+    return obj.unparse(resolved=True)
+
+
+def _number(value):
+    if isinstance(value, int):
+        return b'%d' % value
+    return format(Decimal(repr(value)) if isinstance(value, float) else value, 'f').encode('ascii')
+
+
+def _unparse_dictionary(items, renumber):
+    return b'<<' + b''.join(pikepdf.Name(key).unparse() + b' ' + _unparse(item, renumber)
+                            for key, item in items) + b'>>'
+
+
+def _reachable(pdf):
+    """Return the ids of the objects the pages of ``pdf`` use, pages included, by object number."""
+    pages = [page.obj for page in pdf.pages]
+    seen = {page.objgen for page in pages}
+    stack = list(pages)
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, pikepdf.Array):
+            items = enumerate(obj)
+        else:
+            items = obj.items()
+        for key, value in items:
+            # The page tree is written anew, and stream lengths are written directly
+            if key in ('/Parent', '/Length') or not isinstance(value, pikepdf.Object):
+                continue
+            if value.is_indirect:
+                if value.objgen not in seen:
+                    seen.add(value.objgen)
+                    stack.append(value)
+            elif isinstance(value, (pikepdf.Dictionary, pikepdf.Array)):
+                stack.append(value)
+    return sorted(seen)
+
+
+def _inherited(page, key):
+    node = page
+    while key not in node and '/Parent' in node:
+        node = node.Parent
+    return node.get(key)
+
+
+class _Writer:
+    """Output file that remembers where each object starts."""
+
+    def __init__(self, f, size):
+        self.f = f
+        self.offsets = array('q', [0]) * size
+
+    def write_object(self, number, body, stream=None):
+        self.offsets[number] = self.f.tell()
+        self.f.write(b'%d 0 obj\n' % number + body)
+        if stream is not None:
+            self.f.write(b'\nstream\n' + stream + b'\nendstream')
+        self.f.write(b'\nendobj\n')
+
+
+def join_pdfs(paths, output_path, outline=(), links=()):
+    """Write the pages of the PDFs at ``paths``, in order, to ``output_path``.
+
+    ``outline`` lists (level, title, page index, left, top, closed) for
+    every outline item in document order, and ``links`` lists
+    (page index, rect, target page index, left, top) for link annotations
+    to add, in page order. Page indexes count from 0 in the joined PDF.
+    Both are iterated twice.
+    """
+    # First pass: where each input's objects start and the object number of every page
+    bases = []
+    page_numbers = array('q')
+    version = '1.4'
+    size = 1
+    for path in paths:
+        with pikepdf.open(path) as pdf:
+            bases.append(size)
+            page_numbers.extend(size + page.obj.objgen[0] for page in pdf.pages)
+            version = max(version, pdf.pdf_version)
+            size += int(pdf.trailer.Size)
+
+    # Objects made here are numbered after all the copied ones
+    pages_number, catalog_number, info_number = size, size + 1, size + 2
+    size += 3
+    # Page index -> object numbers of the link annotations added to it, which follow each other
+    annotations = {}
+    first_annotation = size
+    for index, *_ in links:
+        annotations[index] = range(annotations[index].start if index in annotations else size, size + 1)
+        size += 1
+    tree = _outline_tree(outline)
+    outline_number = size
+    size += len(tree.parents)
+
+    # Digest of every object written -> its object number
+    written = {}
+    first_page = 0
+    with open(output_path, 'wb') as f:
+        writer = _Writer(f, size)
+        f.write(b'%PDF-' + version.encode('ascii') + b'\n%\xe2\xe3\xcf\xd3\n')
+        for path, base in zip(paths, bases):
+            with pikepdf.open(path) as pdf:
+                copies = {}
+
+                def renumber(objgen):
+                    return copies.get(objgen) or base + objgen[0]
+
+                page_indexes = {page.obj.objgen: index for index, page in enumerate(pdf.pages, first_page)}
+                first_page += len(page_indexes)
+                reachable = _reachable(pdf)
+                contents = _page_contents(pdf)
+                _find_copies(pdf, [objgen for objgen in reachable
+                                   if objgen not in page_indexes and objgen not in contents],
+                             renumber, copies, written)
+                for objgen in reachable:
+                    if objgen in copies:
+                        continue
+                    obj = pdf.get_object(objgen)
+                    number = renumber(objgen)
+                    if isinstance(obj, pikepdf.Stream):
+                        data = obj.read_raw_bytes()
+                        items = [(key, value) for key, value in obj.items() if key != '/Length']
+                        items.append(('/Length', len(data)))
+                        writer.write_object(number, _unparse_dictionary(items, renumber), data)
+                    elif objgen in page_indexes:
+                        writer.write_object(number, _unparse_page(
+                            obj, pages_number, annotations.get(page_indexes[objgen], ()), renumber))
+                    else:
+                        writer.write_object(number, _unparse_object(obj, renumber))
+                if path == paths[0]:
+                    info = pdf.trailer.get('/Info')
+                    # Only direct values: nothing else of the catalog or trailer is copied
+                    writer.write_object(info_number, _unparse_dictionary(
+                        [(key, value) for key, value in (info.items() if info is not None else ())
+                         if not (isinstance(value, pikepdf.Object) and value.is_indirect)], renumber))
+
+        for number, (index, rect, target, left, top) in enumerate(links, first_annotation):
+            writer.write_object(number, b'<</Type /Annot /Subtype /Link /Rect [%s] /Border [0 0 0] /Dest %s>>' % (
+                b' '.join(_number(float(value)) for value in rect),
+                _destination(page_numbers[target], left, top)))
+
+        _write_outline(writer, outline, tree, outline_number, page_numbers)
+        kids = b' '.join(b'%d 0 R' % number for number in page_numbers)
+        writer.write_object(pages_number, b'<</Type /Pages /Count %d /Kids [%s]>>' % (len(page_numbers), kids))
+        catalog = b'<</Type /Catalog /Pages %d 0 R' % pages_number
+        if len(tree.parents) > 1:
+            catalog += b' /Outlines %d 0 R' % outline_number
+        writer.write_object(catalog_number, catalog + b'>>')
+
+        # Cross-reference table. The numbers of dropped copies are free, each
+        # pointing to the next free one, as object 0 does to the first.
+        free = array('q', (number for number in range(1, size) if not writer.offsets[number]))
+        free.append(0)
+        xref = f.tell()
+        f.write(b'xref\n0 %d\n%010d 65535 f \n' % (size, free[0]))
+        next_free = 1
+        for offset in writer.offsets[1:]:
+            if offset:
+                f.write(b'%010d 00000 n \n' % offset)
+            else:
+                f.write(b'%010d 00001 f \n' % free[next_free])
+                next_free += 1
+        document_id = os.urandom(16).hex().encode('ascii')
+        f.write(b'trailer\n<</Size %d /Root %d 0 R /Info %d 0 R /ID [<%s> <%s>]>>\nstartxref\n%d\n%%%%EOF\n' % (
+            size, catalog_number, info_number, document_id, document_id, xref))
+
+
+def check_pdf(pdf_path):
+    """Return the problems qpdf's check finds in the PDF at ``pdf_path``; empty when there are none."""
+    with pikepdf.open(pdf_path) as pdf:
+        return [str(problem) for problem in pdf.check_pdf_syntax()]
+
+
+def _page_contents(pdf):
+    """Return the ids of the content streams of the pages of ``pdf``."""
+    contents = set()
+    for page in pdf.pages:
+        value = page.obj.get('/Contents')
+        for stream in (value if isinstance(value, pikepdf.Array) else [value]):
+            if isinstance(stream, pikepdf.Object) and stream.is_indirect:
+                contents.add(stream.objgen)
+    return contents
+
+
+def _find_copies(pdf, objgens, renumber, copies, written):
+    """Record in ``copies`` the objects of ``pdf`` already written, and add the others to ``written``.
+
+    ``written`` maps a digest of every object written, as it is written, to
+    its object number. As in pdf_optimize.share_identical_streams, objects
+    that only differ in references to identical objects are found in
+    further passes.
+    """
+    # An annotation belongs to a single page
+    objects = [obj for obj in map(pdf.get_object, objgens)
+               if not (isinstance(obj, pikepdf.Dictionary) and obj.get('/Type') == '/Annot')]
+    data_digests = {obj.objgen: hashlib.blake2b(obj.read_raw_bytes(), digest_size=20).digest()
+                    for obj in objects if isinstance(obj, pikepdf.Stream)}
+    while True:
+        found = 0
+        for obj in objects:
+            if obj.objgen in copies:
+                continue
+            if isinstance(obj, pikepdf.Stream):
+                body = data_digests[obj.objgen] + _unparse_dictionary(
+                    ((key, value) for key, value in obj.items() if key != '/Length'), renumber)
+            else:
+                body = b'object' + _unparse_object(obj, renumber)
+            digest = hashlib.blake2b(body, digest_size=20).digest()
+            number = written.setdefault(digest, renumber(obj.objgen))
+            if number != renumber(obj.objgen):
+                copies[obj.objgen] = number
+                found += 1
+        if not found:
+            break
+
+
+def _unparse_page(page, pages_number, annotations, renumber):
+    items = [(key, value) for key, value in page.items() if key not in ('/Parent', '/Annots')]
+    for key in INHERITED_PAGE_KEYS:
+        if key not in page:
+            value = _inherited(page, key)
+            if value is not None:
+                items.append((key, value))
+    body = _unparse_dictionary(items, renumber)[:-2] + b' /Parent %d 0 R' % pages_number
+    refs = [_unparse(value, renumber) for value in page.get('/Annots', ())]
+    refs += [b'%d 0 R' % number for number in annotations]
+    if refs:
+        body += b' /Annots [' + b' '.join(refs) + b']'
+    return body + b'>>'
+
+
+def _destination(page_number, left, top):
+    return b'[%d 0 R /XYZ %s %s 0]' % (page_number, _number(float(left)), _number(float(top)))
+
+
+class _OutlineTree:
+    """Parent, first and last child and previous and next sibling of every outline item.
+
+    Items are numbered from 1 in document order and the root is 0, which
+    also stands for no item. ``counts`` holds the /Count of each item: the
+    number of its visible descendants, negative if it is closed.
+    """
+
+    def __init__(self):
+        self.parents, self.firsts, self.lasts, self.prevs, self.nexts, self.counts = (
+            array('q', [0]) for _ in range(6))
+        self.closed = array('b', [0])
+
+    def add(self, parent, closed):
+        number = len(self.parents)
+        for numbers in (self.parents, self.firsts, self.lasts, self.prevs, self.nexts, self.counts):
+            numbers.append(0)
+        self.parents[number] = parent
+        self.closed.append(1 if closed else 0)
+        if self.lasts[parent]:
+            self.nexts[self.lasts[parent]] = number
+            self.prevs[number] = self.lasts[parent]
+        else:
+            self.firsts[parent] = number
+        self.lasts[parent] = number
+        return number
+
+    def finish(self, number):
+        """Fix the /Count of the item ``number`` once all its descendants are added."""
+        visible = self.counts[number]
+        if self.closed[number]:
+            self.counts[number] = -visible
+        if number:
+            self.counts[self.parents[number]] += 1 + (0 if self.closed[number] else visible)
+
+
+def _outline_tree(outline):
+    tree = _OutlineTree()
+    stack = [(-1, 0)]
+    for level, _, _, _, _, closed in outline:
+        while stack[-1][0] >= level:
+            tree.finish(stack.pop()[1])
+        stack.append((level, tree.add(stack[-1][1], closed)))
+    while stack:
+        tree.finish(stack.pop()[1])
+    return tree
+
+
+def _write_outline(writer, outline, tree, outline_number, page_numbers):
+    """Write the outline items in ``outline``, laid out in ``tree``, under the object ``outline_number``."""
+    def links(item):
+        if not tree.firsts[item]:
+            return b''
+        return b' /First %d 0 R /Last %d 0 R /Count %d' % (
+            outline_number + tree.firsts[item], outline_number + tree.lasts[item], tree.counts[item])
+
+    if len(tree.parents) == 1:
+        return
+    for item, (_, title, index, left, top, _) in enumerate(outline, 1):
+        body = b'<</Title %s /Parent %d 0 R /Dest %s' % (
+            pikepdf.String(title).unparse(), outline_number + tree.parents[item],
+            _destination(page_numbers[index], left, top))
+        if tree.prevs[item]:
+            body += b' /Prev %d 0 R' % (outline_number + tree.prevs[item])
+        if tree.nexts[item]:
+            body += b' /Next %d 0 R' % (outline_number + tree.nexts[item])
+        writer.write_object(outline_number + item, body + links(item) + b'>>')
+    writer.write_object(outline_number, b'<</Type /Outlines' + links(0) + b'>>')
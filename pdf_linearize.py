@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Write reports as linearized ("fast web view") PDFs.
+
+A viewer reads an ordinary PDF from its end, where the cross-reference
+table that locates every object is stored. A report opened from a web
+portal therefore shows nothing until it has been downloaded completely. A
+linearized PDF starts with a parameter dictionary, followed by the
+cross-reference section, the hint tables and every object of the first
+page. A viewer can show the cover once the first ``E`` bytes have arrived,
+and use the hint tables to fetch other pages with byte range requests.
+
+ReportLab cannot write linearized files, so qpdf (through pikepdf)
+rewrites the PDF that SimpleDocTemplate built. Two things keep qpdf's
+outline hint table consistent with the file. The catalog's default
+``/PageMode /UseNone`` is left out, and objects are not packed into object
+streams, even with ``--optimize``.
+
+Usage:
+    python generate_report_simple.py --linearize [--optimize]
+"""
+
+import io
+import os
+import re
+
+import pikepdf
+
+import pdf_optimize
+
+# The parameter dictionary must lie within the first 1024 bytes of a linearized PDF
+PARAMETERS_SIZE = 1024
+
+_PARAMETERS_RE = re.compile(rb'<<\s*/Linearized\s+[\d.]+(.*?)>>', re.DOTALL)
+_PARAMETER_RE = re.compile(rb'/([A-Z])\s*(\[[\d\s]*\]|\d+)')
+
+
+def linearize_pdf(pdf_path, output_path=None, optimize=False):
+    """Rewrite the PDF at ``pdf_path`` linearized, in place unless ``output_path`` is given.
+
+    With ``optimize`` it is saved as pdf_optimize.save_optimized does.
+    Returns the sizes before and after.
+    """
+    before = os.path.getsize(pdf_path)
+    with pikepdf.open(pdf_path, allow_overwriting_input=output_path is None) as pdf:
+        if pdf.Root.get('/PageMode') == '/UseNone':
+            del pdf.Root['/PageMode']
+        if optimize:
+            pdf_optimize.save_optimized(pdf, output_path or pdf_path, linearize=True)
+        else:
+            pdf.save(output_path or pdf_path, linearize=True)
+    return before, os.path.getsize(output_path or pdf_path)
+
+
+def linearization_parameters(head):
+    """Return the linearization parameters in ``head``, the first bytes of a PDF, or None.
+
+    The keys are single letters as in the PDF: 'L' is the file length, 'E'
+    the end of the first page, 'O' the object number of the first page,
+    'N' the page count, 'T' the offset of the main cross-reference table and
+    'H' the offsets and lengths of the hint streams.
+    """
+    match = _PARAMETERS_RE.search(head[:PARAMETERS_SIZE])
+    if match is None:
+        return None
+    parameters = {}
+    for key, value in _PARAMETER_RE.findall(match.group(1)):
+        if value.startswith(b'['):
+            parameters[key.decode()] = [int(number) for number in value[1:-1].split()]
+        else:
+            parameters[key.decode()] = int(value)
+    return parameters
+
+
+def check_linearization(pdf_path):
+    """Return the problems qpdf finds with the linearization of ``pdf_path``; empty when there are none."""
+    with open(pdf_path, 'rb') as f:
+        parameters = linearization_parameters(f.read(PARAMETERS_SIZE))
+    if parameters is None:
+        return ["not linearized"]
+    if parameters.get('L') != os.path.getsize(pdf_path):
+        return [f"the file is {os.path.getsize(pdf_path)} bytes, the parameters say {parameters.get('L')}"]
+
+    with pikepdf.open(pdf_path) as pdf:
+        if pdf.check_linearization(io.StringIO()):
+            return []
+        return [warning.split(': ', 1)[-1] for warning in pdf.get_warnings()] or ["invalid hint tables"]
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Make report PDFs smaller for distribution.
+
+``--optimize`` trades some render time for output bytes once the PDF is
+written, in four ways:
+
+* Compact font programs. ReportLab embeds a CJK font as subsets of up to
+  256 glyphs each, and copies the font's 'name' table and hinting program
+  ('fpgm', 'prep', 'cvt ') into every subset, together with each glyph's
+  hinting instructions. None of that is needed to show or print the glyph
+  outlines in a PDF, so it is left out, and each glyph is padded anew.
+  This is not a tighter subset: the subsets keep the glyphs ReportLab
+  picked and how they are split, and no glyph is removed.
+* No ASCII85. ReportLab wraps compressed streams in ASCII85, which adds a
+  quarter to their size. qpdf decodes them when it saves the PDF.
+* Shared streams. Identical streams, such as logos, fonts and forms
+  repeated by the parts of a merged report, are stored once.
+* Object streams. The PDF is saved by qpdf with the small objects packed
+  into compressed object streams and every stream recompressed at the
+  highest zlib level.
+
+Only the PDF being optimized is changed, never ReportLab's settings or
+fonts, so renders running at the same time are not affected. Merged
+reports (see parallel_render.py) always share identical streams.
+
+Usage:
+    python generate_report_simple.py --optimize
+"""
+
+import hashlib
+import os
+import struct
+
+import pikepdf
+
+# zlib level used when the optimized PDF is saved, and qpdf's default
+FLATE_LEVEL = 9
+DEFAULT_FLATE_LEVEL = -1
+
+# Font tables a PDF viewer does not need to draw the glyphs of an embedded TrueType subset
+DROPPED_FONT_TABLES = {b'name', b'fpgm', b'prep', b'cvt ', b'hdmx', b'LTSH', b'VDMX', b'gasp', b'kern', b'DSIG'}
+
+# Simple glyph point flags (TrueType 'glyf' table)
+_X_SHORT_VECTOR = 0x02
+_Y_SHORT_VECTOR = 0x04
+_REPEAT_FLAG = 0x08
+_X_IS_SAME_OR_POSITIVE = 0x10
+_Y_IS_SAME_OR_POSITIVE = 0x20
+
+# Composite glyph flags (TrueType 'glyf' table)
+_ARG_1_AND_2_ARE_WORDS = 0x0001
+_WE_HAVE_A_SCALE = 0x0008
+_MORE_COMPONENTS = 0x0020
+_WE_HAVE_AN_X_AND_Y_SCALE = 0x0040
+_WE_HAVE_A_TWO_BY_TWO = 0x0080
+_WE_HAVE_INSTRUCTIONS = 0x0100
+
+
+def _simple_glyph_end(glyph, contours, at):
+    """Return where the point data of a simple glyph starting at ``at`` ends, without padding."""
+    points = struct.unpack('>H', glyph[8 + 2 * contours:10 + 2 * contours])[0] + 1 if contours else 0
+    # Flags come first, each repeated as many times again as the byte after a repeat flag says
+    coordinates = 0
+    while points > 0:
+        flags = glyph[at]
+        at += 1
+        count = 1
+        if flags & _REPEAT_FLAG:
+            count += glyph[at]
+            at += 1
+        points -= count
+        # Short coordinates take a byte, repeated ones none and the others two
+        for short, same in ((_X_SHORT_VECTOR, _X_IS_SAME_OR_POSITIVE), (_Y_SHORT_VECTOR, _Y_IS_SAME_OR_POSITIVE)):
+            if flags & short:
+                coordinates += count
+            elif not flags & same:
+                coordinates += 2 * count
+    return at + coordinates
+
+
+def _strip_instructions(glyph):
+    """Return the 'glyf' record ``glyph`` without its hinting instructions or padding."""
+    if len(glyph) < 12:
+        return glyph
+    contours = struct.unpack('>h', glyph[:2])[0]
+    if contours >= 0:
+        # Simple glyph: header, end points, then instructionLength and the instructions
+        at = 10 + 2 * contours
+        length = struct.unpack('>H', glyph[at:at + 2])[0]
+        end = _simple_glyph_end(glyph, contours, at + 2 + length)
+        return glyph[:at] + b'\0\0' + glyph[at + 2 + length:end]
+
+    # Composite glyph: instructions, if any, follow the last component
+    data = bytearray(glyph)
+    at = 10
+    flags = _MORE_COMPONENTS
+    while flags & _MORE_COMPONENTS:
+        flags = struct.unpack('>H', data[at:at + 2])[0]
+        struct.pack_into('>H', data, at, flags & ~_WE_HAVE_INSTRUCTIONS)
+        at += 4 + (4 if flags & _ARG_1_AND_2_ARE_WORDS else 2)
+        if flags & _WE_HAVE_A_SCALE:
+            at += 2
+        elif flags & _WE_HAVE_AN_X_AND_Y_SCALE:
+            at += 4
+        elif flags & _WE_HAVE_A_TWO_BY_TWO:
+            at += 8
+    return bytes(data[:at])
+
+
+def compact_font_program(data):
+    """Return a TrueType font without the tables and instructions only hinting and naming need."""
+    from reportlab.pdfbase.ttfonts import TTFontMaker
+
+    count = struct.unpack('>H', data[4:6])[0]
+    tables = {}
+    for record in range(count):
+        tag, _, offset, length = struct.unpack('>4sLLL', data[12 + 16 * record:28 + 16 * record])
+        tables[tag] = data[offset:offset + length]
+
+    # Rebuild 'glyf' and 'loca' with the instructions left out of every glyph
+    long_offsets = struct.unpack('>h', tables[b'head'][50:52])[0] == 1
+    if long_offsets:
+        offsets = struct.unpack(f'>{len(tables[b"loca"]) // 4}L', tables[b'loca'])
+    else:
+        offsets = [offset * 2 for offset in struct.unpack(f'>{len(tables[b"loca"]) // 2}H', tables[b'loca'])]
+    glyf = tables[b'glyf']
+    glyphs = []
+    new_offsets = [0]
+    for start, end in zip(offsets, offsets[1:]):
+        glyph = _strip_instructions(glyf[start:end]) if end > start else b''
+        glyph += b'\0' * (-len(glyph) % 4)
+        glyphs.append(glyph)
+        new_offsets.append(new_offsets[-1] + len(glyph))
+    tables[b'glyf'] = b''.join(glyphs)
+    if long_offsets:
+        tables[b'loca'] = struct.pack(f'>{len(new_offsets)}L', *new_offsets)
+    else:
+        tables[b'loca'] = struct.pack(f'>{len(new_offsets)}H', *[offset // 2 for offset in new_offsets])
+
+    output = TTFontMaker()
+    for tag, table in tables.items():
+        if tag not in DROPPED_FONT_TABLES:
+            output.add(tag.decode('latin-1'), table)
+    return output.makeStream()
+
+
+def compact_fonts(pdf):
+    """Replace the TrueType programs embedded in ``pdf`` by compact ones; returns how many were replaced.
+
+    Programs this module cannot read are left as they are.
+    """
+    replaced = set()
+    for obj in pdf.objects:
+        if not (isinstance(obj, pikepdf.Dictionary) and isinstance(obj.get('/FontFile2'), pikepdf.Stream)):
+            continue
+        stream = obj.FontFile2
+        if stream.objgen in replaced:
+            continue
+        try:
+            data = compact_font_program(stream.read_bytes())
+        except (KeyError, IndexError, struct.error):
+            continue
+        stream.write(data)
+        stream.Length1 = len(data)
+        replaced.add(stream.objgen)
+    return len(replaced)
+
+
+def _fingerprint(value, copies):
+    """Describe a PDF object, with references to known copies replaced by the copy kept."""
+    if not isinstance(value, pikepdf.Object):
+        # Numbers and booleans come back as Python values
+        return repr(value)
+    if value.is_indirect:
+        objgen = value.objgen
+        while objgen in copies:
+            objgen = copies[objgen].objgen
+        return ('ref', objgen)
+    if isinstance(value, pikepdf.Dictionary):
+        return tuple(sorted((name, _fingerprint(item, copies)) for name, item in value.items()))
+    if isinstance(value, pikepdf.Array):
+        return tuple(_fingerprint(item, copies) for item in value)
+    return repr(value)
+
+
+def _point_at_kept(container, copies):
+    """Replace references to dropped copies in a dictionary, stream or array and its direct children."""
+    items = enumerate(container) if isinstance(container, pikepdf.Array) else container.items()
+    for key, value in list(items):
+        if not isinstance(value, pikepdf.Object):
+            continue
+        if value.is_indirect:
+            if value.objgen in copies:
+                kept = copies[value.objgen]
+                while kept.objgen in copies:
+                    kept = copies[kept.objgen]
+                container[key] = kept
+        elif isinstance(value, (pikepdf.Dictionary, pikepdf.Array)):
+            _point_at_kept(value, copies)
+
+
+def share_identical_streams(pdf):
+    """Point every reference to identical streams at one copy; returns how many copies were dropped.
+
+    Streams are identical when their data and dictionaries are, references
+    included. Streams that only differ in references to identical streams,
+    such as images with identical soft masks, are found in a further pass.
+    Copies no longer referenced are left out when the PDF is saved.
+    """
+    copies = {}
+    streams = [obj for obj in pdf.objects if isinstance(obj, pikepdf.Stream)]
+    digests = {obj.objgen: hashlib.blake2b(obj.read_raw_bytes(), digest_size=20).digest() for obj in streams}
+    while True:
+        kept = {}
+        found = 0
+        for obj in streams:
+            if obj.objgen in copies:
+                continue
+            dictionary = tuple(sorted((name, _fingerprint(value, copies)) for name, value in obj.items()
+                                      if name != '/Length'))
+            first = kept.setdefault((digests[obj.objgen], dictionary), obj)
+            if first.objgen != obj.objgen:
+                copies[obj.objgen] = first
+                found += 1
+        if not found:
+            break
+
+    if copies:
+        for obj in pdf.objects:
+            if isinstance(obj, (pikepdf.Dictionary, pikepdf.Stream, pikepdf.Array)):
+                _point_at_kept(obj, copies)
+    return len(copies)
+
+
+def save_optimized(pdf, output_path, linearize=False):
+    """Save ``pdf`` with compact fonts, shared streams, object streams and maximum stream compression.
+
+    A ``linearize``d PDF is saved without object streams (see pdf_linearize.py).
+    """
+    compact_fonts(pdf)
+    share_identical_streams(pdf)
+    pdf.remove_unreferenced_resources()
+    pikepdf.settings.set_flate_compression_level(FLATE_LEVEL)
+    try:
+        pdf.save(output_path, compress_streams=True, recompress_flate=True, linearize=linearize,
+                 object_stream_mode=pikepdf.ObjectStreamMode.disable if linearize
+                 else pikepdf.ObjectStreamMode.generate)
+    finally:
+        pikepdf.settings.set_flate_compression_level(DEFAULT_FLATE_LEVEL)
+
+
+def optimize_pdf(pdf_path, output_path=None):
+    """Rewrite the PDF at ``pdf_path`` optimized, in place unless ``output_path`` is given.
+
+    Returns the sizes before and after.
+    """
+    before = os.path.getsize(pdf_path)
+    with pikepdf.open(pdf_path, allow_overwriting_input=output_path is None) as pdf:
+        save_optimized(pdf, output_path or pdf_path)
+    return before, os.path.getsize(output_path or pdf_path)
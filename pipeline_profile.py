@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Per-stage timing and memory figures for the report pipeline.
+
+generate_pdf runs its stages (cache lookup, markdown parsing, translation,
+building the story, page layout) inside ``profiler.stage(name)``, which
+records the wall time, the CPU time and, when memory tracing is on, the
+peak tracemalloc allocation of each stage. Counts such as segments,
+flowables and pages are added with ``profiler.count``. ``report()`` returns
+everything as a dict that is written out as JSON.
+
+Stages are expected to run one after another, not nested.
+
+Usage:
+    python generate_report_simple.py --timings timings.json [--trace-memory] [--profile report.pstats]
+"""
+
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class PipelineProfiler:
+    """Record wall time, CPU time and peak allocation of each pipeline stage."""
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = []
+        self.counts = {}
+        self._started_tracing = False
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as stage ``name``."""
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            allocated_before = tracemalloc.get_traced_memory()[0]
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            record = {
+                'name': name,
+                'wall_seconds': time.perf_counter() - wall_start,
+                'cpu_seconds': time.process_time() - cpu_start,
+            }
+            if self.trace_memory:
+                allocated, peak = tracemalloc.get_traced_memory()
+                # Peak is measured above what was already allocated when the stage began
+                record['peak_bytes'] = peak - allocated_before
+                record['retained_bytes'] = allocated - allocated_before
+            self.stages.append(record)
+
+    def count(self, name, value):
+        """Add ``value`` to the counter ``name``."""
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def stop(self):
+        """Stop memory tracing if this profiler started it."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def report(self):
+        """Return the recorded stages and counts as a JSON-serializable dict."""
+        return {
+            'stages': self.stages,
+            'counts': self.counts,
+            'total_wall_seconds': sum(stage['wall_seconds'] for stage in self.stages),
+            'total_cpu_seconds': sum(stage['cpu_seconds'] for stage in self.stages),
+            'trace_memory': self.trace_memory,
+        }
+
+    def write_json(self, path):
+        """Write ``report()`` to ``path``."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+            f.write('\n')
+
+    def summary(self):
+        """Return the stages as a printable table."""
+        lines = [f"{'stage':<14}{'wall s':>9}{'cpu s':>9}" + (f"{'peak MB':>10}" if self.trace_memory else "")]
+        for stage in self.stages:
+            line = f"{stage['name']:<14}{stage['wall_seconds']:>9.3f}{stage['cpu_seconds']:>9.3f}"
+            if self.trace_memory:
+                line += f"{stage['peak_bytes'] / 1e6:>10.1f}"
+            lines.append(line)
+        lines.append(', '.join(f"{name}: {value}" for name, value in self.counts.items()))
+        return '\n'.join(lines)
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Long-running render server.
+
+Loads reportlab, the font and the styles once and then renders reports on
+request, so per-report latency is dominated by layout instead of interpreter
+startup, imports and font parsing. Rendering runs in a pool of warm worker
+processes (set up exactly like the batch_render.py workers); requests beyond
+the pool size wait in a bounded queue and are rejected with 503 when it is
+full. A request that times out keeps its place in the queue until its worker
+is done, so timeouts cannot pile up more renders than the queue allows.
+
+A request's ``font`` must be the server's own font or a file in the
+project's ``font/`` directory, given by name or path. Images in its
+markdown are read from the project's ``images/`` directory and must be
+relative paths inside it, and its ``metadata`` must map names to plain
+text. Other requests are rejected with 400. Renders only look up the
+translation memory, so the workers never wait on each other's writes.
+
+Endpoints:
+    POST /render   JSON body {"markdown": "...", "metadata": {...}, "font": "..."}
+                   answers with the PDF bytes (application/pdf)
+    GET  /health   JSON with worker, queue and request counters
+
+Usage:
+    python render_server.py --port 8765 --workers 4
+    python render_server.py --unix /tmp/llmquant-render.sock
+
+    curl --data-binary @request.json http://127.0.0.1:8765/render -o report.pdf
+"""
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import batch_render
+import generate_report_simple as generator
+
+# Fonts requests may ask for, besides the font the server was started with
+FONT_DIR = os.path.join(generator.PROJECT_DIR, "font")
+FONT_EXTENSIONS = ('.ttf', '.ttc', '.otf')
+# Directory relative image paths in request markdown are taken from; no other images are read
+IMAGE_DIR = os.path.join(generator.PROJECT_DIR, "images")
+# Seconds warm_up waits for every worker to start
+WARM_UP_TIMEOUT = 120
+
+
+def render_markdown(markdown_text, metadata=None, font_path=None):
+    """Render markdown text to PDF bytes inside a warm worker process, without temporary files."""
+    output = io.BytesIO()
+    generator.write_pdf(markdown_text, output, font_path, metadata=metadata,
+                        styles=batch_render._worker_styles, update_translation_memory=False, image_dir=IMAGE_DIR)
+    return output.getvalue()
+
+
+def check_metadata(metadata):
+    """Raise ValueError unless ``metadata`` is None or a dict of plain text values by name."""
+    if metadata is None:
+        return
+    if not isinstance(metadata, dict):
+        raise ValueError("metadata must be an object of text values")
+    for key, value in metadata.items():
+        if not isinstance(value, str):
+            raise ValueError(f"metadata {key!r} must be text")
+        # The cover lays out metadata as paragraph markup, which could also embed files
+        if '<' in value or '>' in value:
+            raise ValueError(f"metadata {key!r} must be plain text, without '<' or '>'")
+
+
+def check_images(markdown_text):
+    """Raise ValueError unless every image in the markdown is a file inside IMAGE_DIR."""
+    import document_ir
+
+    image_dir = os.path.realpath(IMAGE_DIR)
+    for block in document_ir.parse_markdown(markdown_text):
+        if isinstance(block, document_ir.Image):
+            # Symbolic links are followed, so a link inside the directory cannot point out of it
+            path = os.path.realpath(os.path.join(IMAGE_DIR, block.src))
+            if '://' in block.src or os.path.commonpath([image_dir, path]) != image_dir:
+                raise ValueError(f"image {block.src!r} is not available; "
+                                 "images must be relative paths inside the server's image directory")
+
+
+def _warm_up(barrier):
+    """Task that holds its worker until every worker runs one, so that the pool starts them all."""
+    barrier.wait(timeout=WARM_UP_TIMEOUT)
+    return os.getpid()
+
+
+class RenderService:
+    """Worker pool plus a bounded request queue shared by all connections."""
+
+    def __init__(self, workers=None, max_queue=None, font_path=None, timeout=300):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue if max_queue is not None else self.workers * 4
+        self.font_path = font_path
+        self.fonts = self._allowed_fonts()
+        self.timeout = timeout
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=batch_render.init_worker,
+                                        initargs=(font_path,))
+        # Requests either rendering or waiting for a worker
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self._lock = threading.Lock()
+        self.stats = {'in_flight': 0, 'rendered': 0, 'failed': 0, 'rejected': 0, 'render_seconds': 0.0}
+
+    def _allowed_fonts(self):
+        fonts = {}
+        if os.path.isdir(FONT_DIR):
+            for name in os.listdir(FONT_DIR):
+                if name.lower().endswith(FONT_EXTENSIONS):
+                    fonts[os.path.realpath(os.path.join(FONT_DIR, name))] = os.path.join(FONT_DIR, name)
+        if self.font_path:
+            fonts[os.path.realpath(self.font_path)] = self.font_path
+        return fonts
+
+    def resolve_font(self, font):
+        """Return the font file a request's ``font`` names; raises ValueError for fonts not allowed."""
+        if not font:
+            return self.font_path
+        if not isinstance(font, str):
+            raise ValueError("font must be a file name")
+        # A bare name is looked up in the font directory, as are paths relative to the project
+        path = os.path.realpath(os.path.join(FONT_DIR if os.path.basename(font) == font else generator.PROJECT_DIR,
+                                             font))
+        if path not in self.fonts:
+            raise ValueError(f"font {font!r} is not available; choose one of "
+                             f"{sorted(os.path.basename(name) for name in self.fonts)}")
+        return self.fonts[path]
+
+    def warm_up(self):
+        """Start all worker processes (and their font/style setup) eagerly; returns how many started."""
+        # Each worker runs one task, because the tasks only finish once all are running
+        with multiprocessing.Manager() as manager:
+            barrier = manager.Barrier(self.workers)
+            pids = {f.result() for f in [self.pool.submit(_warm_up, barrier) for _ in range(self.workers)]}
+        return len(pids)
+
+    def _release(self, future):
+        with self._lock:
+            self.stats['in_flight'] -= 1
+        self._slots.release()
+
+    def render(self, markdown_text, metadata=None, font_path=None):
+        """Render a report; returns PDF bytes, or None if the queue is full.
+
+        On a timeout the render is cancelled if it has not started. One that
+        has keeps its slot until the worker is done with it.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.stats['rejected'] += 1
+            return None
+        with self._lock:
+            self.stats['in_flight'] += 1
+        start = time.perf_counter()
+        future = None
+        try:
+            future = self.pool.submit(render_markdown, markdown_text, metadata, font_path or self.font_path)
+            future.add_done_callback(self._release)
+            pdf_bytes = future.result(timeout=self.timeout)
+            with self._lock:
+                self.stats['rendered'] += 1
+            return pdf_bytes
+        except Exception:
+            if future is None:
+                self._release(None)
+            else:
+                future.cancel()
+            with self._lock:
+                self.stats['failed'] += 1
+            raise
+        finally:
+            with self._lock:
+                self.stats['render_seconds'] += time.perf_counter() - start
+
+    def health(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['workers'] = self.workers
+        stats['max_queue'] = self.max_queue
+        stats['render_seconds'] = round(stats['render_seconds'], 3)
+        return stats
+
+    def shutdown(self):
+        self.pool.shutdown(wait=True)
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    service = None  # set on the subclass created by make_server
+
+    def _send(self, status, body, content_type='application/json', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, payload, headers=None):
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode('utf-8'), headers=headers)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, self.service.health())
+        else:
+            self._send_json(404, {'error': f"unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != '/render':
+            self._send_json(404, {'error': f"unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length).decode('utf-8'))
+            markdown_text = request['markdown']
+        except (ValueError, KeyError) as e:
+            self._send_json(400, {'error': f"expected JSON with a 'markdown' field: {e}"})
+            return
+        try:
+            font_path = self.service.resolve_font(request.get('font'))
+            check_metadata(request.get('metadata'))
+            check_images(markdown_text)
+        except ValueError as e:
+            self._send_json(400, {'error': str(e)})
+            return
+
+        try:
+            pdf_bytes = self.service.render(markdown_text, request.get('metadata'), font_path)
+        except Exception as e:
+            self._send_json(500, {'error': f"{type(e).__name__}: {e}"})
+            return
+        if pdf_bytes is None:
+            self._send_json(503, {'error': "render queue is full"}, headers={'Retry-After': '1'})
+            return
+        self._send(200, pdf_bytes, content_type='application/pdf')
+
+    def address_string(self):
+        # Unix socket peers have no (host, port) address
+        if isinstance(self.client_address, tuple):
+            return super().address_string()
+        return 'unix'
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service, host='127.0.0.1', port=8765, unix_socket=None):
+    """Create an HTTP server (TCP or Unix socket) bound to ``service``."""
+    handler = type('BoundRenderRequestHandler', (RenderRequestHandler,), {'service': service})
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+        return ThreadingUnixHTTPServer(unix_socket, handler)
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve PDF renders from warm worker processes.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, default=None, help="render processes (default: CPU count)")
+    parser.add_argument("--max-queue", type=int, default=None, help="requests allowed to wait for a worker")
+    parser.add_argument("--font", default=None, help="font file registered in every worker")
+    args = parser.parse_args(argv)
+
+    service = RenderService(args.workers, args.max_queue, args.font)
+    print(f"Starting {service.workers} render workers...")
+    service.warm_up()
+
+    server = make_server(service, args.host, args.port, args.unix)
+    where = args.unix or f"http://{args.host}:{server.server_address[1]}"
+    print(f"Render server listening on {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
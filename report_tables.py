@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Markdown tables rendered as ReportLab Tables.
+
+Cells are classified once per table: every body cell goes through one
+compiled regex that recognises plain numbers, currency amounts, percentages
+and signed deltas. Columns whose cells are all numeric are right-aligned
+unless the markdown ``:---:`` markers say otherwise, and signed cells are
+coloured green or red. The classification comes from the source cells, so
+both language versions of a table share it.
+
+Column widths are measured once from the cell text, and the tables are built
+with ``longTableOptimize``. When a long table is split across pages, each
+part keeps the row heights that were already computed instead of
+re-wrapping every cell again.
+"""
+
+import html
+import re
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import Table, TableStyle
+
+from cjk_linebreak import CJKParagraph as Paragraph
+
+POSITIVE_COLOR = colors.HexColor('#1B7F3B')
+NEGATIVE_COLOR = colors.HexColor('#B22222')
+HEADER_BACKGROUND = colors.HexColor('#DCE6F2')
+STRIPE_BACKGROUND = colors.HexColor('#F5F7FA')
+CELL_PADDING = 4
+MIN_COLUMN_WIDTH = 36
+
+_ALIGNMENTS = {'left': TA_LEFT, 'center': TA_CENTER, 'right': TA_RIGHT}
+
+# Optional sign, optional accounting parentheses and currency, a number with
+# thousands separators, then an optional unit such as %, pp or 亿
+_NUMBER_RE = re.compile(r"""
+    (?P<sign>[+\-−])?\s*
+    (?P<open>\()?\s*
+    (?P<currency>US\$|HK\$|RMB|[$¥€£])?\s*
+    (?P<number>\d[\d,]*(?:\.\d+)?|\.\d+)\s*
+    (?P<unit>%|pp|bps?|[kKmMbB]n?|亿|万|千)?\s*
+    (?P<close>\))?
+    (?:\s*(?:美元|元|USD|CNY|x))?
+""", re.VERBOSE)
+
+
+class NumericCell:
+    """Parsed value of a numeric cell; ``sign`` is +1/-1 for explicit deltas, else 0."""
+
+    __slots__ = ('value', 'kind', 'sign')
+
+    def __init__(self, value, kind, sign):
+        self.value = value
+        self.kind = kind
+        self.sign = sign
+
+    def __repr__(self):
+        return f"NumericCell({self.value!r}, {self.kind!r}, sign={self.sign})"
+
+
+def parse_numeric(text):
+    """Return a NumericCell for a number, amount or percentage, or None for text."""
+    match = _NUMBER_RE.fullmatch(text.strip())
+    if match is None or bool(match.group('open')) != bool(match.group('close')):
+        return None
+    value = float(match.group('number').replace(',', ''))
+    sign = 0
+    if match.group('sign') in ('-', '−') or match.group('open'):
+        value, sign = -value, -1
+    elif match.group('sign') == '+':
+        sign = 1
+    unit = match.group('unit')
+    if match.group('currency'):
+        kind = 'currency'
+    elif unit in ('%', 'pp', 'bp', 'bps'):
+        kind = 'percent'
+    else:
+        kind = 'number'
+    return NumericCell(value, kind, sign)
+
+
+def analyze_table(table):
+    """Classify the body cells of an IR Table.
+
+    Returns ``(cells, alignments)``: a grid of NumericCell or None matching
+    ``table.rows``, and the alignment of every column.
+    """
+    cells = [[parse_numeric(text) for text in row] for row in table.rows]
+    columns = max([len(table.header)] + [len(row) for row in table.rows])
+    alignments = []
+    for column in range(columns):
+        marker = table.alignments[column] if column < len(table.alignments) else None
+        values = [(row[column], text_row[column]) for row, text_row in zip(cells, table.rows)
+                  if column < len(row) and text_row[column].strip()]
+        numeric = bool(values) and all(cell is not None for cell, _ in values)
+        alignments.append(marker or ('right' if numeric else 'left'))
+    return cells, alignments
+
+
+def _column_widths(grid, font_name, font_size, numeric_columns, available_width):
+    """Natural column widths, with text columns shrunk to fit ``available_width``."""
+    widths = [MIN_COLUMN_WIDTH] * len(numeric_columns)
+    for row in grid:
+        for column, markup in enumerate(row):
+            width = stringWidth(html.unescape(markup), font_name, font_size) + 2 * CELL_PADDING
+            if width > widths[column]:
+                widths[column] = width
+    if sum(widths) <= available_width:
+        return widths
+
+    # Numbers must not wrap; text columns share whatever width is left
+    fixed = sum(w for w, numeric in zip(widths, numeric_columns) if numeric)
+    flexible = sum(w for w, numeric in zip(widths, numeric_columns) if not numeric)
+    remaining = available_width - fixed
+    if flexible and remaining >= MIN_COLUMN_WIDTH * (len(widths) - sum(numeric_columns)):
+        scale = remaining / flexible
+        return [w if numeric else max(MIN_COLUMN_WIDTH, w * scale)
+                for w, numeric in zip(widths, numeric_columns)]
+    scale = available_width / sum(widths)
+    return [w * scale for w in widths]
+
+
+def build_table(header, rows, cells, alignments, header_style, cell_style, available_width):
+    """Build a ReportLab Table from one language's cell markup.
+
+    ``header`` and ``rows`` hold escaped Paragraph markup; ``cells`` and
+    ``alignments`` come from analyze_table on the source table.
+    """
+    columns = len(alignments)
+    grid = [list(header) + [''] * (columns - len(header))] if header else []
+    grid += [list(row) + [''] * (columns - len(row)) for row in rows]
+    numeric_columns = [alignment == 'right' for alignment in alignments]
+    widths = _column_widths(grid, cell_style.fontName, cell_style.fontSize, numeric_columns, available_width)
+
+    # One ParagraphStyle per (base, alignment, colour) rather than per cell
+    variants = {}
+
+    def style_for(base, alignment, color=None):
+        key = (base.name, alignment, color)
+        if key not in variants:
+            variants[key] = ParagraphStyle(
+                name=f"{base.name}-{alignment}-{color}", parent=base,
+                alignment=_ALIGNMENTS.get(alignment, TA_LEFT),
+                textColor=color or base.textColor,
+            )
+        return variants[key]
+
+    data = []
+    if header:
+        data.append([Paragraph(text, style_for(header_style, alignments[column]))
+                     for column, text in enumerate(grid[0])])
+    for row_cells, row in zip(cells, grid[len(data):]):
+        paragraphs = []
+        for column, text in enumerate(row):
+            numeric = row_cells[column] if column < len(row_cells) else None
+            color = None
+            if numeric is not None and numeric.sign:
+                color = POSITIVE_COLOR if numeric.sign > 0 else NEGATIVE_COLOR
+            paragraphs.append(Paragraph(text, style_for(cell_style, alignments[column], color)))
+        data.append(paragraphs)
+
+    commands = [
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.lightgrey),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('LEFTPADDING', (0, 0), (-1, -1), CELL_PADDING),
+        ('RIGHTPADDING', (0, 0), (-1, -1), CELL_PADDING),
+        ('TOPPADDING', (0, 0), (-1, -1), 3),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+    ]
+    body_start = 1 if header else 0
+    if header:
+        commands.append(('BACKGROUND', (0, 0), (-1, 0), HEADER_BACKGROUND))
+    if len(data) > body_start:
+        commands.append(('ROWBACKGROUNDS', (0, body_start), (-1, -1), [colors.white, STRIPE_BACKGROUND]))
+
+    return Table(data, colWidths=widths, style=TableStyle(commands), repeatRows=body_start,
+                 longTableOptimize=1, hAlign='LEFT')
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Table of contents whose page numbers are filled in after layout.
+
+ReportLab's TableOfContents draws the entries it collected in the previous
+pass, so ``multiBuild`` needs at least two passes, and a third one whenever
+the page numbers move. Each pass lays out the whole report again.
+
+The report already knows its headings before layout, because they come from
+the document IR, so the TOC is seeded with them up front. Each page number
+is drawn as a reference to a form XObject, with room reserved for the
+widest number. The forms are defined once the pages are known, just before
+the canvas is saved. TOC entries therefore take the same space on every
+pass, nothing after the TOC moves, and a single pass is enough.
+
+Page numbers arrive through the usual ``afterFlowable`` -> ``notify``
+mechanism. If a heading shows up that was not seeded, the TOC reports itself
+unsatisfied and ``multiBuild`` runs another pass with the corrected entries.
+
+When the headings are laid out in other documents that are appended later
+(see parallel_render.py), their keys are given in ``external_keys``. Room
+is left for their page numbers, and the rectangle of each such entry is
+recorded in ``external_links``, so that the numbers can be stamped and the
+links added once the length of the front matter is known.
+"""
+
+import html
+from ast import literal_eval
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table
+from reportlab.platypus.tableofcontents import TableOfContents
+
+# Widest page number the TOC leaves room for
+PAGE_NUMBER_TEMPLATE = "0000"
+
+
+class ForwardTableOfContents(TableOfContents):
+    """TableOfContents that is laid out from seeded entries in a single pass."""
+
+    def __init__(self, **kwds):
+        super().__init__(**kwds)
+        self._pages = {}
+        self._seen = []
+        self._number_styles = {}
+        # Keys of headings in appended parts
+        self.external_keys = set()
+        # (page, absolute rect, key) of entries pointing into appended parts
+        self.external_links = []
+
+    def beforeBuild(self):
+        # Unlike the base class, entries are kept; only page numbers are reset
+        self._pages = {}
+        self._seen = []
+        self._number_styles = {}
+        self.external_links = []
+
+    def afterBuild(self):
+        if not self.isSatisfied():
+            # Lay out the next pass with the headings that were actually found
+            self._entries = [(level, text, 0, key) for level, text, _, key in self._seen]
+
+    def isSatisfied(self):
+        expected = [key for _, _, _, key in self._entries if key not in self.external_keys]
+        return [key for _, _, _, key in self._seen] == expected
+
+    def notify(self, kind, stuff):
+        if kind == self._notifyKind:
+            level, text, page, key = stuff
+            self._seen.append((level, text, page, key))
+            self._pages.setdefault(key, page)
+
+    def form_name(self, key):
+        return f"tocPage-{key}"
+
+    def wrap(self, availWidth, availHeight):
+        entries = self._entries or [(0, 'Placeholder for table of contents', 0, None)]
+
+        def drawTOCEntryEnd(canvas, kind, label):
+            '''Callback to draw dots and a forward reference to the page number.'''
+            level, key = label.split(',', 1)
+            level, key = int(level), literal_eval(key.replace('\\x2c', ','))
+            style = self.getLevelStyle(level)
+            x, y = canvas._curr_tx_info['cur_x'], canvas._curr_tx_info['cur_y']
+            number_width = stringWidth(PAGE_NUMBER_TEMPLATE, style.fontName, style.fontSize)
+
+            if self.dotsMinLevel >= 0 and level >= self.dotsMinLevel:
+                dot = ' . '
+                dot_width = stringWidth(dot, style.fontName, style.fontSize)
+                count = max(0, int((availWidth - x - number_width) / dot_width))
+                text = canvas.beginText(availWidth - number_width - count * dot_width, y)
+                text.setFont(style.fontName, style.fontSize)
+                text.setFillColor(style.textColor)
+                text.textLine(count * dot)
+                canvas.drawText(text)
+
+            if key in self.external_keys:
+                # The number is stamped at the right end of the rectangle's baseline later
+                rect = canvas._absRect((0, y, availWidth, y + style.leading), 1)
+                self.external_links.append((canvas.getPageNumber(), rect, key))
+            elif key:
+                self._number_styles[key] = style
+                canvas.saveState()
+                canvas.translate(availWidth, y)
+                canvas.doForm(self.form_name(key))
+                canvas.restoreState()
+                canvas.linkRect('', key, (availWidth - number_width, y, availWidth, y + style.leading),
+                                relative=1)
+        self.canv.setNamedCB('drawTOCEntryEnd', drawTOCEntryEnd)
+
+        tableData = []
+        for level, text, _, key in entries:
+            style = self.getLevelStyle(level)
+            if key:
+                # Links into appended parts are added after the merge
+                if key not in self.external_keys:
+                    text = '<a href="#%s">%s</a>' % (key, text)
+                keyVal = repr(key).replace(',', '\\x2c').replace('"', '\\x2c')
+            else:
+                keyVal = None
+            para = Paragraph('%s<onDraw name="drawTOCEntryEnd" label="%d,%s"/>' % (text, level, keyVal), style)
+            if style.spaceBefore:
+                tableData.append([Spacer(1, style.spaceBefore)])
+            tableData.append([para])
+
+        self._table = Table(tableData, colWidths=(availWidth,), style=self.tableStyle)
+        self.width, self.height = self._table.wrapOn(self.canv, availWidth, availHeight)
+        return (self.width, self.height)
+
+    def format_page_number(self, page):
+        return '?' if page is None else str(self.formatter(page) if self.formatter else page)
+
+    def define_page_numbers(self, canvas):
+        """Define the page number forms referenced while drawing the TOC."""
+        for key, style in self._number_styles.items():
+            number = self.format_page_number(self._pages.get(key))
+            canvas.beginForm(self.form_name(key), lowerx=-stringWidth(number, style.fontName, style.fontSize),
+                             lowery=-style.fontSize, upperx=0, uppery=style.leading)
+            canvas.setFont(style.fontName, style.fontSize)
+            canvas.setFillColor(style.textColor)
+            canvas.drawRightString(0, 0, number)
+            canvas.endForm()
+
+
+class ReportDocTemplate(SimpleDocTemplate):
+    """SimpleDocTemplate that reports TOC headings and adds them to the PDF outline.
+
+    A flowable takes part when it has a ``toc_entry`` attribute of
+    ``(level, text, key)``; ``key`` must also be an ``<a name>`` anchor in it.
+    The entries laid out by the last build are kept in ``headings`` as
+    ``(level, text, key, page)``.
+    """
+
+    def beforeDocument(self):
+        self.headings = []
+        self._outline_level = -1
+
+    def afterFlowable(self, flowable):
+        entry = getattr(flowable, 'toc_entry', None)
+        if entry is None:
+            return
+        level, text, key = entry
+        # Outline levels may only go one deeper than the previous entry
+        outline_level = min(level, self._outline_level + 1)
+        self._outline_level = outline_level
+        self.canv.addOutlineEntry(html.unescape(text), key, level=outline_level, closed=outline_level > 0)
+        self.headings.append((level, text, key, self.page))
+        self.notify('TOCEntry', (level, text, self.page, key))
+
+    def _endBuild(self):
+        # Page numbers are all known now; define the TOC's forms before the save
+        for flowable in self._indexingFlowables:
+            if isinstance(flowable, ForwardTableOfContents):
+                flowable.define_page_numbers(self.canv)
+        super()._endBuild()
@@ -16,17 +16,21 @@ fi
 echo "Activating virtual environment..."
 source llmquant_env/bin/activate
 
-# Check if the required packages are installed
-echo "Checking and installing required packages..."
-pip install -r requirements.txt
+# Install the required packages when requirements.txt changed since the last install
+REQUIREMENTS_STAMP="llmquant_env/.requirements-installed"
+if [ ! -f "$REQUIREMENTS_STAMP" ] || [ requirements.txt -nt "$REQUIREMENTS_STAMP" ]; then
+    echo "Installing required packages..."
+    pip install -r requirements.txt && touch "$REQUIREMENTS_STAMP"
+fi
 
 # Set default font path to the project font
 DEFAULT_FONT_PATH="$(pwd)/font/STKaiti.ttf"
 
-# Get font path from command line argument
+# Get font path from the first command line argument; options such as --watch follow it
 FONT_PATH=""
-if [ "$1" != "" ]; then
+if [ "$1" != "" ] && [[ "$1" != -* ]]; then
     FONT_PATH="$1"
+    shift
     if [ ! -f "$FONT_PATH" ]; then
         echo "Warning: Font file not found at $FONT_PATH. Will use default font."
         FONT_PATH="$DEFAULT_FONT_PATH"
@@ -46,9 +50,9 @@ fi
 # Run the report generator
 echo "Generating PDF report..."
 if [ "$FONT_PATH" != "" ]; then
-    python generate_report_simple.py "$FONT_PATH"
+    python generate_report_simple.py "$FONT_PATH" "$@"
 else
-    python generate_report_simple.py
+    python generate_report_simple.py "$@"
 fi
 
 echo "Done! Check output/LLMQuant_Report.pdf for the generated report."
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Render very large markdown reports with bounded memory.
+
+The regular renderer reads the whole file, parses it into one document IR
+and lays out both languages as one story, so memory grows with the input.
+Here the file is read one chunk at a time. A chunk ends at a blank line
+before a ``#``/``##`` chapter heading once it is larger than ``chunk_size``
+characters, or at any blank line if it is four times larger. Each chunk is
+parsed, translated and laid out into its own PDF on disk, and then dropped,
+with its headings written next to it. The English section is rendered in
+one pass over the file and the Chinese section in a second pass.
+
+The parts are merged exactly like the parallel renderer's parts (see
+parallel_render.py), so page numbers, the outline and the TOC cover the
+whole report. Each chunk starts on a new page. Markdown constructs that
+span chunks, such as reference-style link definitions, are not resolved
+across chunk boundaries.
+
+Usage:
+    python generate_report_simple.py --stream --input filings.md
+"""
+
+import os
+import re
+import tempfile
+
+import document_ir
+import generate_report_simple as generator
+from paragraph_cache import CachedParagraph
+from parallel_render import assemble_report, layout_part, spill_headings
+from translation_backend import BatchTranslator
+
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+# Paragraph cache entries kept between chunks; the boilerplate that repeats is far fewer
+STREAM_PARAGRAPH_CACHE_ENTRIES = 2000
+
+_CHAPTER_RE = re.compile(r'#{1,2}\s')
+_FENCE_RE = re.compile(r'\s*(```|~~~)')
+
+
+def iter_markdown_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield a markdown file in pieces that end just before a chapter heading."""
+    lines = []
+    size = 0
+    fenced = False
+    previous_blank = True
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if _FENCE_RE.match(line):
+                fenced = not fenced
+            elif not fenced and previous_blank and lines:
+                if size >= 4 * chunk_size or (size >= chunk_size and _CHAPTER_RE.match(line)):
+                    yield ''.join(lines)
+                    lines = []
+                    size = 0
+            lines.append(line)
+            size += len(line)
+            previous_blank = not line.strip()
+    if lines:
+        yield ''.join(lines)
+
+
+def render_streaming(input_md_path, output_pdf_path, backend, memory=None, styles=None, metadata=None,
+                     chunk_size=None):
+    """Render ``input_md_path`` chunk by chunk; returns the number of parts laid out.
+
+    Chunks are about ``chunk_size`` characters, DEFAULT_CHUNK_SIZE unless given.
+    """
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    metadata = {**generator.DEFAULT_METADATA, **(metadata or {})}
+    if styles is None:
+        styles = generator.create_styles()
+    base_dir = os.path.dirname(os.path.abspath(input_md_path))
+
+    with tempfile.TemporaryDirectory(prefix="llmquant-stream-") as tmp_dir:
+        results = []
+        for language in ('en', 'zh'):
+            start = 0
+            for number, chunk in enumerate(iter_markdown_chunks(input_md_path, chunk_size)):
+                blocks = document_ir.parse_markdown(chunk, base_dir=base_dir)
+                translated = {}
+                if language == 'en':
+                    segments = [generator.clean_html(text) for text in document_ir.iter_segments(blocks)]
+                    translated = BatchTranslator(backend, memory=memory).translate(segments)
+                result = layout_part({
+                    'language': language, 'blocks': blocks, 'start': start, 'opening': number == 0,
+                    'translated': translated, 'metadata': metadata,
+                    'output': os.path.join(tmp_dir, f"{language}-{number:05d}.pdf"),
+                }, styles)
+                spill_headings(result, os.path.join(tmp_dir, f"{language}-{number:05d}-headings.jsonl"))
+                results.append(result)
+                start += len(blocks)
+                # Headings and other one-off paragraphs would otherwise fill the cache up to its limit
+                if CachedParagraph.cache is not None:
+                    CachedParagraph.cache.trim(STREAM_PARAGRAPH_CACHE_ENTRIES)
+
+        assemble_report(results, output_pdf_path, styles, metadata, tmp_dir)
+    return len(results)
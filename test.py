@@ -10,16 +10,12 @@ import os
 def check_module(module_name):
     """Check if a module is installed by trying to import it."""
     try:
-        if module_name == "bs4":
-            import bs4
-        elif module_name == "PIL":
+        if module_name == "PIL":
             import PIL
         elif module_name == "reportlab":
             import reportlab
         elif module_name == "markdown":
             import markdown
-        elif module_name == "jieba":
-            import jieba
         else:
             __import__(module_name)
         print(f"✅ {module_name} is installed")
@@ -59,8 +55,6 @@ def main():
     modules_ok = all([
         check_module("reportlab"),
         check_module("markdown"),
-        check_module("jieba"),
-        check_module("bs4"),  # BeautifulSoup4
         check_module("PIL")   # Pillow
     ])
     
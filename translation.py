@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Glossary-based Chinese to English translation.
+
+The glossary is compiled once into a character trie. Each text is then
+translated in a single left-to-right scan that always prefers the longest
+glossary term starting at the current position, so "苹果公司" wins over
+"苹果" and "公司" regardless of the order of the dictionary.
+"""
+
+# Marks a node in the trie at which a glossary term ends. Real keys are single
+# characters, so the empty string can never clash with one.
+_TERM = ''
+
+
+class GlossaryTranslator:
+    """Longest-match translator compiled from a {source: target} glossary."""
+
+    __slots__ = ('_root', 'size', 'max_term_length')
+
+    def __init__(self, glossary):
+        root = {}
+        max_term_length = 0
+        for source, target in glossary.items():
+            if not source:
+                continue
+            node = root
+            for char in source:
+                child = node.get(char)
+                if child is None:
+                    child = node[char] = {}
+                node = child
+            node[_TERM] = target
+            max_term_length = max(max_term_length, len(source))
+
+        self._root = root
+        self.size = len(glossary)
+        self.max_term_length = max_term_length
+
+    def translate(self, text):
+        """Replace every glossary term in ``text`` using leftmost-longest matching."""
+        root = self._root
+        pieces = []
+        length = len(text)
+        pending = 0  # start of the run of characters copied through unchanged
+        pos = 0
+
+        while pos < length:
+            node = root.get(text[pos])
+            if node is None:
+                pos += 1
+                continue
+
+            # Walk down the trie as far as the text allows, remembering the
+            # deepest node that closes a glossary term.
+            match_end = -1
+            match = None
+            end = pos + 1
+            while True:
+                if _TERM in node:
+                    match_end = end
+                    match = node[_TERM]
+                if end == length:
+                    break
+                node = node.get(text[end])
+                if node is None:
+                    break
+                end += 1
+
+            if match_end < 0:
+                pos += 1
+                continue
+
+            if pending < pos:
+                pieces.append(text[pending:pos])
+            pieces.append(match)
+            pos = pending = match_end
+
+        if not pieces:
+            return text
+        if pending < length:
+            pieces.append(text[pending:])
+        return ''.join(pieces)
+
+    __call__ = translate
+
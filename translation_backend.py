@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Pluggable, batched translation backends.
+
+A backend translates a batch of segments per call. BatchTranslator sits in
+front of any backend and takes care of deduplicating the segments of a
+document, consulting the translation memory, splitting the rest into batches,
+running the batches with bounded asyncio concurrency and retrying transient
+failures with exponential backoff.
+
+Two stand-ins are included so throughput can be measured offline:
+FakeMTBackend simulates a remote service in-process, and MockTranslationServer
+serves the same behaviour over local HTTP for HTTPBackend.
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class TransientTranslationError(Exception):
+    """A backend failure that is worth retrying (timeouts, throttling, 5xx)."""
+
+
+class TranslationBackend:
+    """Base class for translation backends.
+
+    Subclasses implement ``translate_batch`` and may lower ``max_batch_size``
+    to match the limits of the service they call.
+    """
+
+    max_batch_size = 64
+
+    async def translate_batch(self, segments):
+        """Return the translations of ``segments``, in the same order."""
+        raise NotImplementedError
+
+    def fingerprint(self):
+        """Return a string that differs between backends that translate differently.
+
+        Translation memory entries and cached PDFs are kept apart by it.
+        Subclasses add whatever configuration changes their translations.
+        """
+        return type(self).__name__
+
+
+class GlossaryBackend(TranslationBackend):
+    """Local backend that applies a compiled GlossaryTranslator."""
+
+    max_batch_size = 1024
+
+    def __init__(self, translator):
+        self.translator = translator
+
+    async def translate_batch(self, segments):
+        translate = self.translator.translate
+        return [translate(segment) for segment in segments]
+
+
+class FakeMTBackend(TranslationBackend):
+    """In-process stand-in for a remote MT service.
+
+    Each call sleeps ``latency`` seconds plus ``per_segment_latency`` per
+    segment and fails with probability ``failure_rate``; the translation
+    itself is produced by ``translator`` (or echoed back when None).
+    """
+
+    def __init__(self, translator=None, latency=0.05, per_segment_latency=0.0005,
+                 failure_rate=0.0, max_batch_size=64, seed=None):
+        self.translator = translator
+        self.latency = latency
+        self.per_segment_latency = per_segment_latency
+        self.failure_rate = failure_rate
+        self.max_batch_size = max_batch_size
+        self.calls = 0
+        self._random = random.Random(seed)
+
+    async def translate_batch(self, segments):
+        self.calls += 1
+        await asyncio.sleep(self.latency + self.per_segment_latency * len(segments))
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise TransientTranslationError("simulated service failure")
+        if self.translator is None:
+            return list(segments)
+        return [self.translator.translate(segment) for segment in segments]
+
+    def fingerprint(self):
+        return f"{type(self).__name__} {'echo' if self.translator is None else 'glossary'}"
+
+
+class HTTPBackend(TranslationBackend):
+    """Backend for a JSON-over-HTTP translation service.
+
+    The service receives ``{"segments": [...]}`` by POST and must answer with
+    ``{"translations": [...]}`` in the same order. Requests run in worker
+    threads so several batches can be in flight at once.
+    """
+
+    def __init__(self, url, timeout=30.0, max_batch_size=64, headers=None):
+        self.url = url
+        self.timeout = timeout
+        self.max_batch_size = max_batch_size
+        self.headers = {'Content-Type': 'application/json'}
+        if headers:
+            self.headers.update(headers)
+
+    def _post(self, segments):
+        body = json.dumps({'segments': segments}, ensure_ascii=False).encode('utf-8')
+        request = urllib.request.Request(self.url, data=body, headers=self.headers, method='POST')
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            if e.code == 429 or e.code >= 500:
+                raise TransientTranslationError(f"HTTP {e.code} from {self.url}") from e
+            raise
+        except (urllib.error.URLError, TimeoutError) as e:
+            raise TransientTranslationError(str(e)) from e
+
+        translations = payload['translations']
+        if len(translations) != len(segments):
+            raise ValueError(f"Expected {len(segments)} translations, got {len(translations)}")
+        return translations
+
+    async def translate_batch(self, segments):
+        return await asyncio.to_thread(self._post, list(segments))
+
+    def fingerprint(self):
+        # The service, and the model it runs, are chosen by the URL
+        return f"{type(self).__name__} {self.url}"
+
+
+class BatchTranslator:
+    """Translate all segments of a document through a backend.
+
+    Identical segments are sent once, cached segments are served from the
+    optional TranslationMemory, and at most ``max_concurrency`` batches are
+    in flight at a time. Transient errors are retried up to ``retries`` times
+    with exponential backoff starting at ``backoff`` seconds.
+    """
+
+    def __init__(self, backend, memory=None, max_concurrency=4, batch_size=None,
+                 retries=3, backoff=0.2):
+        self.backend = backend
+        self.memory = memory
+        self.max_concurrency = max_concurrency
+        self.batch_size = min(batch_size or backend.max_batch_size, backend.max_batch_size)
+        self.retries = retries
+        self.backoff = backoff
+        self.stats = {'segments': 0, 'unique': 0, 'cached': 0, 'batches': 0, 'retries': 0}
+
+    async def _run_batch(self, semaphore, batch):
+        async with semaphore:
+            for attempt in range(self.retries + 1):
+                try:
+                    return await self.backend.translate_batch(batch)
+                except TransientTranslationError:
+                    if attempt == self.retries:
+                        raise
+                    self.stats['retries'] += 1
+                    # Full jitter keeps concurrent batches from retrying in lockstep
+                    await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+    async def translate_all(self, segments):
+        """Return a {segment: translation} dict covering every input segment."""
+        unique = list(dict.fromkeys(segments))
+        self.stats['segments'] += len(segments)
+        self.stats['unique'] += len(unique)
+
+        results = {}
+        pending = []
+        for segment in unique:
+            cached = self.memory.lookup(segment) if self.memory is not None else None
+            if cached is None:
+                pending.append(segment)
+            else:
+                results[segment] = cached
+        self.stats['cached'] += len(unique) - len(pending)
+
+        batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+        self.stats['batches'] += len(batches)
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        translated = await asyncio.gather(*(self._run_batch(semaphore, batch) for batch in batches))
+
+        for batch, translations in zip(batches, translated):
+            for segment, translation in zip(batch, translations):
+                results[segment] = translation
+                if self.memory is not None:
+                    self.memory.store(segment, translation)
+        if self.memory is not None:
+            # Commit now, so that other processes sharing the memory are not locked out during layout
+            self.memory.flush()
+        return results
+
+    def translate(self, segments):
+        """Synchronous wrapper around ``translate_all``."""
+        return asyncio.run(self.translate_all(segments))
+
+
+class MockTranslationServer:
+    """Local HTTP translation service for offline benchmarking of HTTPBackend.
+
+    Serves ``POST /translate`` with the same latency model as FakeMTBackend.
+    Use as a context manager; ``url`` is valid while it is running.
+    """
+
+    def __init__(self, translator=None, latency=0.05, per_segment_latency=0.0005,
+                 host='127.0.0.1', port=0):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                segments = json.loads(self.rfile.read(length).decode('utf-8'))['segments']
+                time.sleep(server.latency + server.per_segment_latency * len(segments))
+                if server.translator is not None:
+                    segments = [server.translator.translate(s) for s in segments]
+                body = json.dumps({'translations': segments}, ensure_ascii=False).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.translator = translator
+        self.latency = latency
+        self.per_segment_latency = per_segment_latency
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/translate"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Persistent translation memory shared across report runs.
+
+Translated segments are stored in a local SQLite database keyed by a hash of
+the source text, the glossary version and the translation backend, so boilerplate that repeats between
+reports (disclaimers, segment names, risk language) is translated once and
+then costs a single lookup. The database is size bounded with least recently
+used eviction. Entries produced with another glossary are kept, since other
+processes may still use it, and dropped when the memory is opened once they
+have gone unused for STALE_VERSION_SECONDS.
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+
+DEFAULT_MAX_ENTRIES = 200000
+# Entries of other glossary versions unused for this long are dropped on open
+STALE_VERSION_SECONDS = 7 * 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    key BLOB PRIMARY KEY,
+    version TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS segments_last_used ON segments (last_used);
+"""
+
+
+def glossary_version(glossary):
+    """Return a stable fingerprint of a {source: target} glossary."""
+    digest = hashlib.sha256()
+    for source, target in sorted(glossary.items()):
+        digest.update(source.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(target.encode('utf-8'))
+        digest.update(b'\1')
+    return digest.hexdigest()[:16]
+
+
+class TranslationMemory:
+    """SQLite-backed cache of translated segments for one glossary version.
+
+    ``backend`` is the fingerprint of the translation backend (see
+    TranslationBackend.fingerprint). Backends share the file, but each only
+    hits the segments it translated itself. A ``read_only`` memory is only
+    looked up: nothing is stored and hits do not refresh their recency, so
+    processes that render side by side never wait for each other's writes.
+    """
+
+    def __init__(self, path, version, max_entries=DEFAULT_MAX_ENTRIES, backend='', read_only=False):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.version = version
+        self.backend = backend
+        self.max_entries = max_entries
+        self.read_only = read_only
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidated = 0
+
+        # Several batch workers may share one memory file
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+        if not read_only:
+            # Processes with another glossary share the file; their entries go once they are not used
+            cursor = self._conn.execute("DELETE FROM segments WHERE version != ? AND last_used < ?",
+                                        (version, time.time() - STALE_VERSION_SECONDS))
+            self.invalidated = cursor.rowcount
+            self._conn.commit()
+
+        self._count = self._conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        # Recency updates for hits are written in one batch on flush()
+        self._touched = set()
+
+    def _key(self, text):
+        return hashlib.blake2b(f"{self.version}\0{self.backend}\0{text}".encode('utf-8'), digest_size=16).digest()
+
+    def lookup(self, text):
+        """Return the stored translation of ``text``, or None on a miss."""
+        key = self._key(text)
+        row = self._conn.execute("SELECT translation FROM segments WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if not self.read_only:
+            self._touched.add(key)
+        return row[0]
+
+    def store(self, text, translation):
+        """Remember the translation of ``text``, evicting old entries when full."""
+        if self.read_only:
+            return
+        cursor = self._conn.execute(
+            "INSERT OR IGNORE INTO segments (key, version, translation, last_used) VALUES (?, ?, ?, ?)",
+            (self._key(text), self.version, translation, time.time()),
+        )
+        self._count += cursor.rowcount
+        if self._count > self.max_entries:
+            self._evict()
+
+    def _evict(self):
+        # Evict a tenth of the capacity at once so eviction is not paid on every store
+        excess = self._count - self.max_entries + max(1, self.max_entries // 10)
+        cursor = self._conn.execute(
+            "DELETE FROM segments WHERE key IN "
+            "(SELECT key FROM segments ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+        self._count -= cursor.rowcount
+        self.evictions += cursor.rowcount
+
+    def flush(self):
+        """Write pending recency updates and commit."""
+        if self._touched:
+            now = time.time()
+            self._conn.executemany(
+                "UPDATE segments SET last_used = ? WHERE key = ?",
+                ((now, key) for key in self._touched),
+            )
+            self._touched.clear()
+        self._conn.commit()
+
+    def close(self):
+        """Flush and close the underlying database."""
+        if self._conn is not None:
+            self.flush()
+            self._conn.close()
+            self._conn = None
+
+    def stats(self):
+        """Return hit/miss counters and the current size as a dict."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': self._count,
+            'evictions': self.evictions,
+            'invalidated': self.invalidated,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
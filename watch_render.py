@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Render a report again whenever its markdown, glossary, logos or images change.
+
+``--watch`` keeps one process running for an authoring session. The font is
+registered, the styles are built and the layout engine is imported once, and
+the paragraph layout cache, compiled glossary, prepared images, translation
+memory and output cache stay warm from one render to the next. With ``--incremental``, only
+the edited chapters are laid out again.
+
+The files are polled, so no extra dependency is needed. After a change, the
+render waits until no watched file has changed for ``debounce`` seconds.
+That way an editor that saves several files, or writes one in pieces,
+triggers a single render. The render time is printed after every cycle, and
+a failed render is reported without ending the session.
+
+Images are watched from the first render that shows them. The glossary
+is the ``translations`` dictionary of generate_report_simple.py. When that
+file changes, the dictionary is read again from the source. Other code
+changes need a restart.
+
+Usage:
+    python generate_report_simple.py --watch [--input input.md] [--incremental]
+"""
+
+import ast
+import os
+import time
+import traceback
+
+import document_ir
+import generate_report_simple as generator
+
+DEFAULT_INTERVAL = 0.1
+DEFAULT_DEBOUNCE = 0.25
+GLOSSARY_PATH = os.path.join(generator.PROJECT_DIR, "generate_report_simple.py")
+
+
+def load_glossary(path=GLOSSARY_PATH):
+    """Return the ``translations`` dictionary literal assigned in a Python source file."""
+    with open(path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), path)
+    for node in tree.body:
+        if (isinstance(node, ast.Assign) and len(node.targets) == 1
+                and isinstance(node.targets[0], ast.Name) and node.targets[0].id == 'translations'):
+            return ast.literal_eval(node.value)
+    raise ValueError(f"no translations dictionary in {path}")
+
+
+def watched_paths(input_md_path):
+    """Return the markdown, glossary and logo paths, followed by the images the markdown shows."""
+    paths = [os.path.abspath(input_md_path), GLOSSARY_PATH, generator.COVER_LOGO_PATH, generator.HEADER_LOGO_PATH]
+    try:
+        with open(input_md_path, 'r', encoding='utf-8') as f:
+            images = document_ir.referenced_images(f.read(), os.path.dirname(paths[0]))
+    except OSError:
+        images = []
+    for path in images:
+        if path not in paths and '://' not in path:
+            paths.append(path)
+    return paths
+
+
+def snapshot(paths):
+    """Return the (mtime, size) of every path, or None for missing files."""
+    state = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            state[path] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            state[path] = None
+    return state
+
+
+def wait_for_changes(paths, previous, interval=DEFAULT_INTERVAL, debounce=DEFAULT_DEBOUNCE):
+    """Block until some of ``paths`` changed and then stayed unchanged for ``debounce`` seconds.
+
+    Returns the new snapshot and the paths that differ from ``previous``.
+    """
+    current = previous
+    while current == previous:
+        time.sleep(interval)
+        current = snapshot(paths)
+
+    # Let the writes settle
+    settled = time.monotonic()
+    while time.monotonic() - settled < debounce:
+        time.sleep(min(interval, debounce - (time.monotonic() - settled)))
+        latest = snapshot(paths)
+        if latest != current:
+            current, settled = latest, time.monotonic()
+    return current, [path for path in paths if current[path] != previous[path]]
+
+
+def watch(input_md_path, output_pdf_path, font_path=None, interval=DEFAULT_INTERVAL,
+          debounce=DEFAULT_DEBOUNCE, **options):
+    """Render ``input_md_path`` now and after every change, until interrupted.
+
+    Other keyword arguments are passed to generate_pdf.
+    """
+    paths = watched_paths(input_md_path)
+
+    # Set up once for the whole session
+    generator.register_font(font_path)
+    styles = generator.create_styles()
+
+    state = snapshot(paths)
+    print(f"Watching {', '.join(os.path.basename(path) for path in paths)} (Ctrl+C to stop)")
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                generator.generate_pdf(input_md_path, output_pdf_path, font_path, styles=styles, **options)
+            except Exception:
+                traceback.print_exc()
+                print(f"Render failed after {time.perf_counter() - start:.2f}s, waiting for the next change")
+            else:
+                print(f"Rendered in {time.perf_counter() - start:.2f}s")
+
+            # Images added to the markdown are watched from now on, removed ones no longer
+            paths = watched_paths(input_md_path)
+            state = {path: state[path] if path in state else snapshot([path])[path] for path in paths}
+
+            state, changed = wait_for_changes(paths, state, interval, debounce)
+            print(f"\nChanged: {', '.join(os.path.basename(path) for path in changed)}")
+            if GLOSSARY_PATH in changed:
+                try:
+                    # A new dictionary, so that the compiled glossary is rebuilt as well
+                    generator.translations = load_glossary()
+                except (OSError, SyntaxError, ValueError) as e:
+                    print(f"Glossary not reloaded: {e}")
+    except KeyboardInterrupt:
+        print("\nStopped watching")